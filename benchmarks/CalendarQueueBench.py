@@ -0,0 +1,96 @@
+"""
+The event queue engines (heap, calendar, array) on the events a real layout
+generates.
+
+Usage: python -m benchmarks.CalendarQueueBench [conf_path] [scale ...]
+
+The layout of conf_path (simddc.conf by default) is built with rack_count
+multiplied by every scale (1 and 10 by default). Its whole mission
+(total_time) of events is generated once, then inserted into and drained
+from each engine. Insert covers filling the queue and the first pop,
+which freezes the array store. Bytes per event is what the filled queue
+keeps alive.
+"""
+import sys
+from random import seed
+from time import time
+
+from simulator.Configuration import Configuration
+from simulator.EventQueue import getEventQueue, ArrayEventQueue
+from simulator.XMLParser import XMLParser
+
+DEFAULT_CONF = r"/root/SIMDDC/conf/simddc.conf"
+
+
+class _Recorder(object):
+    """
+    Stands in for a queue while the units generate their events.
+    """
+    def __init__(self):
+        self.events = []
+
+    def addEvent(self, e):
+        self.events.append(e)
+
+
+def generate(conf_path, scale):
+    conf = Configuration(conf_path)
+    conf.rack_count *= scale
+    root = XMLParser(conf).readFile()[0]
+    recorder = _Recorder()
+    root.generateEvents(recorder, 0, conf.total_time, True)
+    return conf, recorder.events
+
+
+def queueBytes(queue):
+    if isinstance(queue, ArrayEventQueue):
+        size = sum(column.nbytes for column in [queue.times, queue.sequences,
+                   queue.types, queue.unit_indexes, queue.infos, queue.ignores,
+                   queue.next_recovery_times, queue.generations, queue.event_ids])
+        items = queue.side
+    else:
+        items = queue._entries()
+        size = sys.getsizeof(items)
+    # a queued entry is a (time, sequence, event) tuple
+    for item in items:
+        size += sys.getsizeof(item) + sys.getsizeof(item[0]) + sys.getsizeof(item[2])
+    return size
+
+
+def measure(queue, events):
+    start = time()
+    for e in events:
+        queue.addEvent(e)
+    e = queue.removeFirst()
+    insert_time = time() - start
+    # in a simulation queued events are only referenced by their queue, so
+    # entries count their events while the array store counts its columns.
+    size = queueBytes(queue)
+
+    start = time()
+    while e is not None:
+        e = queue.removeFirst()
+    pop_time = time() - start
+    return len(events)/max(insert_time, 1E-9), len(events)/max(pop_time, 1E-9), \
+        size/float(len(events))
+
+
+def main(conf_path=DEFAULT_CONF, scales=(1, 10)):
+    print "%8s %10s %12s %14s %14s %12s" % ("scale", "events", "queue", "insert ev/s",
+                                            "pop ev/s", "bytes/event")
+    for scale in scales:
+        seed(1)
+        conf, events = generate(conf_path, scale)
+        for engine in ["heap", "calendar", "array"]:
+            queue = getEventQueue(engine, conf.event_queue_bucket_width)
+            insert_rate, pop_rate, size = measure(queue, events)
+            print "%8d %10d %12s %14.0f %14.0f %12.1f" % (scale, len(events), engine,
+                                                         insert_rate, pop_rate, size)
+        del events
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1], [int(item) for item in sys.argv[2:]] or (1, 10))
+    else:
+        main()
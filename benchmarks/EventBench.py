@@ -0,0 +1,103 @@
+"""
+Per-event memory and dispatch speed of simulator.Event against the old
+Enum typed event with a per-event attributes dict.
+
+Usage: python -m benchmarks.EventBench [conf_path]
+
+The events of the whole mission of the conf_path layout (simddc.conf by
+default) are generated once and copied into the old representation. Memory
+is the sys.getsizeof() of each event with its own dicts, dispatch is the
+if/elif chain of EventHandler.handleEvent run over every event.
+"""
+import sys
+from time import time
+from random import seed
+
+from enum import Enum
+
+from simulator.Event import Event
+from benchmarks.CalendarQueueBench import DEFAULT_CONF, generate
+
+
+class LegacyEventType(Enum):
+    Start = 0
+    Failure = 1
+    Recovered = 2
+    EagerRecoveryStart = 3
+    EagerRecoveryInstallment = 4
+    LatentDefect = 5
+    LatentRecovered = 6
+    RAFIRecovered = 7
+    UpgradeCheck = 8
+    End = 9
+    Generate = 10
+
+
+class LegacyEvent(object):
+    """
+    The Event every event used to be, kept for comparison.
+    """
+    event_id = 0
+
+    def __init__(self, e_type, time, unit, info=-100, ignore=False,
+                 next_recovery_time=0):
+        self.type = e_type
+        self.time = time
+        self.unit = unit
+        self.info = info
+        self.ignore = ignore
+        self.next_recovery_time = next_recovery_time
+        self.attributes = {}
+        self.generation = unit.generation
+        LegacyEvent.event_id += 1
+        self.event_id = LegacyEvent.event_id
+
+    def getType(self):
+        return self.type
+
+
+def eventSize(e):
+    size = sys.getsizeof(e)
+    if hasattr(e, "__dict__"):
+        size += sys.getsizeof(e.__dict__)
+    if isinstance(e.attributes, dict):
+        size += sys.getsizeof(e.attributes)
+    return size
+
+
+def dispatch(events, event_type):
+    counts = [0]*7
+    start = time()
+    for e in events:
+        if e.getType() == event_type.Failure:
+            counts[0] += 1
+        elif e.getType() == event_type.Recovered:
+            counts[1] += 1
+        elif e.getType() == event_type.LatentDefect:
+            counts[2] += 1
+        elif e.getType() == event_type.LatentRecovered:
+            counts[3] += 1
+        elif e.getType() == event_type.EagerRecoveryStart:
+            counts[4] += 1
+        elif e.getType() == event_type.EagerRecoveryInstallment:
+            counts[5] += 1
+        else:
+            counts[6] += 1
+    return len(events)/max(time() - start, 1E-9)
+
+
+def main(conf_path=DEFAULT_CONF):
+    seed(1)
+    conf, events = generate(conf_path, 1)
+    legacy_events = [LegacyEvent(LegacyEventType(e.type), e.time, e.unit, e.info,
+                                 e.ignore, e.next_recovery_time) for e in events]
+
+    print "%10s %10s %16s %14s" % ("events", "event", "bytes per event", "dispatch ev/s")
+    for name, items, event_type in [("legacy", legacy_events, LegacyEventType),
+                                    ("slots", events, Event.EventType)]:
+        size = sum(eventSize(e) for e in items)/float(len(items))
+        print "%10d %10s %16.1f %14.0f" % (len(items), name, size, dispatch(items, event_type))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
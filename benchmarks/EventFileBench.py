@@ -0,0 +1,63 @@
+"""
+Text against binary event files for the events of a real layout.
+
+Usage: python -m benchmarks.EventFileBench [conf_path] [scale]
+
+The whole mission of events of the conf_path layout (simddc.conf by default,
+rack_count multiplied by scale) is generated once, then written by
+EventQueue.printAll and by EventQueue.writeAll with every compression
+available, and read back with EventFileReader.
+"""
+import os
+import sys
+from random import seed
+from tempfile import mkdtemp
+from time import time
+
+from simulator.EventFile import EventFileReader, lzma
+from simulator.EventQueue import EventQueue
+from simulator.XMLParser import XMLParser
+from simulator.Configuration import Configuration
+from benchmarks.CalendarQueueBench import DEFAULT_CONF, _Recorder
+
+
+def main(conf_path=DEFAULT_CONF, scale=1):
+    seed(1)
+    conf = Configuration(conf_path)
+    conf.rack_count *= int(scale)
+    root = XMLParser(conf).readFile()[0]
+    recorder = _Recorder()
+    root.generateEvents(recorder, 0, conf.total_time, True)
+    queue = EventQueue()
+    for e in recorder.events:
+        queue.addEvent(e)
+
+    directory = mkdtemp()
+    print "%10s %8s %12s %12s %12s" % ("events", "format", "write s", "MB", "read s")
+    formats = ["text", "none", "zlib"]
+    if lzma is not None:
+        formats.append("lzma")
+    for fmt in formats:
+        file_name = os.path.join(directory, "events-" + fmt)
+        start = time()
+        if fmt == "text":
+            queue.printAll(file_name, "benchmark")
+        else:
+            queue.writeAll(file_name, "benchmark", root, fmt)
+        write_time = time() - start
+
+        start = time()
+        if fmt == "text":
+            with open(file_name) as fp:
+                count = sum(1 for line in fp) - 1
+        else:
+            count = len(EventFileReader(file_name).readAll())
+        read_time = time() - start
+        print "%10d %8s %12.3f %12.2f %12.3f" % (count, fmt, write_time,
+                                                 os.path.getsize(file_name)/1048576.0, read_time)
+        os.remove(file_name)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,101 @@
+"""
+Events-per-second benchmark of the event queue, old timestamp-keyed
+OrderedDict against the binary heap in simulator.EventQueue.
+
+Usage: python -m benchmarks.EventQueueBench [max_exponent] [legacy_max_exponent]
+
+Every size 10^4 .. 10^max_exponent is filled with exponential-spaced
+timestamps (like the failure generators produce) and drained again. The old
+queue sorts every key on each pop, so it is only run up to
+10^legacy_max_exponent, and its pops are sampled.
+"""
+import sys
+from collections import OrderedDict
+from random import random, seed
+from math import log
+from time import time
+
+from simulator.EventQueue import EventQueue
+
+
+class _Event(object):
+    __slots__ = ["time"]
+
+    def __init__(self, time):
+        self.time = time
+
+    def getTime(self):
+        return self.time
+
+    def isCancelled(self):
+        return False
+
+
+class LegacyEventQueue(object):
+    """
+    The OrderedDict queue EventQueue used to be, kept for comparison.
+    """
+    def __init__(self):
+        self.events = OrderedDict()
+
+    def addEvent(self, e):
+        if e.getTime() in self.events.keys():
+            self.events.get(e.getTime()).append(e)
+        else:
+            self.events.setdefault(e.getTime(), [e])
+
+    def removeFirst(self):
+        if self.events.keys() == []:
+            return None
+        keys = self.events.keys()
+        keys.sort()
+        first_value = self.events[keys[0]]
+        first_event = first_value.pop(0)
+        if len(first_value) == 0:
+            self.events.pop(keys[0])
+        return first_event
+
+
+def makeEvents(size, mission_time=87600.0):
+    rate = size/mission_time
+    events = []
+    t = 0.0
+    for i in xrange(size):
+        t += -log(1.0 - random())/rate
+        events.append(_Event(t))
+    # generation order is not time order, units are generated one by one.
+    events.sort(key=lambda e: random())
+    return events
+
+
+def measure(queue, events, pop_samples=None):
+    start = time()
+    for e in events:
+        queue.addEvent(e)
+    insert_rate = len(events)/max(time() - start, 1E-9)
+
+    pops = len(events) if pop_samples is None else min(pop_samples, len(events))
+    start = time()
+    for i in xrange(pops):
+        queue.removeFirst()
+    pop_rate = pops/max(time() - start, 1E-9)
+    return insert_rate, pop_rate
+
+
+def main(max_exponent=7, legacy_max_exponent=5):
+    seed(1)
+    print "%10s %12s %14s %14s" % ("size", "queue", "insert ev/s", "pop ev/s")
+    for exponent in xrange(4, max_exponent + 1):
+        size = pow(10, exponent)
+        events = makeEvents(size)
+        if exponent <= legacy_max_exponent:
+            insert_rate, pop_rate = measure(LegacyEventQueue(), events, 1000)
+            print "%10d %12s %14.0f %14.0f" % (size, "ordereddict", insert_rate, pop_rate)
+        insert_rate, pop_rate = measure(EventQueue(), events)
+        print "%10d %12s %14.0f %14.0f" % (size, "heap", insert_rate, pop_rate)
+        del events
+
+
+if __name__ == "__main__":
+    args = [int(item) for item in sys.argv[1:]]
+    main(*args)
@@ -0,0 +1,60 @@
+"""
+Startup event generation, unit by unit (Unit.generateEvents) against the
+whole fleet at once (FleetGenerator).
+
+Usage: python -m benchmarks.FleetGenerationBench [conf_path] [racks machines disks]
+
+The layout of conf_path (simddc.conf by default) is built with rack_count,
+machines_per_rack and disks_per_machine set to racks, machines and disks
+(50 x 200 x 20 by default). Its whole mission (total_time) of events is
+generated into an array event queue, which is then frozen by its first
+removeFirst(). Both are timed, with the events generated per second.
+"""
+import sys
+from random import seed
+from time import time
+
+from numpy import random
+
+from simulator.Configuration import Configuration
+from simulator.EventQueue import ArrayEventQueue
+from simulator.XMLParser import XMLParser
+from simulator.unit.FleetGenerator import FleetGenerator
+from benchmarks.CalendarQueueBench import DEFAULT_CONF
+
+
+def measure(root, total_time, fleet):
+    seed(1)
+    random.seed(1)
+    queue = ArrayEventQueue()
+    start = time()
+    if fleet:
+        FleetGenerator(root).generateEvents(queue, 0, total_time)
+    else:
+        root.generateEvents(queue, 0, total_time, True)
+    generation_time = time() - start
+    start = time()
+    queue.removeFirst()
+    freeze_time = time() - start
+    return queue.size() + 1, generation_time, freeze_time
+
+
+def main(conf_path=DEFAULT_CONF, layout=(50, 200, 20)):
+    conf = Configuration(conf_path)
+    conf.rack_count, conf.machines_per_rack, conf.disks_per_machine = layout
+    print "%20s %10s %10s %14s %10s %12s" % ("layout", "engine", "events", "generation s",
+                                             "freeze s", "events/s")
+    for fleet in (False, True):
+        root = XMLParser(conf).readFile()[0]
+        events, generation_time, freeze_time = measure(root, conf.total_time, fleet)
+        print "%20s %10s %10d %14.2f %10.2f %12.0f" % (
+            "x".join(str(item) for item in layout), "fleet" if fleet else "unit", events,
+            generation_time, freeze_time, events/max(generation_time + freeze_time, 1E-9))
+        del root
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1], [int(item) for item in sys.argv[2:5]] or (50, 200, 20))
+    else:
+        main()
@@ -0,0 +1,63 @@
+"""
+Temporary failure and recovery of whole racks in the event handler.
+
+Usage: python -m benchmarks.RackFailureBench [conf_path] [scale ...]
+
+The layout of conf_path (simddc.conf by default) is built with rack_count
+multiplied by every scale (1 and 10 by default) and its slices placed. Every
+rack then fails temporarily and comes back, one after the other, through
+EventHandler.handleFailure and handleRecovery. Times are per rack, each
+covers all chunks on all machines of the rack.
+"""
+import sys
+from random import seed
+from time import time
+
+from simulator.Configuration import Configuration
+from simulator.Event import Event
+from simulator.XMLParser import XMLParser
+from simulator.dataDistribute.SSSDistribute import SSSDistribute
+from simulator.eventHandler.EventHandler import EventHandler
+from benchmarks.CalendarQueueBench import DEFAULT_CONF
+
+
+def measure(conf_path, scale):
+    seed(1)
+    conf = Configuration(conf_path)
+    conf.rack_count *= scale
+    distributer = SSSDistribute(XMLParser(conf))
+    distributer.start()
+    handler = EventHandler(distributer)
+    racks = distributer.getAllRacks()
+
+    chunks = 0
+    failure_time = 0.0
+    recovery_time = 0.0
+    for i, rack in enumerate(racks):
+        disks = []
+        distributer.getAllDisksInRack(rack, disks)
+        chunks += len(distributer.disksChunks(disks)[0])
+        t = 10.0*(i + 1)
+        start = time()
+        handler.handleFailure(rack, t, Event(Event.EventType.Failure, t, rack, 1), None)
+        failure_time += time() - start
+        start = time()
+        handler.handleRecovery(rack, t + 1, Event(Event.EventType.Recovered, t + 1, rack, 1), None)
+        recovery_time += time() - start
+    return len(racks), handler.total_slices, chunks, failure_time, recovery_time
+
+
+def main(conf_path=DEFAULT_CONF, scales=(1, 10)):
+    print "%8s %12s %14s %14s %14s" % ("racks", "slices", "chunks/rack", "failure ms", "recovery ms")
+    for scale in scales:
+        racks, slices, chunks, failure_time, recovery_time = measure(conf_path, scale)
+        print "%8d %12d %14.0f %14.3f %14.3f" % (racks, slices, float(chunks)/racks,
+                                                 failure_time*1000/racks,
+                                                 recovery_time*1000/racks)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1], [int(item) for item in sys.argv[2:]] or (1, 10))
+    else:
+        main()
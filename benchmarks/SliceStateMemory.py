@@ -0,0 +1,49 @@
+"""
+Memory of EventHandler.status: the old list of per-slice lists against the
+int8 matrix with a lost flag per slice.
+
+Usage: python -m benchmarks.SliceStateMemory [conf_path] [PB ...]
+
+total_slices comes from the conf (simddc.conf by default) with
+total_active_storage set to every PB (1, 10 and 50 by default). The old
+layout is built for up to sample_slices slices and its measured bytes per
+slice scaled up, a 50 PB list of lists does not fit on most machines.
+"""
+import sys
+from numpy import ones, zeros, int8
+
+from simulator.Configuration import Configuration
+from benchmarks.CalendarQueueBench import DEFAULT_CONF
+
+
+def listBytes(total_slices, n, sample_slices=100000):
+    rows = min(total_slices, sample_slices)
+    status = [[1 for i in xrange(n)] for j in xrange(rows)]
+    # small ints are shared, only the lists count
+    size = sys.getsizeof(status) + sum(sys.getsizeof(row) for row in status)
+    return size*float(total_slices)/rows
+
+
+def arrayBytes(total_slices, n):
+    status = ones((total_slices, n), dtype=int8)
+    lost = zeros(total_slices, dtype=bool)
+    return status.nbytes + lost.nbytes
+
+
+def main(conf_path=DEFAULT_CONF, storages=(1, 10, 50)):
+    conf = Configuration(conf_path)
+    n = conf.drs_handler.n
+    print "%6s %12s %14s %14s %8s" % ("PB", "slices", "lists MB", "int8 MB", "ratio")
+    for storage in storages:
+        total_slices = int(conf.total_slices*float(storage)/conf.total_active_storage)
+        before = listBytes(total_slices, n)
+        after = arrayBytes(total_slices, n)
+        print "%6s %12d %14.1f %14.1f %8.1f" % (storage, total_slices, before/1048576.0,
+                                                after/1048576.0, before/after)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1], [float(item) for item in sys.argv[2:]] or (1, 10, 50))
+    else:
+        main()
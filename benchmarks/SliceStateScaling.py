@@ -0,0 +1,80 @@
+"""
+Peak RSS of the EventHandler slice state, dense against sparse, from 1 PB to
+100 PB.
+
+Usage: python -m benchmarks.SliceStateScaling [conf_path] [PB ...]
+
+total_slices comes from the conf (simddc.conf by default) with
+total_active_storage set to every PB (1, 10 and 100 by default). Every
+point runs in a new interpreter, which builds the slice state of
+SliceState.sliceState and degrades degraded_fraction of the slices, one
+chunk unavailable and one lost each, as the handler does when units fail.
+The peak RSS of the interpreter over its RSS before the state was built is
+reported, with the time of the failures and of reading the counters back.
+"""
+import sys
+import subprocess
+
+from simulator.Configuration import Configuration
+from benchmarks.CalendarQueueBench import DEFAULT_CONF
+
+# one point in a new interpreter, prints its peak RSS (MB) and seconds
+POINT = """
+import resource
+from time import time
+from numpy import random, unique, subtract, int64
+from simulator.SliceState import sliceState
+
+def rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024.0
+
+random.seed(1)
+total_slices, n, sparse, fraction = %d, %d, %r, %r
+slices = unique(random.randint(0, total_slices, int(total_slices*fraction))).astype(int64)
+indexes = random.randint(0, n - 1, len(slices)).astype(int64)
+before = rss()
+start = time()
+status, lost, avail_counts, durable_counts = sliceState(total_slices, n, sparse)
+for begin in xrange(0, len(slices), 100000):
+    part = slice(begin, begin + 100000)
+    status[slices[part], indexes[part]] = 0
+    status[slices[part], indexes[part] + 1] = -1
+    # the dense counters follow the chunks, the sparse ones are worked out
+    if not sparse:
+        subtract.at(avail_counts, slices[part], 2)
+        subtract.at(durable_counts, slices[part], 1)
+failures = time() - start
+start = time()
+avails = avail_counts[slices]
+durables = durable_counts[slices]
+counts = time() - start
+assert (avails == n - 2).all() and (durables == n - 1).all()
+print rss() - before, failures, counts
+"""
+
+
+def measure(total_slices, n, sparse, fraction):
+    output = subprocess.check_output(
+        [sys.executable, "-c", POINT % (total_slices, n, sparse, fraction)])
+    return [float(item) for item in output.split()]
+
+
+def main(conf_path=DEFAULT_CONF, storages=(1, 10, 100), degraded_fraction=0.001):
+    conf = Configuration(conf_path)
+    n = conf.drs_handler.n
+    print "%6s %12s %10s %12s %12s %12s" % ("PB", "slices", "state", "peak MB",
+                                            "failure s", "counters s")
+    for storage in storages:
+        total_slices = int(conf.total_slices*float(storage)/conf.total_active_storage)
+        for sparse in (False, True):
+            peak, failures, counts = measure(total_slices, n, sparse, degraded_fraction)
+            print "%6s %12d %10s %12.1f %12.3f %12.3f" % (storage, total_slices,
+                                                          "sparse" if sparse else "dense",
+                                                          peak, failures, counts)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1], [float(item) for item in sys.argv[2:]] or (1, 10, 100))
+    else:
+        main()
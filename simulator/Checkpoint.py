@@ -0,0 +1,207 @@
+import os
+import cPickle
+from random import getstate, setstate
+from numpy import array, load, savez, frombuffer, zeros, uint8, int8, int64, float64, isnan, nan
+from numpy.random import get_state, set_state
+
+from simulator.Event import Event
+from simulator.EventFile import unitTable
+from simulator.unit.Unit import Unit
+from simulator.unit.Machine import Machine
+from simulator.unit.SliceSet import SliceSet
+
+# per unit attributes changed while events are handled
+GENERATOR_ATTRIBUTES = ["failure_generator", "recovery_generator", "recovery_generator2",
+                        "latent_error_generator", "scrub_generator"]
+LIST_ATTRIBUTES = ["failure_intervals", "slices_hit_by_LSE", "cancel_times"]
+# EventHandler attributes that are configuration, not simulation state
+HANDLER_EXCLUDED = ["distributer", "conf", "drs_handler", "slice_locations",
+                    "contention_model", "handlers", "trace", "status", "lost",
+                    "avail_counts", "durable_counts", "degraded_slices"]
+
+
+def iterationState():
+    """
+    Random and id counter state at the start of an iteration. Restored
+    before the setup of a resumed iteration, it rebuilds the same system tree,
+    slice placement and generated events.
+    """
+    return {"random": getstate(), "numpy_random": get_state(),
+            "unit_count": Unit.unit_count, "machine_count": Machine.id_counter,
+            "event_count": Event.id_counter}
+
+
+def restoreIterationState(state):
+    setstate(state["random"])
+    set_state(state["numpy_random"])
+    Unit.unit_count = state["unit_count"]
+    Machine.id_counter = state["machine_count"]
+    Event.id_counter = state["event_count"]
+
+
+class Checkpoint(object):
+    """
+    State of an iteration between two events. Numbers go to numpy arrays
+    (queued events, unit counters, slice status, rack occupation), the rest
+    (iteration info, random state, handler counters and lists, unit interval
+    lists and generator states) is one pickled blob. The system tree itself is
+    not saved, a resumed iteration rebuilds it from its iteration state and
+    then restore() overwrites what events changed.
+    Lazily generated queues hold python generators and can not be saved.
+    """
+
+    def __init__(self, file_name):
+        arrays = load(file_name)
+        self.arrays = dict((key, arrays[key]) for key in arrays.files)
+        arrays.close()
+        self.state = cPickle.loads(self.arrays.pop("state").tobytes())
+        self.info = self.state["info"]
+
+    @staticmethod
+    def write(file_name, info, start_state, root, handler, queue):
+        units = unitTable(root)
+        unit_index = {}
+        for i, unit in enumerate(units):
+            unit_index[unit.getID()] = i
+        state = {"info": info, "start_state": start_state, "now_state": iterationState()}
+        arrays = {}
+
+        # queue, slice sets of eager recovery are not in the tree
+        events = [e for e in queue.convertToArray() if not e.isCancelled()]
+        slice_sets = []
+        event_units = []
+        attributes = []
+        for i, e in enumerate(events):
+            if e.getType() == Event.EventType.Generate:
+                raise Exception("lazy generation can not be checkpointed!")
+            if e.unit.getID() in unit_index:
+                event_units.append(unit_index[e.unit.getID()])
+            else:
+                if not isinstance(e.unit, SliceSet):
+                    raise Exception("unit is not in the system tree: " + e.unit.toString())
+                unit_index[e.unit.getID()] = -len(slice_sets) - 1
+                slice_sets.append((e.unit.name, e.unit.slices, e.unit.getID(),
+                                   e.unit.generation, e.unit.getOriginalFailureTime(),
+                                   e.unit.getLastFailureTime(), e.unit.getLastBandwidthNeed()))
+                event_units.append(unit_index[e.unit.getID()])
+            if e.attributes is not None:
+                attributes.append((i, e.attributes))
+        arrays["event_time"] = array([e.time for e in events], dtype=float64)
+        arrays["event_next_recovery_time"] = array([e.next_recovery_time for e in events],
+                                                   dtype=float64)
+        arrays["event_unit"] = array(event_units, dtype=int64)
+        arrays["event_type"] = array([e.type for e in events], dtype=int8)
+        arrays["event_info"] = array([e.info for e in events], dtype=int64)
+        arrays["event_ignore"] = array([e.ignore for e in events], dtype=bool)
+        arrays["event_generation"] = array([e.generation for e in events], dtype=int64)
+        arrays["event_id"] = array([e.event_id or 0 for e in events], dtype=int64)
+        state["slice_sets"] = slice_sets
+        state["event_attributes"] = attributes
+
+        # units
+        arrays["unit_generation"] = array([u.generation for u in units], dtype=int64)
+        arrays["unit_last_failure_time"] = array([u.last_failure_time for u in units],
+                                                 dtype=float64)
+        arrays["unit_last_bandwidth_need"] = array([u.last_bandwidth_need for u in units],
+                                                   dtype=float64)
+        arrays["unit_last_recovery_time"] = array([getattr(u, "last_recovery_time", nan)
+                                                   for u in units], dtype=float64)
+        unit_lists = []
+        unit_generators = []
+        for u in units:
+            unit_lists.append([getattr(u, name, None) for name in LIST_ATTRIBUTES])
+            generators = {}
+            for name in GENERATOR_ATTRIBUTES:
+                generator = getattr(u, name, None)
+                if generator is not None:
+                    generators[name] = (generator.__class__, generator.getState())
+            unit_generators.append(generators)
+        state["unit_lists"] = unit_lists
+        state["unit_generators"] = unit_generators
+
+        # handler
+        if handler.sparse_state:
+            arrays["status_slices"], arrays["status_words"] = handler.status.getState()
+            arrays["status_lost"] = handler.lost.bits
+        else:
+            arrays["status"] = handler.status
+            arrays["status_lost"] = handler.lost
+        state["handler"] = dict((key, value) for key, value in handler.__dict__.iteritems()
+                                if key not in HANDLER_EXCLUDED)
+        if not handler.queue_disable:
+            fifo = handler.contention_model
+            occupation = zeros(len(units), dtype=float64)
+            for rack, point in fifo.getAll().iteritems():
+                occupation[unit_index[rack.getID()]] = point
+            arrays["occupation_points"] = occupation
+            state["queue_records"] = fifo.queue_records
+
+        arrays["state"] = frombuffer(cPickle.dumps(state, 2), dtype=uint8)
+        # never leave a half written checkpoint behind
+        tmp_name = file_name + ".tmp.npz"
+        savez(tmp_name, **arrays)
+        os.rename(tmp_name, file_name)
+
+    def restore(self, root, handler, queue):
+        arrays = self.arrays
+        units = unitTable(root)
+
+        for i, u in enumerate(units):
+            u.generation = int(arrays["unit_generation"][i])
+            u.last_failure_time = float(arrays["unit_last_failure_time"][i])
+            u.last_bandwidth_need = float(arrays["unit_last_bandwidth_need"][i])
+            if not isnan(arrays["unit_last_recovery_time"][i]):
+                u.last_recovery_time = float(arrays["unit_last_recovery_time"][i])
+            for name, value in zip(LIST_ATTRIBUTES, self.state["unit_lists"][i]):
+                if value is not None:
+                    setattr(u, name, value)
+            for name, (cls, generator_state) in self.state["unit_generators"][i].iteritems():
+                generator = getattr(u, name, None)
+                if generator is None or generator.__class__ is not cls:
+                    generator = cls.__new__(cls)
+                    setattr(u, name, generator)
+                generator.setState(generator_state)
+
+        if handler.sparse_state:
+            handler.status.setState(arrays["status_slices"], arrays["status_words"])
+            handler.lost.bits = arrays["status_lost"].copy()
+        else:
+            handler.status = arrays["status"]
+            handler.lost = arrays["status_lost"]
+        handler.recountAll()
+        handler.__dict__.update(self.state["handler"])
+        if not handler.queue_disable:
+            fifo = handler.contention_model
+            for rack in fifo.getAll().keys():
+                fifo.occupation_points[rack] = float(arrays["occupation_points"][units.index(rack)])
+            fifo.queue_records = self.state["queue_records"]
+
+        slice_sets = []
+        for name, slices, unit_id, generation, original_failure_time, last_failure_time, \
+                last_bandwidth_need in self.state["slice_sets"]:
+            slice_set = SliceSet(name, slices)
+            slice_set.id = unit_id
+            slice_set.generation = generation
+            slice_set.setOriginalFailureTime(original_failure_time)
+            slice_set.setLastFailureTime(last_failure_time)
+            slice_set.setLastBandwidthNeed(last_bandwidth_need)
+            slice_sets.append(slice_set)
+
+        queue.clear()
+        attributes = dict(self.state["event_attributes"])
+        for i in xrange(len(arrays["event_time"])):
+            index = int(arrays["event_unit"][i])
+            unit = units[index] if index >= 0 else slice_sets[-index - 1]
+            e = Event.__new__(Event)
+            e.type = int(arrays["event_type"][i])
+            e.time = float(arrays["event_time"][i])
+            e.unit = unit
+            e.info = int(arrays["event_info"][i])
+            e.ignore = bool(arrays["event_ignore"][i])
+            e.next_recovery_time = float(arrays["event_next_recovery_time"][i])
+            e.attributes = attributes.get(i)
+            e.generation = int(arrays["event_generation"][i])
+            e.event_id = int(arrays["event_id"][i]) or None
+            queue.addEvent(e)
+
+        restoreIterationState(self.state["now_state"])
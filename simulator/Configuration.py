@@ -49,6 +49,57 @@ class Configuration(object):
 
         self.xml_file_path = d.pop("xml_file_path")
         self.event_file = d.pop("event_file", None)
+        # "text" or "binary", binary event files can be compressed with "zlib"
+        # or "lzma" and are read back with EventFile.EventFileReader.
+        self.event_file_format = d.pop("event_file_format", "text")
+        if self.event_file_format.lower() not in ["text", "binary"]:
+            raise Exception("event_file_format must be 'text' or 'binary'!")
+        self.event_file_compression = d.pop("event_file_compression", "none")
+        if self.event_file_compression.lower() not in ["none", "zlib", "lzma"]:
+            raise Exception("event_file_compression must be 'none', 'zlib' or 'lzma'!")
+
+        # event queue engine, "heap", "calendar" or "array", the calendar bucket
+        # width is in hours.
+        self.event_queue = d.pop("event_queue", "heap")
+        if self.event_queue.lower() not in ["heap", "calendar", "array"]:
+            raise Exception("event_queue must be 'heap', 'calendar' or 'array'!")
+        self.event_queue_bucket_width = float(d.pop("event_queue_bucket_width", "1.0"))
+        # generate events one failure/recovery cycle per unit at a time while
+        # simulating, instead of the whole mission before it.
+        self.lazy_generation = self._bool(d.pop("lazy_generation", "false"))
+        # tracing of handled events: "off", "summary" or "event", see EventTrace.
+        self.event_trace = d.pop("event_trace", "off")
+        if self.event_trace.lower() not in ["off", "summary", "event"]:
+            raise Exception("event_trace must be 'off', 'summary' or 'event'!")
+        self.trace_file = d.pop("trace_file", None)
+        # write a checkpoint every checkpoint_interval simulated hours, 0 means
+        # never, resume with "python Simulation.py --resume checkpoint_file".
+        self.checkpoint_interval = float(d.pop("checkpoint_interval", "0"))
+        self.checkpoint_file = d.pop("checkpoint_file", None)
+        if self.checkpoint_interval > 0 and self.lazy_generation:
+            raise Exception("checkpoints need lazy_generation to be false!")
+        # generate the mission of all units of a tree level at once with numpy
+        # (see FleetGenerator), same distributions, other random draws.
+        self.fleet_generation = self._bool(d.pop("fleet_generation", "false"))
+        if self.fleet_generation and self.lazy_generation:
+            raise Exception("fleet_generation needs lazy_generation to be false!")
+        # queue no LSE events, sample them only for degraded slices (see
+        # LazyLatentErrors), the LSE counters are their expected values.
+        self.lazy_latent_errors = self._bool(d.pop("lazy_latent_errors", "false"))
+        if self.lazy_latent_errors and self.checkpoint_interval > 0:
+            raise Exception("checkpoints need lazy_latent_errors to be false!")
+        # debugging, recount the per slice chunk counters after every event.
+        self.check_slice_counters = self._bool(d.pop("check_slice_counters", "false"))
+        # false keeps only the running statistics of unavailability intervals
+        # and data losses, not every one of them (Result.unavailable_slice_durations
+        # is then empty, MTTR, MTBF and PUA may differ a little from the ones
+        # the records give).
+        self.keep_interval_records = self._bool(d.pop("keep_interval_records", "true"))
+        # chunk states of slices, "dense" keeps an int8 row per slice, "sparse"
+        # only the slices with a chunk not normal (see SliceState).
+        self.slice_state = d.pop("slice_state", "dense")
+        if self.slice_state.lower() not in ["dense", "sparse"]:
+            raise Exception("slice_state must be 'dense' or 'sparse'!")
 
         # If n <= 15 in each stripe, no two chunks are on the same rack.
         self.num_chunks_diff_racks = 15
@@ -77,7 +128,9 @@ class Configuration(object):
 
         self.outputs = splitMethod(d["outputs"])
 
-        self.drs_handler = getDRSHandler(data_redundancy[0], data_redundancy[1:])
+        # generator matrix file of "MATRIX" codes
+        self.code_file = d.pop("code_file", None)
+        self.drs_handler = getDRSHandler(data_redundancy[0], data_redundancy[1:], self.code_file)
         if not self.lazy_recovery:
             self.recovery_threshold = self.drs_handler.n - 1
         else:
@@ -130,6 +183,10 @@ class Configuration(object):
             self.correlated_failures_infos = []
             for section in sections:
                 self.correlated_failures_infos.append(self.parserCorrelatedSetting(section))
+        if self.lazy_latent_errors and (self.system_scaling or self.system_upgrade or
+                                        self.correlated_failures):
+            raise Exception("lazy_latent_errors needs system_scaling, system_upgrade and "
+                            "correlated_failures to be false!")
 
         self.disk_repair_time, self.node_repair_time = self.comRepairTime()
 
@@ -328,9 +385,20 @@ class Configuration(object):
              "machines_per_rack": self.machines_per_rack,
              "xml_file_path": self.xml_file_path,
              "event_file": self.event_file,
+             "event_file_format": self.event_file_format,
+             "event_queue": self.event_queue,
+             "lazy_generation": self.lazy_generation,
+             "fleet_generation": self.fleet_generation,
+             "lazy_latent_errors": self.lazy_latent_errors,
+             "event_trace": self.event_trace,
+             "checkpoint_interval": self.checkpoint_interval,
+             "check_slice_counters": self.check_slice_counters,
+             "keep_interval_records": self.keep_interval_records,
+             "slice_state": self.slice_state,
              "recovery_threshold": self.recovery_threshold,
              "lazy_only_available": self.lazy_only_available,
              "data_redundancy": self.data_redundancy,
+             "code_file": self.code_file,
              "hierarchical": self.hier,
              "outputs": self.outputs,
              "recovery_bandwidth_cross_rack": self.recovery_bandwidth_cross_rack,
@@ -371,7 +439,7 @@ class Configuration(object):
                         ", hierarchical:" + str(self.hier) + \
                         ", recovery bandwidth cross rack: " + str(self.recovery_bandwidth_cross_rack) + \
                         ", xml file path: " + self.xml_file_path + \
-                        ", event file path: " + self.event_file + \
+                        ", event file path: " + str(self.event_file) + \
                         ", outputs: " + str(self.outputs) + \
                         ", parallel repair: " + str(self.parallel_repair) + \
                         ", system Scaling flag: " + str(self.system_scaling) + \
@@ -1,10 +1,12 @@
-from enum import Enum
-
-
 class Event(object):
-    event_id = 0
+    id_counter = 0
+    # If True every event gets an id, see Simulation and EventQueue.printAll.
+    tracing = False
+
+    __slots__ = ["type", "time", "unit", "info", "ignore", "next_recovery_time",
+                 "attributes", "generation", "event_id", "cycles"]
 
-    class EventType(Enum):
+    class EventType(object):
         Start = 0
         Failure = 1
         Recovered = 2
@@ -17,6 +19,16 @@ class Event(object):
         # ScrubStart = 6
         # ScrubComplete = 7
         End = 9
+        # internal, asks the unit to generate its next cycle of events.
+        Generate = 10
+
+        names = ["Start", "Failure", "Recovered", "EagerRecoveryStart",
+                 "EagerRecoveryInstallment", "LatentDefect", "LatentRecovered",
+                 "RAFIRecovered", "UpgradeCheck", "End", "Generate"]
+
+        @staticmethod
+        def toString(e_type):
+            return "EventType." + Event.EventType.names[e_type]
 
     def __init__(self, e_type, time, unit, info=-100, ignore=False,
                  next_recovery_time=0):
@@ -26,9 +38,15 @@ class Event(object):
         self.info = info
         self.ignore = ignore
         self.next_recovery_time = next_recovery_time
-        self.attributes = {}
-        Event.event_id += 1
-        self.event_id = Event.event_id
+        # created by the first setAttributes()
+        self.attributes = None
+        # events of an older generation than their unit's were cancelled.
+        self.generation = unit.generation
+        if Event.tracing:
+            Event.id_counter += 1
+            self.event_id = Event.id_counter
+        else:
+            self.event_id = None
 
     def getType(self):
         return self.type
@@ -39,19 +57,29 @@ class Event(object):
     def getUnit(self):
         return self.unit
 
+    def isCancelled(self):
+        if self.generation == self.unit.generation:
+            return False
+        cancel_times = self.unit.cancel_times
+        if cancel_times is None or self.generation not in cancel_times:
+            return True
+        return self.time > cancel_times[self.generation]
+
     def getAttributes(self, key):
-        if self.attributes == {}:
+        if self.attributes is None:
             return None
         return self.attributes[key]
 
     def setAttributes(self, key, value):
+        if self.attributes is None:
+            self.attributes = {}
         self.attributes[key] = value
 
     # time + " " + next_recovery + " " + unit + " " + type + " " + info + " "
     # + ignore
     def toString(self):
         format_string = str(self.time) + "  " + str(self.next_recovery_time) \
-            + "  " + self.unit.toString() + "  " + str(self.type) + "  " \
+            + "  " + self.unit.toString() + "  " + Event.EventType.toString(self.type) + "  " \
             + str(self.info) + "  " + str(self.ignore) + "  " \
             + str(self.event_id) + "\n"
         return format_string
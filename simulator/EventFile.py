@@ -0,0 +1,168 @@
+import zlib
+from struct import pack, unpack, calcsize
+from numpy import array, dtype, frombuffer, concatenate
+
+from simulator.Event import Event
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+MAGIC = "SIMDDCEV"
+VERSION = 1
+COMPRESSIONS = ["none", "zlib", "lzma"]
+
+# one fixed-width record per event
+RECORD = dtype([("time", "<f8"), ("next_recovery_time", "<f8"), ("unit", "<i4"),
+                ("info", "<i2"), ("type", "i1"), ("ignore", "?")])
+
+
+def _compressor(compression):
+    if compression == "zlib":
+        return zlib.compressobj(6)
+    elif compression == "lzma":
+        if lzma is None:
+            raise Exception("lzma compression needs the lzma module!")
+        return lzma.LZMACompressor()
+    return None
+
+
+def _decompressor(compression):
+    if compression == "zlib":
+        return zlib.decompressobj()
+    elif compression == "lzma":
+        if lzma is None:
+            raise Exception("lzma compression needs the lzma module!")
+        return lzma.LZMADecompressor()
+    return None
+
+
+def unitTable(root):
+    """
+    All units of the system tree in depth-first order, the position of a
+    unit is its index in the event records.
+    """
+    units = []
+    stack = [root]
+    while stack != []:
+        unit = stack.pop()
+        units.append(unit)
+        for child in reversed(unit.getChildren()):
+            # children of disks are slice indexes
+            if isinstance(child, int):
+                break
+            stack.append(child)
+    return units
+
+
+class EventFileWriter(object):
+    """
+    Binary event file: header (magic, version, compression, message, unit
+    table), then the records, compressed as one stream if asked to. Records
+    are packed chunk_events at a time and written through a large buffer.
+    """
+
+    def __init__(self, file_name, units, msg="", compression="none",
+                 chunk_events=65536, buffer_size=1 << 20):
+        if compression not in COMPRESSIONS:
+            raise Exception("Unknown event file compression: " + compression)
+        self.compressor = _compressor(compression)
+        self.chunk_events = chunk_events
+        self.chunk = []
+        self.unit_index = {}
+        for i, unit in enumerate(units):
+            self.unit_index[unit.getID()] = i
+
+        self.out = open(file_name, 'wb', buffer_size)
+        self.out.write(MAGIC + pack("<BB", VERSION, COMPRESSIONS.index(compression)))
+        self.out.write(pack("<I", len(msg)) + msg)
+        self.out.write(pack("<I", len(units)))
+        for unit in units:
+            name = unit.toString()
+            self.out.write(pack("<H", len(name)) + name)
+
+    def write(self, e):
+        if e.unit.getID() not in self.unit_index:
+            raise Exception("unit is not in the unit table: " + e.unit.toString())
+        if e.attributes is not None:
+            raise Exception("event attributes are not in the event file format!")
+        self.chunk.append((e.time, e.next_recovery_time, self.unit_index[e.unit.getID()],
+                           e.info, e.type, e.ignore))
+        if len(self.chunk) == self.chunk_events:
+            self._flush()
+
+    def _flush(self):
+        data = array(self.chunk, dtype=RECORD).tobytes()
+        self.chunk = []
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        self.out.write(data)
+
+    def close(self):
+        if self.chunk != []:
+            self._flush()
+        if self.compressor is not None:
+            self.out.write(self.compressor.flush())
+        self.out.close()
+
+
+class EventFileReader(object):
+    """
+    Reads a binary event file back. message and units (the unit names) come
+    from the header, records() streams the events as numpy arrays of RECORD.
+    """
+
+    def __init__(self, file_name, read_size=1 << 20):
+        self.read_size = read_size
+        self.fp = open(file_name, 'rb')
+        if self.fp.read(len(MAGIC)) != MAGIC:
+            raise Exception("not an event file: " + file_name)
+        version, compression = self._unpack("<BB")
+        if version != VERSION:
+            raise Exception("Unsupported event file version " + str(version))
+        self.compression = COMPRESSIONS[compression]
+        self.message = self.fp.read(self._unpack("<I")[0])
+        self.units = []
+        for i in xrange(self._unpack("<I")[0]):
+            self.units.append(self.fp.read(self._unpack("<H")[0]))
+
+    def _unpack(self, fmt):
+        return unpack(fmt, self.fp.read(calcsize(fmt)))
+
+    def records(self):
+        decompressor = _decompressor(self.compression)
+        rest = ""
+        while True:
+            data = self.fp.read(self.read_size)
+            if data == "":
+                break
+            if decompressor is not None:
+                data = decompressor.decompress(data)
+            data = rest + data
+            whole = len(data) - len(data) % RECORD.itemsize
+            rest = data[whole:]
+            if whole != 0:
+                yield frombuffer(data[:whole], dtype=RECORD)
+        if rest != "":
+            raise Exception("truncated event file")
+        self.fp.close()
+
+    def readAll(self):
+        chunks = list(self.records())
+        if chunks == []:
+            return array([], dtype=RECORD)
+        return concatenate(chunks)
+
+
+if __name__ == "__main__":
+    import sys
+    reader = EventFileReader(sys.argv[1])
+    print reader.message
+    for records in reader.records():
+        for record in records:
+            print record["time"], record["next_recovery_time"], reader.units[record["unit"]], \
+                Event.EventType.toString(int(record["type"])), record["info"], record["ignore"]
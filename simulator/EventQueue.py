@@ -1,23 +1,48 @@
-from collections import OrderedDict
+from array import array as growable
+from bisect import insort
+from heapq import heappush, heappop, heapify
+from itertools import count
+from numpy import arange, zeros, lexsort, fromiter, frombuffer, concatenate, float64, \
+    int8, int16, int32, int64
+
 from simulator.Event import Event
+from simulator.EventFile import EventFileWriter, unitTable
 from simulator.unit.SliceSet import SliceSet
 
 
 class EventQueue(object):
-    events = OrderedDict()
+    """
+    Binary heap of (time, sequence, event) entries. The sequence number keeps
+    events with the same timestamp in insertion order, so events pop out in
+    exactly the order the old timestamp-keyed dict gave them.
+    size() counts cancelled events until they are popped.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.sequence = count()
+
+    # Drop every queued event, the old heap is left to the garbage collector.
+    def clear(self):
+        self.events = []
+        self.sequence = count()
 
     def addEvent(self, e):
-        if e.getTime() in EventQueue.events.keys():
-            EventQueue.events.get(e.getTime()).append(e)
-        else:
-            event_list = []
-            event_list.append(e)
-            EventQueue.events.setdefault(e.getTime(), event_list)
+        heappush(self.events, (e.getTime(), next(self.sequence), e))
+
+    # Events given as columns, unit_indexes index units. They are queued in
+    # column order, as by addEvent one after the other.
+    def addEvents(self, units, unit_indexes, types, times, infos, ignores,
+                  next_recovery_times):
+        for unit_index, e_type, time, info, ignore, next_recovery_time in zip(
+                unit_indexes.tolist(), types.tolist(), times.tolist(), infos.tolist(),
+                ignores.tolist(), next_recovery_times.tolist()):
+            self.addEvent(Event(e_type, time, units[unit_index], info, ignore,
+                                next_recovery_time))
 
     def updateEvent(self, ts, e, slice_index):
         if isinstance(e.getUnit(), SliceSet):
-            index = EventQueue.events.get(ts).index(e)
-            EventQueue.event.get(ts)[index].getUnit().remove(slice_index)
+            e.getUnit().removeSlice(slice_index)
         else:
             raise Exception("lost unit is not SliceSet.")
 
@@ -27,88 +52,359 @@ class EventQueue(object):
             self.addEvent(e)
 
     def remove(self, e):
-        ts = e.getTime()
-        events = EventQueue.events.get(ts)
-        events.remove(e)
-        if len(events) == 0:
-            EventQueue.events.pop(ts)
+        for i, item in enumerate(self.events):
+            if item[2] is e:
+                last = self.events.pop()
+                if i < len(self.events):
+                    self.events[i] = last
+                    heapify(self.events)
+                return
+        raise Exception("event is not in the queue")
 
+    # Events cancelled through Unit.cancelEvents() stay in the heap as
+    # tombstones and are dropped here.
     def removeFirst(self):
-        if EventQueue.events.keys() == []:
-            return None
-
-        # pop and deal with event based on the timestamp, so we need to
-        # sort at first.
-        keys = EventQueue.events.keys()
-        keys.sort()
-        first_key = keys[0]
+        while self.events != []:
+            e = heappop(self.events)[2]
+            if not e.isCancelled():
+                return e
 
-        first_value = EventQueue.events[first_key]
-        first_event = first_value.pop(0)
-        if len(first_value) == 0:
-            EventQueue.events.pop(first_key)
+        return None
 
-        return first_event
+    # all queued (time, sequence, event) entries, in no particular order.
+    def _entries(self):
+        return self.events
 
     def getAllEvents(self):
-        res = []
-        for e in EventQueue.events.values():
-            res.append(e)
-        return res
+        return [item[2] for item in self._entries()]
 
     def convertToArray(self):
-        event_list = []
-        # check if we can operate OrderedDict like this?
-        # Yes, we can. This is normal operation for Dict.
-        iterator = EventQueue.events.itervalues()
-        for l in iterator:
-            for e in l:
-                event_list.append(e)
-
-        return event_list
+        return [item[2] for item in sorted(self._entries())]
 
-    # override?
     def clone(self):
         ret = EventQueue()
-        keys = EventQueue.events.keys()
-        keys.sort()
-        # this place will be self.events or EventQueue.events?
-        for ts in keys:
-            list1 = EventQueue.events.get(ts)
-            list2 = []
-            for e in list1:
-                list2.append(e)
-            ret.events.setdefault(ts, list2)
+        ret.events = list(self.events)
+        ret.sequence = count(next(self.sequence))
 
         return ret
 
     def size(self):
-        size = 0
-        for item in EventQueue.events.values():
-            size += len(item)
-        return size
+        return len(self.events)
 
     def printAll(self, file_name, msg):
         with open(file_name, 'w+') as out:
             out.write(msg + "\n")
-            keys = EventQueue.events.keys()
-            keys.sort()
-            for t in keys:
-                res = EventQueue.events[t]
-                for e in res:
-                    if e.ignore is False:
-                        out.write(e.toString())
+            for e in self.convertToArray():
+                if e.ignore is False and not e.isCancelled():
+                    out.write(e.toString())
+
+    # Binary version of printAll, see EventFile.
+    def writeAll(self, file_name, msg, root, compression="none"):
+        writer = EventFileWriter(file_name, unitTable(root), msg, compression)
+        for e in self.convertToArray():
+            if e.ignore is False and not e.isCancelled():
+                writer.write(e)
+        writer.close()
 
     def printEvents(self, file_name, msg, event_type=Event.EventType.Failure, sort = True):
         with open(file_name, 'w') as fp:
             fp.write(msg + "\n")
-            keys = EventQueue.events.keys()
             if sort:
-                keys.sort()
-            for t in keys:
-                res = EventQueue.events[t]
-                for e in res:
-                    if (e.ignore is False) and \
-                            e.getType() == event_type:
-                        fp.write(e.toString())
+                events = self.convertToArray()
+            else:
+                events = self.getAllEvents()
+            for e in events:
+                if (e.ignore is False) and not e.isCancelled() and \
+                        e.getType() == event_type:
+                    fp.write(e.toString())
+
+
+class CalendarEventQueue(EventQueue):
+    """
+    Calendar (two-level ladder) queue for very large pre-generated event sets.
+    Events are appended unsorted to the bucket int(time/bucket_width); a
+    bucket is sorted only when simulation time reaches it. Failure, recovery,
+    LSE and scrub timestamps are spread over hours, so with hour-scale
+    buckets an insert is an append and a pop is a list index.
+    """
+
+    def __init__(self, bucket_width=1.0):
+        self.bucket_width = float(bucket_width)
+        self.clear()
+
+    def clear(self):
+        self.buckets = {}
+        # heap of the numbers of non-empty future buckets
+        self.bucket_numbers = []
+        # the opened bucket, sorted, popped from position self.pos
+        self.current = []
+        self.current_number = -1
+        self.pos = 0
+        self.count = 0
+        self.sequence = count()
+
+    def addEvent(self, e):
+        entry = (e.getTime(), next(self.sequence), e)
+        number = int(entry[0]/self.bucket_width)
+        if number <= self.current_number:
+            insort(self.current, entry, self.pos)
+        elif number in self.buckets:
+            self.buckets[number].append(entry)
+        else:
+            self.buckets[number] = [entry]
+            heappush(self.bucket_numbers, number)
+        self.count += 1
+
+    def remove(self, e):
+        for i in xrange(self.pos, len(self.current)):
+            if self.current[i][2] is e:
+                del self.current[i]
+                self.count -= 1
+                return
+        number = int(e.getTime()/self.bucket_width)
+        for i, item in enumerate(self.buckets.get(number, [])):
+            if item[2] is e:
+                del self.buckets[number][i]
+                self.count -= 1
+                # only non-empty buckets are numbered
+                if self.buckets[number] == []:
+                    del self.buckets[number]
+                    self.bucket_numbers.remove(number)
+                    heapify(self.bucket_numbers)
+                return
+        raise Exception("event is not in the queue")
+
+    def removeFirst(self):
+        while True:
+            if self.pos == len(self.current):
+                if self.bucket_numbers == []:
+                    return None
+                self.current_number = heappop(self.bucket_numbers)
+                self.current = self.buckets.pop(self.current_number)
+                self.current.sort()
+                self.pos = 0
+            e = self.current[self.pos][2]
+            self.pos += 1
+            self.count -= 1
+            if not e.isCancelled():
+                return e
+
+    def _entries(self):
+        entries = self.current[self.pos:]
+        for bucket in self.buckets.itervalues():
+            entries += bucket
+        return entries
+
+    def clone(self):
+        ret = CalendarEventQueue(self.bucket_width)
+        for item in sorted(self._entries()):
+            ret.addEvent(item[2])
+
+        return ret
+
+    def size(self):
+        return self.count
+
+
+class ArrayEventQueue(EventQueue):
+    """
+    Struct-of-arrays store for the pre-generate-then-handle flow. Events
+    added before the first removeFirst() go field by field into growable
+    typed columns, no Event objects are kept, so units have to set every
+    field of an event before they add it. The first removeFirst() moves
+    the columns into numpy columns sorted once by (time, sequence).
+    Popped events are rebuilt from the columns. Events added afterwards, and
+    events carrying attributes or a generator, live in a small side heap
+    merged on the fly by (time, sequence), so the order is the heap's.
+    Before the freeze remove() drops a stored event with the same fields,
+    afterwards only side heap events can be remove()d.
+    Columns given to addEvents() before then are kept as blocks of columns
+    and no events are made of them.
+    """
+
+    # typecodes of the staged columns time, sequence, type, unit index,
+    # info, ignore, next recovery time, generation and event id
+    STAGED_TYPES = "dlbihbdil"
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # the staged columns and the blocks of addEvents() until the freeze
+        self.staged = [growable(typecode) for typecode in ArrayEventQueue.STAGED_TYPES]
+        self.blocks = []
+        self.added = 0
+        self.side = []
+        self.sequence = count()
+        self.units = []
+        self.unit_index = {}
+        self.times = self.sequences = None
+        self.pos = self.length = 0
+
+    def _unitIndex(self, unit):
+        index = self.unit_index.get(unit.getID())
+        if index is None:
+            index = self.unit_index[unit.getID()] = len(self.units)
+            self.units.append(unit)
+        return index
+
+    def addEvent(self, e):
+        if self.times is not None:
+            heappush(self.side, (e.getTime(), next(self.sequence), e))
+            return
+        if e.type == Event.EventType.Generate or e.attributes is not None:
+            heappush(self.side, (e.getTime(), self.added, e))
+        else:
+            # 0 for events created while tracing was off
+            for column, value in zip(self.staged, (e.time, self.added, e.type,
+                                                   self._unitIndex(e.unit), e.info, e.ignore,
+                                                   e.next_recovery_time, e.generation,
+                                                   e.event_id or 0)):
+                column.append(value)
+        self.added += 1
+
+    def addEvents(self, units, unit_indexes, types, times, infos, ignores,
+                  next_recovery_times):
+        if self.times is not None:
+            return super(ArrayEventQueue, self).addEvents(
+                units, unit_indexes, types, times, infos, ignores, next_recovery_times)
+        length = len(times)
+        event_ids = zeros(length, dtype=int64)
+        if Event.tracing:
+            event_ids = arange(Event.id_counter + 1, Event.id_counter + length + 1)
+            Event.id_counter += length
+        generations = fromiter((u.generation for u in units), int32, len(units))
+        self.blocks.append((arange(self.added, self.added + length), units,
+                            unit_indexes, types, times, infos, ignores,
+                            next_recovery_times, generations[unit_indexes], event_ids))
+        self.added += length
+
+    # the staged columns as a block of addEvents()
+    def _stagedBlock(self):
+        times, sequences, types, unit_indexes, infos, ignores, next_recovery_times, \
+            generations, event_ids = [frombuffer(column, dtype=column.typecode)
+                                      if len(column) else zeros(0, dtype=column.typecode)
+                                      for column in self.staged]
+        return (sequences, self.units, unit_indexes, types, times, infos, ignores,
+                next_recovery_times, generations, event_ids)
+
+    def _blockEvents(self, block):
+        sequences, units, unit_indexes, types, times, infos, ignores, \
+            next_recovery_times, generations, event_ids = block
+        entries = []
+        for i in xrange(len(times)):
+            e = Event.__new__(Event)
+            e.type = int(types[i])
+            e.time = float(times[i])
+            e.unit = units[unit_indexes[i]]
+            e.info = int(infos[i])
+            e.ignore = bool(ignores[i])
+            e.next_recovery_time = float(next_recovery_times[i])
+            e.attributes = None
+            e.generation = int(generations[i])
+            e.event_id = int(event_ids[i]) or None
+            entries.append((e.time, int(sequences[i]), e))
+        return entries
+
+    def _freeze(self):
+        blocks = [self._stagedBlock()] + self.blocks
+        self.blocks = []
+        self.sequence = count(self.added)
+        dtypes = [float64, int64, int8, int32, int16, bool, float64, int32, int64]
+        columns = [[] for dtype in dtypes]
+        for block_sequences, units, unit_indexes, types, times, infos, ignores, \
+                next_recovery_times, generations, event_ids in blocks:
+            indexes = fromiter((self._unitIndex(u) for u in units), int32, len(units))
+            for column, dtype, values in zip(columns, dtypes,
+                                             [times, block_sequences, types,
+                                              indexes[unit_indexes], infos, ignores,
+                                              next_recovery_times, generations, event_ids]):
+                column.append(values.astype(dtype))
+        columns = [concatenate(column) for column in columns]
+        self.staged = [growable(typecode) for typecode in ArrayEventQueue.STAGED_TYPES]
+
+        # events of the same time keep their insertion order
+        order = lexsort((columns[1], columns[0]))
+        self.times, self.sequences, self.types, self.unit_indexes, self.infos, \
+            self.ignores, self.next_recovery_times, self.generations, \
+            self.event_ids = [column[order] for column in columns]
+        self.pos = 0
+        self.length = len(order)
+
+    def _event(self, i):
+        e = Event.__new__(Event)
+        e.type = int(self.types[i])
+        e.time = float(self.times[i])
+        e.unit = self.units[self.unit_indexes[i]]
+        e.info = int(self.infos[i])
+        e.ignore = bool(self.ignores[i])
+        e.next_recovery_time = float(self.next_recovery_times[i])
+        e.attributes = None
+        e.generation = int(self.generations[i])
+        e.event_id = int(self.event_ids[i]) or None
+        return e
+
+    def remove(self, e):
+        for i, item in enumerate(self.side):
+            if item[2] is e:
+                last = self.side.pop()
+                if i < len(self.side):
+                    self.side[i] = last
+                    heapify(self.side)
+                return
+        if self.times is None and e.unit.getID() in self.unit_index:
+            fields = (e.time, None, e.type, self.unit_index[e.unit.getID()], e.info,
+                      e.ignore, e.next_recovery_time, e.generation, e.event_id or 0)
+            for i in xrange(len(self.staged[0])):
+                if all(value is None or column[i] == value
+                       for column, value in zip(self.staged, fields)):
+                    for column in self.staged:
+                        del column[i]
+                    return
+        raise Exception("event is not in the queue")
+
+    def removeFirst(self):
+        if self.times is None:
+            self._freeze()
+        while True:
+            if self.pos < self.length and (self.side == [] or
+                    (self.times[self.pos], self.sequences[self.pos]) < self.side[0][:2]):
+                e = self._event(self.pos)
+                self.pos += 1
+            elif self.side != []:
+                e = heappop(self.side)[2]
+            else:
+                return None
+            if not e.isCancelled():
+                return e
+
+    def _entries(self):
+        entries = []
+        if self.times is None:
+            for block in [self._stagedBlock()] + self.blocks:
+                entries += self._blockEvents(block)
+        entries += [(self.times[i], self.sequences[i], self._event(i))
+                    for i in xrange(self.pos, self.length)]
+        return entries + self.side
+
+    def clone(self):
+        ret = ArrayEventQueue()
+        for item in sorted(self._entries()):
+            ret.addEvent(item[2])
+
+        return ret
+
+    def size(self):
+        return len(self.staged[0]) + sum(len(block[0]) for block in self.blocks) + \
+            self.length - self.pos + len(self.side)
+
 
+def getEventQueue(engine, bucket_width=1.0):
+    if engine.lower() == "heap":
+        return EventQueue()
+    elif engine.lower() == "calendar":
+        return CalendarEventQueue(bucket_width)
+    elif engine.lower() == "array":
+        return ArrayEventQueue()
+    else:
+        raise Exception("Incorrect event queue engine!")
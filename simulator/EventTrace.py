@@ -0,0 +1,50 @@
+from time import strftime
+
+from simulator.Event import Event
+
+TRACE_PATH = r"/root/SIMDDC/log/"
+
+
+class EventTrace(object):
+    """
+    Tracing of handled events, off by default. "summary" counts the handled
+    events per type and writes the counts when closed, "event" also writes
+    every event and contention delay. Records go through a large write
+    buffer, never to stdout.
+    """
+    OFF = 0
+    SUMMARY = 1
+    EVENT = 2
+
+    levels = {"off": OFF, "summary": SUMMARY, "event": EVENT}
+
+    def __init__(self, level="off", file_name=None, buffer_size=1 << 20):
+        if level.lower() not in EventTrace.levels:
+            raise Exception("Unknown event trace level: " + level)
+        self.level = EventTrace.levels[level.lower()]
+        self.counts = [0]*len(Event.EventType.names)
+        self.out = None
+        if self.level != EventTrace.OFF:
+            if file_name is None:
+                file_name = TRACE_PATH + "trace-" + strftime("%Y%m%d.%H.%M.%S") + ".log"
+            self.out = open(file_name, 'w', buffer_size)
+
+    def event(self, e):
+        self.counts[e.type] += 1
+        if self.level == EventTrace.EVENT:
+            self.out.write(e.toString())
+
+    def contention(self, u, time, recovery_time):
+        if self.level == EventTrace.EVENT:
+            self.out.write("contention  " + u.toString() + "  " + str(time) +
+                           "  " + str(recovery_time) + "\n")
+
+    def close(self):
+        if self.out is None:
+            return
+        self.out.write("handled events: " + str(sum(self.counts)) + "\n")
+        for e_type, count in enumerate(self.counts):
+            if count != 0:
+                self.out.write(Event.EventType.toString(e_type) + "  " + str(count) + "\n")
+        self.out.close()
+        self.out = None
@@ -0,0 +1,230 @@
+from numpy import array, empty, concatenate, argsort, unique, diff, isnan, where, \
+    count_nonzero, int8, int64, float64, nan
+
+
+class _Columns(object):
+    """
+    Growable numpy columns of one record type, doubled when full.
+    """
+
+    def __init__(self, dtypes, capacity=1024):
+        self.size = 0
+        self.columns = [empty(capacity, dtype=dtype) for dtype in dtypes]
+
+    def append(self, *values):
+        if self.size == len(self.columns[0]):
+            self.columns = [concatenate((column, empty(len(column), dtype=column.dtype)))
+                            for column in self.columns]
+        for column, value in zip(self.columns, values):
+            column[self.size] = value
+        self.size += 1
+        return self.size - 1
+
+    def column(self, i):
+        return self.columns[i][:self.size]
+
+    def __len__(self):
+        return self.size
+
+
+class IntervalStore(object):
+    """
+    Unavailability intervals of slices, columns slice, start and end (nan
+    while open), kept when keep_records is True.
+    The statistics EventHandler.end() reports are also accumulated as
+    intervals open and close, from the open intervals only:
+        failure_times: distinct start times, intervals open in time order
+        merged_duration: durations of the first interval opened at every
+            start time, the system view
+        total_duration: durations of all intervals, the slice view
+    With the records kept, statistics() recomputes them as the former
+    processDuration did instead, to the bit. The former system view took the
+    first interval of a start time in the iteration order of its slice dict,
+    which can not be told while streaming, so without the records the merged
+    duration may take another interval of the same start time.
+    open_intervals maps a slice to (row, start, first of its start time) of
+    its newest interval while that one is open. An interval opened again
+    before it closed stays open to the end, in orphans.
+    """
+
+    def __init__(self, keep_records=True):
+        self.keep_records = keep_records
+        self.records = _Columns([int64, float64, float64])
+        self.open_intervals = {}
+        self.orphans = []
+        self.count = 0
+        self.failure_times = 0
+        self.last_failure_time = None
+        self.merged_duration = 0.0
+        self.total_duration = 0.0
+
+    def open(self, slice_index, time):
+        first = time != self.last_failure_time
+        if first:
+            self.failure_times += 1
+            self.last_failure_time = time
+        row = -1
+        if self.keep_records:
+            row = self.records.append(slice_index, time, nan)
+        interval = self.open_intervals.get(slice_index)
+        if interval is not None:
+            self.orphans.append(interval)
+        self.open_intervals[slice_index] = (row, time, first)
+        self.count += 1
+
+    # close the newest interval of the slice, if it is open
+    def close(self, slice_index, time):
+        interval = self.open_intervals.pop(slice_index, None)
+        if interval is None:
+            return
+        row, start, first = interval
+        if row >= 0:
+            self.records.columns[2][row] = time
+        self.total_duration += time - start
+        if first:
+            self.merged_duration += time - start
+
+    def isOpen(self, slice_index):
+        return slice_index in self.open_intervals
+
+    def __len__(self):
+        return self.count
+
+    # (distinct failure times, sum of the TTFs (the last failure time),
+    # merged duration, total duration) with open intervals ending at end_time
+    def statistics(self, end_time):
+        if self.keep_records and len(self) > 0:
+            TTFs, TTRs = self.failureTimes(end_time, True)
+            return len(TTFs), sum(TTFs), sum(TTRs), sum(self.failureTimes(end_time, False)[1])
+        return self.runningStatistics(end_time)
+
+    # statistics() from the running values
+    def runningStatistics(self, end_time):
+        merged_duration = self.merged_duration
+        total_duration = self.total_duration
+        for row, start, first in self.open_intervals.values() + self.orphans:
+            total_duration += end_time - start
+            if first:
+                merged_duration += end_time - start
+        return self.failure_times, self.last_failure_time, merged_duration, total_duration
+
+    def _checkRecords(self):
+        if not self.keep_records:
+            raise Exception("unavailability intervals are not recorded!")
+
+    # (slices, starts, ends) with open intervals ending at end_time
+    def intervals(self, end_time):
+        self._checkRecords()
+        ends = self.records.column(2)
+        return self.records.column(0), self.records.column(1), \
+            where(isnan(ends), end_time, ends)
+
+    # order of the slices in the former dict: slices inserted in the same
+    # sequence iterate in the same order.
+    def _dictOrder(self):
+        firsts = {}
+        for slice_index in self.records.column(0).tolist():
+            if slice_index not in firsts:
+                firsts[slice_index] = None
+        ranks = dict((slice_index, i) for i, slice_index in enumerate(firsts.keys()))
+        return argsort(array([ranks[slice_index] for slice_index in
+                              self.records.column(0).tolist()], dtype=int64), kind="mergesort")
+
+    # (TTFs, TTRs) as in EventHandler.processDuration, intervals walked in
+    # the former dict order. With merge_flag, the intervals starting at one
+    # time count once, with the TTR of the first of them.
+    def failureTimes(self, end_time, merge_flag):
+        if len(self) == 0:
+            return [], []
+        slices, starts, ends = self.intervals(end_time)
+        order = self._dictOrder()
+        starts = starts[order]
+        ends = ends[order]
+        if merge_flag:
+            FTs, first = unique(starts, return_index=True)
+            first.sort()
+            TTRs = ends[first] - starts[first]
+        else:
+            TTRs = ends - starts
+            FTs = starts.copy()
+            FTs.sort()
+        TTFs = concatenate((FTs[:1], diff(FTs)))
+        return TTFs.tolist(), TTRs.tolist()
+
+    # slice index: [[start, end], [start], ...], the former dict layout
+    def toDict(self):
+        self._checkRecords()
+        durations = {}
+        for slice_index, start, end in zip(self.records.column(0).tolist(),
+                                           self.records.column(1).tolist(),
+                                           self.records.column(2).tolist()):
+            duration = [start] if end != end else [start, end]
+            durations.setdefault(slice_index, []).append(duration)
+        return durations
+
+
+class LossStore(object):
+    """
+    Data loss events, columns slice, time, cause (an index of CAUSES) and
+    the id of the unit that caused it, kept when keep_records is True.
+    Losses per cause and their distinct times are counted as they come,
+    losses are added in time order.
+    """
+    LSE = 0
+    DISK = 1
+    MACHINE = 2
+
+    CAUSES = ["LSE", "disk", "machine"]
+
+    def __init__(self, keep_records=True):
+        self.keep_records = keep_records
+        self.records = _Columns([int64, float64, int8, int64])
+        self.count = 0
+        self.cause_counts = [0]*len(LossStore.CAUSES)
+        self.cause_times = [0]*len(LossStore.CAUSES)
+        self.last_times = [None]*len(LossStore.CAUSES)
+
+    def add(self, slice_index, time, cause, unit_id):
+        if self.keep_records:
+            self.records.append(slice_index, time, cause, unit_id)
+        self.count += 1
+        self.cause_counts[cause] += 1
+        if time != self.last_times[cause]:
+            self.cause_times[cause] += 1
+            self.last_times[cause] = time
+
+    def __len__(self):
+        return self.count
+
+    def _checkRecords(self):
+        if not self.keep_records:
+            raise Exception("data losses are not recorded!")
+
+    def countUntil(self, t):
+        self._checkRecords()
+        return count_nonzero(self.records.column(1) <= t)
+
+    # (lost by LSE, by disk, by machine, distinct disk failure times,
+    # distinct machine failure times)
+    def details(self):
+        return (self.cause_counts[LossStore.LSE], self.cause_counts[LossStore.DISK],
+                self.cause_counts[LossStore.MACHINE], self.cause_times[LossStore.DISK],
+                self.cause_times[LossStore.MACHINE])
+
+    # details() recomputed from the records
+    def recordDetails(self):
+        self._checkRecords()
+        times = self.records.column(1)
+        causes = self.records.column(2)
+        return (count_nonzero(causes == LossStore.LSE),
+                count_nonzero(causes == LossStore.DISK),
+                count_nonzero(causes == LossStore.MACHINE),
+                len(unique(times[causes == LossStore.DISK])),
+                len(unique(times[causes == LossStore.MACHINE])))
+
+    # [(slice index, time, "cause unit id"), ...], the former list layout
+    def toList(self):
+        self._checkRecords()
+        return [(slice_index, time, LossStore.CAUSES[cause] + " " + str(unit_id))
+                for slice_index, time, cause, unit_id in
+                zip(*[self.records.column(i).tolist() for i in xrange(4)])]
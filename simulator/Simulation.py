@@ -2,21 +2,25 @@ import os
 import sys
 import csv
 
-from random import uniform, sample
+from random import uniform, sample, getrandbits
 from copy import deepcopy
 from time import strftime
 
 from simulator.Event import Event
 from simulator.Result import Result
 from simulator.utils import splitMethod
-from simulator.EventQueue import EventQueue
+from simulator.EventQueue import getEventQueue
+from simulator.Checkpoint import Checkpoint, iterationState, restoreIterationState
 from simulator.Log import info_logger, error_logger
 from simulator.Configuration import Configuration
 from simulator.XMLParser import XMLParser
 
+from simulator.unit.Unit import Unit
 from simulator.unit.Rack import Rack
 from simulator.unit.Machine import Machine
 from simulator.unit.Disk import Disk
+from simulator.unit.DiskWithScrubbing import DiskWithScrubbing
+from simulator.unit.FleetGenerator import FleetGenerator
 
 from simulator.eventHandler.EventHandler import EventHandler
 from simulator.dataDistribute.SSSDistribute import SSSDistribute, HierSSSDistribute
@@ -29,11 +33,22 @@ class Simulation(object):
 
     def __init__(self, conf_path):
         self.conf_path = conf_path
+        # id counters are class attributes, every simulation starts them over
+        Unit.unit_count = 0
+        Unit.random_seed = None
+        Machine.id_counter = 0
+        Event.id_counter = 0
 
         self.scaling_intervals = []
         self.iteration_times = 1
         self.ts = strftime("%Y%m%d.%H.%M.%S")
         self.total_events_handled = 0
+        # each simulation owns its queue, iterations reuse it after clear().
+        self.events = None
+        # iteration being run by main() and the results of the ones before it
+        self.iteration = 0
+        self.num_iterations = 1
+        self.contents = []
 
     def _failedComponents(self, info, interval):
         info.strip()
@@ -242,7 +257,27 @@ class Simulation(object):
             for item in contents:
                 writer.writerow(item)
 
-    def run(self):
+    def writeCheckpoint(self, start_state, handler, events, events_handled, next_checkpoint):
+        file_name = self.conf.checkpoint_file
+        if file_name is None:
+            file_name = RESULT + "checkpoint-" + self.ts + ".npz"
+        info = {"conf_path": self.conf_path, "ts": self.ts, "iteration": self.iteration,
+                "num_iterations": self.num_iterations, "contents": self.contents,
+                "iteration_times": self.iteration_times,
+                "total_events_handled": self.total_events_handled,
+                "events_handled": events_handled, "next_checkpoint": next_checkpoint}
+        Checkpoint.write(file_name, info, start_state, self.distributer.getRoot(),
+                         handler, events)
+        info_logger.info("checkpoint written to " + file_name)
+
+    # resume: a Checkpoint of this iteration to continue from.
+    def run(self, resume=None):
+        if resume is None:
+            start_state = iterationState()
+        else:
+            start_state = resume.state["start_state"]
+            restoreIterationState(start_state)
+
         conf = Configuration(self.conf_path)
         xml = XMLParser(conf)
         if conf.hier:
@@ -250,11 +285,20 @@ class Simulation(object):
         else:
             self.distributer = SSSDistribute(xml)
         self.conf = self.distributer.returnConf()
+        # event ids are only needed when events are written to a text
+        # event_file or traced one by one
+        Event.tracing = (self.conf.event_file is not None and
+                         self.conf.event_file_format.lower() == "text") or \
+            self.conf.event_trace.lower() == "event"
 
         self.event_handler = EventHandler
         self.distributer.start()
         events_handled = 0
-        events = EventQueue()
+        if self.events is None:
+            self.events = getEventQueue(self.conf.event_queue,
+                                       self.conf.event_queue_bucket_width)
+        events = self.events
+        events.clear()
 
         if self.conf.system_upgrade:
             for info in self.conf.system_upgrade_infos:
@@ -277,24 +321,49 @@ class Simulation(object):
         self.distributer.getRoot().printAll()
 
         root = self.distributer.getRoot()
-        root.generateEvents(events, 0, self.conf.total_time, True)
+        Unit.lazy_generation = self.conf.lazy_generation
+        Unit.random_seed = getrandbits(64)
+        DiskWithScrubbing.lazy_latent_errors = self.conf.lazy_latent_errors
+        if self.conf.fleet_generation:
+            FleetGenerator(root).generateEvents(events, 0, self.conf.total_time)
+        else:
+            root.generateEvents(events, 0, self.conf.total_time, True)
         for ts in self.conf.upgrade_ts:
             full_system_check_event = Event(Event.EventType.UpgradeCheck, ts, root, 6)
             events.addEvent(full_system_check_event)
 
-        if self.conf.event_file != None:
+        if self.conf.event_file != None and resume is None:
             events_file = self.conf.event_file + '-' + self.ts
-            events.printAll(events_file, "Iteration number: "+str(self.iteration_times))
+            if self.conf.event_file_format.lower() == "binary":
+                events.writeAll(events_file, "Iteration number: "+str(self.iteration_times),
+                                root, self.conf.event_file_compression.lower())
+            else:
+                events.printAll(events_file, "Iteration number: "+str(self.iteration_times))
         self.iteration_times += 1
 
         handler = self.event_handler(self.distributer)
+        next_checkpoint = self.conf.checkpoint_interval
+        if resume is not None:
+            resume.restore(root, handler, events)
+            self.iteration_times = resume.info["iteration_times"]
+            self.total_events_handled = resume.info["total_events_handled"]
+            events_handled = resume.info["events_handled"]
+            next_checkpoint = resume.info["next_checkpoint"]
 
         print "total slices:", handler.total_slices
         e = events.removeFirst()
         while e is not None:
-            handler.handleEvent(e, events)
+            if e.getType() == Event.EventType.Generate:
+                e.getUnit().advanceEvents(events, e.cycles)
+            else:
+                handler.handleEvent(e, events)
+                events_handled += 1
+            if self.conf.checkpoint_interval > 0 and e.getTime() >= next_checkpoint:
+                while next_checkpoint <= e.getTime():
+                    next_checkpoint += self.conf.checkpoint_interval
+                self.writeCheckpoint(start_state, handler, events, events_handled,
+                                     next_checkpoint)
             e = events.removeFirst()
-            events_handled += 1
 
         self.total_events_handled += events_handled
 
@@ -302,11 +371,19 @@ class Simulation(object):
         info_logger.info(result.toString())
         return result
 
-    def main(self, num_iterations):
-        contents = []
-
-        for i in xrange(num_iterations):
-            result = self.run()
+    def main(self, num_iterations, resume=None):
+        self.num_iterations = num_iterations
+        self.contents = contents = []
+        first_iteration = 0
+        if resume is not None:
+            self.ts = resume.info["ts"]
+            self.contents = contents = resume.info["contents"]
+            first_iteration = resume.info["iteration"]
+
+        for i in xrange(first_iteration, num_iterations):
+            self.iteration = i
+            result = self.run(resume)
+            resume = None
             contents.append([result.PDL, result.NOMDL, result.MTTR, result.MTBF, result.PUA, result.PUS, result.TRT])
             unavailable_slices = result.unavailable_slice_durations.keys()
             for slice_index in unavailable_slices:
@@ -322,8 +399,14 @@ class Simulation(object):
 
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--resume":
+        checkpoint = Checkpoint(sys.argv[2])
+        sim = Simulation(checkpoint.info["conf_path"])
+        sim.main(checkpoint.info["num_iterations"], checkpoint)
+        sys.exit(0)
     if len(sys.argv) != 3:
-        raise Exception("Usage: python Test.py conf_path num_iterations")
+        raise Exception("Usage: python Test.py conf_path num_iterations\n"
+                        "       python Test.py --resume checkpoint_file")
     path = sys.argv[1]
     num_iterations = int(sys.argv[2])
 
@@ -0,0 +1,314 @@
+from numpy import ones, zeros, full, arange, asarray, unique, count_nonzero, \
+    flatnonzero, unpackbits, integer, int8, int16, int64, uint8, uint64
+
+EMPTY = -1
+DELETED = -2
+
+# chunk states as 2 bit codes, a normal chunk is 0 so a healthy slice is word 0
+STATES = asarray([1, 0, -1, -2], dtype=int8)
+# code of a state, indexed by state + 2
+CODES = asarray([3, 2, 1, 0], dtype=uint64)
+# low bit of every 2 bit code
+LOW_BITS = 0x5555555555555555
+# Fibonacci hashing
+MULTIPLIER = 11400714819323198485
+WORD_MASK = (1 << 64) - 1
+# the low bits of 8 codes in 16 bits, next to each other
+COMPRESSED = sum(((arange(1 << 16) >> (2*i)) & 1) << i for i in xrange(8)).tolist()
+SCALARS = (int, long, integer)
+CODE_LIST = CODES.tolist()
+
+
+# the low bits of the codes of a word, bit i for chunk i
+def _compress(bits):
+    mask = 0
+    shift = 0
+    while bits:
+        mask |= COMPRESSED[bits & 0xffff] << shift
+        bits >>= 16
+        shift += 8
+    return mask
+
+
+class SparseStatus(object):
+    """
+    EventHandler.status of slices with a chunk not normal. An open addressing
+    table (linear probing, deleted slots marked) maps a slice to a word of 2
+    bit chunk codes, chunk i in bits 2i and 2i + 1, a slice not in it has all
+    chunks normal. Rows are read and written with the indexing of the dense
+    int8 matrix the handler uses:
+        status[slice], status[slice, index], status[slice, indexes],
+        status[slices], status[slices, indexes]
+    """
+
+    def __init__(self, total_slices, n, capacity=1024):
+        if n > 32:
+            raise Exception("sparse slice state holds up to 32 chunks per slice!")
+        self.shape = (total_slices, n)
+        self.n = n
+        self.full_mask = (1 << n) - 1
+        self.shifts = arange(n, dtype=uint64)*uint64(2)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.keys = full(capacity, EMPTY, dtype=int64)
+        self.words = zeros(capacity, dtype=uint64)
+        self.bits = capacity.bit_length() - 1
+        self.mask = capacity - 1
+        self.last_pos = 0
+        # live slots, live and deleted slots
+        self.size = 0
+        self.used = 0
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _homes(self, slices):
+        return ((slices.astype(uint64)*uint64(MULTIPLIER)) >>
+                uint64(64 - self.bits)).astype(int64)
+
+    # slot of a slice, -1 if it is not in the table
+    def _find(self, slice_index):
+        # the handler looks a slice up several times in a row
+        if self.keys.item(self.last_pos) == slice_index:
+            return self.last_pos
+        pos = ((slice_index*MULTIPLIER) & WORD_MASK) >> (64 - self.bits)
+        while True:
+            key = self.keys.item(pos)
+            if key == slice_index:
+                self.last_pos = pos
+                return pos
+            if key == EMPTY:
+                return -1
+            pos = (pos + 1) & self.mask
+
+    def _findMany(self, slices):
+        positions = self._homes(slices)
+        found = full(len(slices), -1, dtype=int64)
+        active = arange(len(slices))
+        while len(active) != 0:
+            pos = positions[active]
+            keys = self.keys[pos]
+            hit = keys == slices[active]
+            found[active[hit]] = pos[hit]
+            go_on = ~hit & (keys != EMPTY)
+            active = active[go_on]
+            positions[active] = (pos[go_on] + 1) & self.mask
+        return found
+
+    def word(self, slice_index):
+        pos = self._find(slice_index)
+        return 0 if pos < 0 else self.words.item(pos)
+
+    def wordsOf(self, slices):
+        pos = self._findMany(slices)
+        words = zeros(len(slices), dtype=uint64)
+        words[pos >= 0] = self.words[pos[pos >= 0]]
+        return words
+
+    def _setWord(self, slice_index, word):
+        pos = self._find(slice_index)
+        if pos >= 0:
+            if word != 0:
+                self.words[pos] = word
+            else:
+                self.keys[pos] = DELETED
+                self.size -= 1
+        elif word != 0:
+            self._insertMany(asarray([slice_index], dtype=int64),
+                             asarray([word], dtype=uint64))
+
+    # words of distinct slices
+    def _setWords(self, slices, words):
+        pos = self._findMany(slices)
+        found = pos >= 0
+        pos = pos[found]
+        self.words[pos] = words[found]
+        healthy = pos[words[found] == 0]
+        self.keys[healthy] = DELETED
+        self.size -= len(healthy)
+        new = ~found & (words != 0)
+        self._insertMany(slices[new], words[new])
+
+    # slices not in the table, at most half of the slots are used after it
+    def _insertMany(self, slices, words):
+        if len(slices) == 0:
+            return
+        if (self.used + len(slices))*2 > len(self.keys):
+            self._rehash(len(slices))
+        positions = self._homes(slices)
+        active = arange(len(slices))
+        placed = zeros(len(slices), dtype=bool)
+        while len(active) != 0:
+            pos = positions[active]
+            free = self.keys[pos] < 0
+            # the first of the slices probing a free slot takes it
+            slots, first = unique(pos[free], return_index=True)
+            winners = active[free][first]
+            self.used += count_nonzero(self.keys[slots] == EMPTY)
+            self.size += len(winners)
+            self.keys[slots] = slices[winners]
+            self.words[slots] = words[winners]
+            placed[winners] = True
+            active = active[~placed[active]]
+            positions[active] = (positions[active] + 1) & self.mask
+
+    def _rehash(self, extra=0):
+        slices, words = self.getState()
+        capacity = 1024
+        while capacity < 4*(len(slices) + extra):
+            capacity *= 2
+        self._allocate(capacity)
+        self._insertMany(slices, words)
+
+    # (available, lost) drs bitmasks of a slice, as EventHandler.masks
+    def masks(self, slice_index):
+        word = self.word(slice_index)
+        if word == 0:
+            return self.full_mask, 0
+        return self.full_mask & ~_compress((word | (word >> 1)) & LOW_BITS), \
+            _compress((word >> 1) & LOW_BITS)
+
+    def unpack(self, words):
+        return STATES[((words[:, None] >> self.shifts) & uint64(3)).astype(int64)]
+
+    def pack(self, states):
+        return (CODES[states.astype(int64) + 2] << self.shifts).sum(axis=1, dtype=uint64)
+
+    def __getitem__(self, key):
+        rows, cols = key if isinstance(key, tuple) else (key, None)
+        if isinstance(rows, SCALARS):
+            word = self.word(int(rows))
+            if isinstance(cols, SCALARS):
+                return STATES.item((word >> (2*int(cols))) & 3)
+            states = self.unpack(asarray([word], dtype=uint64))[0]
+            return states if cols is None else states[cols]
+        rows = asarray(rows, dtype=int64)
+        states = self.unpack(self.wordsOf(rows))
+        if cols is None:
+            return states
+        return states[arange(len(rows)), cols]
+
+    def __setitem__(self, key, value):
+        rows, cols = key if isinstance(key, tuple) else (key, None)
+        if isinstance(rows, SCALARS):
+            rows = int(rows)
+            word = self.word(rows)
+            if isinstance(value, SCALARS) and cols is not None:
+                code = CODE_LIST[int(value) + 2]
+                for index in ([cols] if isinstance(cols, SCALARS) else cols):
+                    shift = 2*int(index)
+                    word = (word & ~(3 << shift)) | (code << shift)
+                self._setWord(rows, word)
+                return
+            states = self.unpack(asarray([word], dtype=uint64))
+            states[0, slice(None) if cols is None else cols] = value
+            self._setWord(rows, self.pack(states).item(0))
+            return
+        rows = asarray(rows, dtype=int64)
+        if len(rows) == 0:
+            return
+        slices, inverse = unique(rows, return_inverse=True)
+        states = self.unpack(self.wordsOf(slices))
+        if cols is None:
+            states[inverse] = value
+        else:
+            states[inverse, cols] = value
+        self._setWords(slices, self.pack(states))
+
+    # (slices, words) in the table
+    def getState(self):
+        live = flatnonzero(self.keys >= 0)
+        return self.keys[live], self.words[live]
+
+    def setState(self, slices, words):
+        self._allocate(1024)
+        self._insertMany(asarray(slices, dtype=int64), asarray(words, dtype=uint64))
+
+    def slices(self):
+        return self.getState()[0]
+
+    def toDense(self):
+        status = ones(self.shape, dtype=int8)
+        slices, words = self.getState()
+        status[slices] = self.unpack(words)
+        return status
+
+    def nbytes(self):
+        return self.keys.nbytes + self.words.nbytes
+
+
+class SliceCounts(object):
+    """
+    Available (durable False) or durable chunks per slice worked out from a
+    SparseStatus. They always match it, so writes are ignored.
+    """
+
+    def __init__(self, status, durable):
+        self.status = status
+        self.durable = durable
+
+    def __len__(self):
+        return len(self.status)
+
+    def _count(self, word):
+        if self.durable:
+            word >>= 1
+        else:
+            word |= word >> 1
+        return self.status.n - bin(word & LOW_BITS).count("1")
+
+    def __getitem__(self, key):
+        if isinstance(key, SCALARS):
+            return self._count(self.status.word(int(key)))
+        states = self.status[asarray(key, dtype=int64)]
+        if self.durable:
+            return count_nonzero(states >= 0, axis=1).astype(int16)
+        return count_nonzero(states == 1, axis=1).astype(int16)
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class LostBitmap(object):
+    """
+    EventHandler.lost as one bit per slice, slice i in bit 7 - i % 8 of
+    byte i / 8 as packbits does it.
+    """
+
+    def __init__(self, total_slices):
+        self.total_slices = total_slices
+        self.bits = zeros((total_slices + 7)//8, dtype=uint8)
+
+    def __len__(self):
+        return self.total_slices
+
+    def __getitem__(self, key):
+        if isinstance(key, SCALARS):
+            key = int(key)
+            return (self.bits.item(key >> 3) >> (7 - (key & 7))) & 1 == 1
+        key = asarray(key, dtype=int64)
+        return (self.bits[key >> 3] >> (7 - (key & 7)).astype(uint8)) & 1 == 1
+
+    def __setitem__(self, key, value):
+        key = int(key)
+        if value:
+            self.bits[key >> 3] |= 0x80 >> (key & 7)
+        else:
+            self.bits[key >> 3] &= ~(0x80 >> (key & 7)) & 0xff
+
+    def toDense(self):
+        return unpackbits(self.bits)[:self.total_slices].astype(bool)
+
+    def nbytes(self):
+        return self.bits.nbytes
+
+
+# (status, lost, available counts, durable counts) of EventHandler
+def sliceState(total_slices, n, sparse=False):
+    if sparse:
+        status = SparseStatus(total_slices, n)
+        return status, LostBitmap(total_slices), SliceCounts(status, False), \
+            SliceCounts(status, True)
+    return ones((total_slices, n), dtype=int8), zeros(total_slices, dtype=bool), \
+        full(total_slices, n, dtype=int16), full(total_slices, n, dtype=int16)
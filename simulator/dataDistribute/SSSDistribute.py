@@ -18,6 +18,7 @@ class SSSDistribute(DataDistribute):
     def _blockMoving(self, old_disk, new_disk, slice_index):
         old_disk.removeChild(slice_index)
         new_disk.addChild(slice_index)
+        self.index_stale = True
         for i, disk in enumerate(self.slice_locations[slice_index]):
             if disk == old_disk:
                 self.slice_locations[slice_index][i] = new_disk
@@ -62,6 +63,7 @@ class SSSDistribute(DataDistribute):
             self._my_assert(len(self.slice_locations[i]) == self.n)
 
         self._my_assert(len(self.slice_locations) == self.total_slices)
+        self.index_stale = True
 
     def distributeSliceToDisk(self, slice_index, disks, available_racks, separate_racks):
         retry_count = 0
@@ -226,6 +228,7 @@ class HierSSSDistribute(SSSDistribute):
             self._my_assert(len(self.slice_locations[slice_index]) == self.n)
 
         self._my_assert(len(self.slice_locations) == self.total_slices)
+        self.index_stale = True
 
     def distributeSliceToDisk(self, slice_index, machines):
         retry_count = 0
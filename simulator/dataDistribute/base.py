@@ -1,4 +1,5 @@
 from time import strftime, time
+from numpy import arange, array, argsort, bincount, concatenate, cumsum, int8, int32, int64
 
 from simulator.Configuration import Configuration
 from simulator.Log import error_logger
@@ -20,6 +21,20 @@ class DataDistribute(object):
         self.root = units[0]
 
         self.slice_locations = []
+        # disk -> chunks index in CSR style, built from slice_locations when
+        # first asked for and again after chunks were placed or moved.
+        # The chunks of the disk in row disk_rows[disk id] are
+        # chunk_slices[indptr[row]:indptr[row+1]], sorted by slice index,
+        # chunk_positions holds their positions in the slice.
+        self.index_stale = True
+        self.disk_rows = {}
+        self.indptr = None
+        self.chunk_slices = None
+        self.chunk_positions = None
+        # disk rows of the chunks of every slice, one row of n per slice, and
+        # the disk of every row
+        self.slice_disk_rows = None
+        self.row_disks = []
         # slice_infos format: slice_index:[(DRC, size, medium, locations, start, end),...]
         self.slice_infos = {}
 
@@ -42,6 +57,75 @@ class DataDistribute(object):
     def returnSliceLocations(self):
         return self.slice_locations
 
+    def buildChunkIndex(self):
+        disk_rows = {}
+        row_disks = []
+        chunk_disks = []
+        for locations in self.slice_locations:
+            for disk in locations:
+                row = disk_rows.get(disk.getID())
+                if row is None:
+                    row = len(disk_rows)
+                    disk_rows[disk.getID()] = row
+                    row_disks.append(disk)
+                chunk_disks.append(row)
+        chunk_disks = array(chunk_disks, dtype=int32)
+
+        # stable, so chunks of one disk stay in slice order
+        order = argsort(chunk_disks, kind="mergesort")
+        self.chunk_slices = (order // self.n).astype(int32)
+        self.chunk_positions = (order % self.n).astype(int8)
+        counts = bincount(chunk_disks, minlength=len(disk_rows))
+        self.indptr = concatenate(([0], cumsum(counts))).astype(int64)
+        self.slice_disk_rows = chunk_disks.reshape(-1, self.n)
+        self.disk_rows = disk_rows
+        self.row_disks = row_disks
+        self.index_stale = False
+
+    # (slice indexes, chunk positions) of the chunks on disk, as lists
+    def diskChunks(self, disk):
+        if self.index_stale:
+            self.buildChunkIndex()
+        row = self.disk_rows.get(disk.getID())
+        if row is None:
+            return [], []
+        start, end = self.indptr[row], self.indptr[row+1]
+        return self.chunk_slices[start:end].tolist(), self.chunk_positions[start:end].tolist()
+
+    # (slice indexes, chunk positions) of the chunks on all disks, as arrays
+    def disksChunks(self, disks):
+        if self.index_stale:
+            self.buildChunkIndex()
+        takes = [arange(self.indptr[row], self.indptr[row+1]) for row in
+                 [self.disk_rows.get(disk.getID()) for disk in disks] if row is not None]
+        if takes == []:
+            return self.chunk_slices[:0], self.chunk_positions[:0]
+        take = concatenate(takes)
+        return self.chunk_slices[take], self.chunk_positions[take]
+
+    # disk rows of the chunks of slices, one row of n per slice
+    def slicesDiskRows(self, slice_indexes):
+        if self.index_stale:
+            self.buildChunkIndex()
+        return self.slice_disk_rows[slice_indexes]
+
+    # disks by row of the chunk index, and the number of chunks on each
+    def rowDisks(self):
+        if self.index_stale:
+            self.buildChunkIndex()
+        return self.row_disks, self.indptr[1:] - self.indptr[:-1]
+
+    # position of the chunk of slice_index on disk
+    def chunkPosition(self, slice_index, disk):
+        if self.index_stale:
+            self.buildChunkIndex()
+        row = self.disk_rows[disk.getID()]
+        start, end = self.indptr[row], self.indptr[row+1]
+        i = start + self.chunk_slices[start:end].searchsorted(slice_index)
+        if i == end or self.chunk_slices[i] != slice_index:
+            raise Exception("slice " + str(slice_index) + " has no chunk on " + disk.toString())
+        return int(self.chunk_positions[i])
+
     def getRoot(self):
         return self.root
 
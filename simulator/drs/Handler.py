@@ -3,9 +3,11 @@ from simulator.drs.LRC import LRC
 from simulator.drs.XORBAS import XORBAS
 from simulator.drs.MSR import MSR
 from simulator.drs.MBR import MBR
+from simulator.drs.Matrix import Matrix
 
 
-def getDRSHandler(redun_name, params):
+# code_file is the generator matrix of a "MATRIX" code, see drs.Matrix.
+def getDRSHandler(redun_name, params, code_file=None):
     if redun_name.upper() == "RS":
         handler = RS(params)
     elif redun_name.upper() == "LRC":
@@ -16,6 +18,8 @@ def getDRSHandler(redun_name, params):
         handler = MSR(params)
     elif redun_name.upper() == "MBR":
         handler = MBR(params)
+    elif redun_name.upper() == "MATRIX":
+        handler = Matrix(params, code_file)
     else:
         raise Exception("Incorrect data redundancy name!")
     return handler
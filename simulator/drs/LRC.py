@@ -1,3 +1,5 @@
+from numpy import count_nonzero, argmax, where, zeros, full, int8, int16
+
 from simulator.drs.base import Base
 
 
@@ -12,6 +14,7 @@ class LRC(Base):
         self.ll = int(params[2])
         self.m0 = 1
         self.m1 = self.n - self.k - self.ll * self.m0
+        self.table = {}
 
     def _check(self):
         if self.k < 0 or self.ll < 0 or self.m0 < 0 or self.m1 < 0:
@@ -149,6 +152,50 @@ class LRC(Base):
         else:
             return self.RC + repair_amount - 1
 
+    # isRepairable of every row of an (m, n) bool array of normal blocks,
+    # the group losses counted for all rows at once. The counts add up
+    # columns in int8, sums over the short rows are several times slower.
+    def _repairableRows(self, normal):
+        b = self.k/self.ll
+        rows = len(normal)
+        normal = normal.view(int8)
+        avails = normal[:, 0].copy()
+        for i in xrange(1, self.n):
+            avails += normal[:, i]
+        groups = normal[:, :self.ll*b].reshape(rows, self.ll, b)
+        group_avails = normal[:, self.k:self.k+self.ll*self.m0].copy()
+        for i in xrange(b):
+            group_avails += groups[:, :, i]
+        group_losses = b + self.m0 - group_avails
+        broken = group_losses > self.m0
+        broken_count = zeros(rows, dtype=int8)
+        loss_amount = full(rows, self.m1, dtype=int16)
+        for i in xrange(self.ll):
+            broken_count += broken[:, i]
+            loss_amount += group_losses[:, i]*broken[:, i]
+        # the columns of state[-self.m1:] in isRepairable
+        for i in xrange(-self.m1 % self.n, self.n):
+            loss_amount -= normal[:, i]
+        avail_equ = broken_count*self.m0 + self.m1
+        return (avails == self.n) | ((avails >= self.k) & (avail_equ >= loss_amount))
+
+    def isRepairableMany(self, states):
+        return self._repairableRows(states == 1)
+
+    # repair cost of rows with a single repaired block at index
+    def _singleCosts(self, index):
+        return where(index < self.n-self.m1, self.ORC, self.RC)
+
+    def parallRepairMany(self, states, only_lost=False):
+        if only_lost:
+            first = argmax(states < 0, axis=1)
+        else:
+            first = argmax(states != 1, axis=1)
+        repair_amounts = self._repairAll(states, only_lost)
+        return where(repair_amounts == 0, 0,
+                     where(repair_amounts == 1, self._singleCosts(first),
+                           self.RC + repair_amounts - 1))
+
 
 if __name__ == "__main__":
     lrc = LRC([10, 6, 2])
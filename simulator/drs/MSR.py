@@ -1,3 +1,5 @@
+from numpy import count_nonzero
+
 from simulator.drs.base import Base
 
 
@@ -63,6 +65,17 @@ class MSR(Base):
         else:
             return repair_amount + self.k - 1
 
+    def isRepairableMany(self, states):
+        return count_nonzero(states == 1, axis=1) >= self.k
+
+    def parallRepairMany(self, states, only_lost=False):
+        avails = count_nonzero(states == 1, axis=1)
+        repair_amounts = self._repairAll(states, only_lost)
+        costs = (repair_amounts + self.k - 1).astype(float)
+        costs[(avails >= self.d) & (repair_amounts == 1)] = self.ORC
+        costs[repair_amounts == 0] = 0
+        return costs
+
 
 if __name__ == "__main__":
     msr = MSR([14, 10, 12])
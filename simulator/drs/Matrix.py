@@ -0,0 +1,243 @@
+import ConfigParser
+from itertools import combinations
+from numpy import zeros
+
+from simulator.drs.base import Base, toMasks, toMasksMany
+
+# the decodability of every erasure pattern is computed up front up to
+# this many blocks per stripe, longer stripes are decided when first seen.
+MAX_TABLE_N = 20
+
+# GF(2^8) with the primitive polynomial x^8+x^4+x^3+x^2+1
+GF256_EXP = [0]*512
+GF256_LOG = [0]*256
+_x = 1
+for _i in xrange(255):
+    GF256_EXP[_i] = _x
+    GF256_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11d
+for _i in xrange(255, 512):
+    GF256_EXP[_i] = GF256_EXP[_i - 255]
+
+
+def gfMul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return GF256_EXP[GF256_LOG[a] + GF256_LOG[b]]
+
+
+def gfInv(a):
+    return GF256_EXP[255 - GF256_LOG[a]]
+
+
+def rankGF2(rows):
+    # rows are ints, bit j is the coefficient of data block j
+    basis = []
+    for row in rows:
+        for b in basis:
+            row = min(row, row ^ b)
+        if row != 0:
+            basis.append(row)
+    return len(basis)
+
+
+def rankGF256(rows):
+    rows = [list(row) for row in rows]
+    rank = 0
+    columns = len(rows[0]) if rows != [] else 0
+    for c in xrange(columns):
+        pivot = None
+        for r in xrange(rank, len(rows)):
+            if rows[r][c] != 0:
+                pivot = r
+                break
+        if pivot is None:
+            continue
+        rows[rank], rows[pivot] = rows[pivot], rows[rank]
+        inv = gfInv(rows[rank][c])
+        rows[rank] = [gfMul(inv, v) for v in rows[rank]]
+        for r in xrange(len(rows)):
+            if r != rank and rows[r][c] != 0:
+                f = rows[r][c]
+                rows[r] = [v ^ gfMul(f, p) for v, p in zip(rows[r], rows[rank])]
+        rank += 1
+    return rank
+
+
+class Matrix(Base):
+    """
+    Linear code given by its generator matrix in a code file: block i of a
+    stripe is row i times the k data blocks, over GF(2) or GF(2^8). A stripe
+    is repairable when the rows of its available blocks have rank k.
+    A block is repaired from the other blocks of one of its local groups
+    (listed in the code file) when they are all available, else from k
+    blocks. Code file, an ini file:
+        [code]
+        field = GF256
+        generator =
+            one row of k coefficients per block
+        groups =
+            one local group of block indexes per line
+    """
+
+    def __init__(self, params, code_file):
+        if code_file is None:
+            raise Exception("Matrix code needs a code_file!")
+        conf = ConfigParser.ConfigParser()
+        if conf.read(code_file) == []:
+            raise Exception("Can not read code file " + code_file)
+        self.field = conf.get("code", "field").upper()
+        if self.field not in ["GF2", "GF256"]:
+            raise Exception("field must be 'GF2' or 'GF256'!")
+        self.generator = self._rows(conf.get("code", "generator"))
+        self.groups = []
+        if conf.has_option("code", "groups"):
+            self.groups = self._rows(conf.get("code", "groups"))
+
+        self.n = len(self.generator)
+        self.k = len(self.generator[0])
+        if len(params) >= 2 and (int(params[0]) != self.n or int(params[1]) != self.k):
+            raise Exception("code file is not a (" + str(params[0]) + ", " +
+                            str(params[1]) + ") code!")
+        self.table = {}
+        self._check()
+
+        # local repair cost of every block, RC without a local group
+        self.local_costs = [self.RC]*self.n
+        for group in self.groups:
+            if self._rank([self.generator[i] for i in group]) != len(group) - 1:
+                raise Exception("local group " + str(group) + " is not one parity group!")
+            for i in group:
+                self.local_costs[i] = min(self.local_costs[i], len(group) - 1)
+
+        self.decodable = None
+        if self.n <= MAX_TABLE_N:
+            self.decodable = self._decodableTable()
+
+    def _check(self):
+        super(Matrix, self)._check()
+        for row in self.generator:
+            if len(row) != self.k:
+                raise Exception("generator rows must have k coefficients!")
+            if self.field == "GF2" and max(row) > 1 or max(row) > 255:
+                raise Exception("coefficient out of the field in row " + str(row))
+        for group in self.groups:
+            if max(group) >= self.n:
+                raise Exception("local group " + str(group) + " has no such block!")
+
+    def _rows(self, value):
+        rows = []
+        for line in value.split("\n"):
+            line = line.split("#")[0].strip()
+            if line != "":
+                rows.append([int(item, 0) for item in line.split()])
+        return rows
+
+    def _rank(self, rows):
+        if self.field == "GF2":
+            return rankGF2([sum(v << j for j, v in enumerate(row)) for row in rows])
+        return rankGF256(rows)
+
+    def _decodableTable(self):
+        # decodable patterns are those holding k blocks of rank k: rank
+        # every k blocks, then spread to supersets one bit at a time.
+        table = zeros(1 << self.n, dtype=bool)
+        for blocks in combinations(xrange(self.n), self.k):
+            if self._rank([self.generator[i] for i in blocks]) == self.k:
+                table[sum(1 << i for i in blocks)] = True
+        for b in xrange(self.n):
+            halves = table.reshape(-1, 2, 1 << b)
+            halves[:, 1, :] |= halves[:, 0, :]
+        return table
+
+    @property
+    def isMDS(self):
+        return False
+
+    @property
+    def ORC(self):
+        return min(self.local_costs)
+
+    def repairTraffic(self, hier=False, d_racks=0):
+        rt = float(sum(self.local_costs))/self.n
+        if not hier:
+            return rt
+        else:
+            reduced = float(self.n)/d_racks - 1
+            if reduced > rt:
+                return float(0)
+            return rt - reduced
+
+    def isRepairableMasks(self, available, lost):
+        if self.decodable is not None:
+            return bool(self.decodable[available])
+        return super(Matrix, self).isRepairableMasks(available, lost)
+
+    def isRepairableMany(self, states):
+        if self.decodable is not None:
+            return self.decodable[toMasksMany(states)[0]]
+        return super(Matrix, self).isRepairableMany(states)
+
+    def isRepairable(self, state):
+        if isinstance(state, int):
+            return False
+        if len(state) != self.n:
+            raise Exception("State Length Error!")
+        available = toMasks(state)[0]
+        if self.decodable is not None:
+            return bool(self.decodable[available])
+        if available not in self.table:
+            self.table[available] = self._rank([self.generator[i] for i in xrange(self.n)
+                                                if available >> i & 1]) == self.k
+        return self.table[available]
+
+    # cost of repairing block index alone from the available blocks
+    def _repairCost(self, state, index):
+        costs = [len(group) - 1 for group in self.groups
+                 if index in group and all(state[i] == 1 for i in group if i != index)]
+        return min(costs + [self.RC])
+
+    def repair(self, state, index):
+        if not self.isRepairable(state):
+            raise Exception("state can not be repaired!")
+        if state[index] == 1:
+            raise Exception("index:" + str(index) + " in " + str(state) + " is normal state")
+        rc = self._repairCost(state, index)
+        state[index] = 1
+        return rc
+
+    def parallRepair(self, state, only_lost=False):
+        if not self.isRepairable(state):
+            raise Exception("state can not be repaired!")
+
+        before = list(state)
+        repair_index = []
+        for i in xrange(self.n):
+            if state[i] == -1 or state[i] == -2:
+                state[i] = 1
+                repair_index.append(i)
+            if not only_lost and state[i] == 0:
+                state[i] = 1
+                repair_index.append(i)
+
+        repair_amount = len(repair_index)
+        if repair_amount == 0:
+            return 0
+        elif repair_amount == 1:
+            return self._repairCost(before, repair_index[0])
+        else:
+            return self.RC + repair_amount - 1
+
+
+if __name__ == "__main__":
+    import sys
+    code = Matrix([], sys.argv[1])
+    print "n:", code.n, "k:", code.k, "field:", code.field
+    print "local repair costs:", code.local_costs
+    for failures in xrange(code.n - code.k + 1):
+        patterns = list(combinations(xrange(code.n), failures))
+        repairable = sum(1 for blocks in patterns
+                         if code.isRepairableMasks(((1 << code.n) - 1) & ~sum(1 << i for i in blocks), 0))
+        print failures, "failures:", repairable, "of", len(patterns), "patterns repairable"
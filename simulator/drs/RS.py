@@ -1,3 +1,5 @@
+from numpy import count_nonzero, where
+
 from simulator.drs.base import Base
 
 
@@ -44,6 +46,13 @@ class RS(Base):
         else:
             return repair_amount + self.k - 1
 
+    def isRepairableMany(self, states):
+        return count_nonzero(states == 1, axis=1) >= self.k
+
+    def parallRepairMany(self, states, only_lost=False):
+        repair_amounts = self._repairAll(states, only_lost)
+        return where(repair_amounts == 0, 0, repair_amounts + self.k - 1)
+
 
 if __name__ == "__main__":
     rs = RS(['9','6'])
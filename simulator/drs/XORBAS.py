@@ -1,4 +1,5 @@
 from copy import deepcopy
+from numpy import count_nonzero, flatnonzero, argmin
 
 from simulator.drs.LRC import LRC
 
@@ -84,6 +85,17 @@ class XORBAS(LRC):
         else:
             return self.RC + repair_amount - 1
 
+    # a parity group missing one block gets it back before the LRC check
+    def isRepairableMany(self, states):
+        normal = states == 1
+        parity_group = normal[:, -(self.m1 + self.ll):]
+        rows = flatnonzero(count_nonzero(parity_group, axis=1) == parity_group.shape[1] - 1)
+        normal[rows, self.k + argmin(parity_group[rows], axis=1)] = True
+        return self._repairableRows(normal)
+
+    def _singleCosts(self, index):
+        return self.ORC
+
 
 if __name__ == "__main__":
     lrc = XORBAS([10, 6, 2])
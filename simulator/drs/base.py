@@ -1,5 +1,38 @@
 
 
+from itertools import combinations
+
+from numpy import array, arange, count_nonzero, zeros, ones, int8, int64
+
+# tolerance() tries at most this many stripe states per number of missing blocks
+MAX_TOLERANCE_STATES = 1 << 16
+
+
+def toMasks(state):
+    """
+    Stripe state as a pair of bitmasks (available, lost), bit i is block i.
+    Blocks in neither mask are unavailable.
+    """
+    available = 0
+    lost = 0
+    for i, s in enumerate(state):
+        if s == 1:
+            available |= 1 << i
+        elif s < 0:
+            lost |= 1 << i
+    return available, lost
+
+
+def toState(available, lost, n):
+    return [1 if available >> i & 1 else (-1 if lost >> i & 1 else 0) for i in xrange(n)]
+
+
+# toMasks of every row of an (m, n) array of stripe states, as int64 arrays
+def toMasksMany(states):
+    bit_values = 1 << arange(states.shape[1], dtype=int64)
+    return (states == 1).dot(bit_values), (states < 0).dot(bit_values)
+
+
 class Base(object):
     """
     stripe state: [1,1,0,-1,-2,...]
@@ -7,11 +40,14 @@ class Base(object):
         block state 0 : Unavailable
         block state -1: Lost(caused by disk corruption)
         block state -2: Lost(hit by Latent Sector Error)
+    The *Masks methods take a stripe as bitmasks (see toMasks), their results
+    are memoised per code instance in self.table.
     """
 
     def __init__(self, params):
         self.n = int(params[0])
         self.k = int(params[1])
+        self.table = {}
         self._check()
 
     def _check(self):
@@ -79,6 +115,77 @@ class Base(object):
     def parallRepair(self, state, only_lost=False):
         pass
 
+    def isRepairableMasks(self, available, lost):
+        key = (available, lost)
+        if key not in self.table:
+            self.table[key] = self.isRepairable(toState(available, lost, self.n))
+        return self.table[key]
+
+    # Return (repair cost, available mask after the repair).
+    def repairMasks(self, available, lost, index):
+        key = (available, lost, index)
+        if key not in self.table:
+            state = toState(available, lost, self.n)
+            rc = self.repair(state, index)
+            self.table[key] = (rc, toMasks(state)[0])
+        return self.table[key]
+
+    # Return (repair cost, available mask after the repair).
+    def parallRepairMasks(self, available, lost, only_lost=False):
+        key = (available, lost, -1 if only_lost else -2)
+        if key not in self.table:
+            state = toState(available, lost, self.n)
+            rc = self.parallRepair(state, only_lost)
+            self.table[key] = (rc, toMasks(state)[0])
+        return self.table[key]
+
+    # Batch versions take an (m, n) int8 array, one stripe state per row.
+    # Here every row is looked up in the mask table, MDS codes count.
+    def isRepairableMany(self, states):
+        availables, losts = toMasksMany(states)
+        return array([self.isRepairableMasks(available, lost) for available, lost in
+                      zip(availables.tolist(), losts.tolist())], dtype=bool)
+
+    # Repair every row in place, return the repair costs.
+    def parallRepairMany(self, states, only_lost=False):
+        availables, losts = toMasksMany(states)
+        costs = []
+        afters = zeros(len(states), dtype=int64)
+        for i, (available, lost) in enumerate(zip(availables.tolist(), losts.tolist())):
+            rc, afters[i] = self.parallRepairMasks(available, lost, only_lost)
+            costs.append(rc)
+        repaired = (afters[:, None] >> arange(self.n, dtype=int64)) & 1 == 1
+        states[repaired] = 1
+        return array(costs)
+
+    # The most blocks that can be missing, whichever they are, with the stripe
+    # still repairable, from isRepairableMany with them unavailable and lost.
+    # Past MAX_TOLERANCE_STATES states it is a lower bound.
+    def tolerance(self):
+        states_count = 1
+        for missing in xrange(1, self.n + 1):
+            states_count = states_count*(self.n - missing + 1)/missing
+            if states_count > MAX_TOLERANCE_STATES:
+                return missing - 1
+            states = ones((states_count, self.n), dtype=int8)
+            states[arange(states_count).repeat(missing),
+                   array(list(combinations(xrange(self.n), missing))).ravel()] = 0
+            if not (self.isRepairableMany(states).all() and
+                    self.isRepairableMany(2*states - 1).all()):
+                return missing - 1
+        return self.n
+
+    # Set the blocks parallRepair repairs to normal, return their count per row.
+    def _repairAll(self, states, only_lost):
+        if not self.isRepairableMany(states).all():
+            raise Exception("state can not be repaired!")
+        if only_lost:
+            repaired = states < 0
+        else:
+            repaired = states != 1
+        states[repaired] = 1
+        return count_nonzero(repaired, axis=1)
+
 
 if __name__ == "__main__":
     pass
@@ -2,10 +2,16 @@ from collections import OrderedDict
 from math import sqrt, ceil
 from random import randint, choice
 from copy import deepcopy
+from numpy import zeros, full, arange, maximum, bincount, count_nonzero, flatnonzero, \
+    unique, int8, int64
 
 from simulator.Event import Event
+from simulator.EventTrace import EventTrace
 from simulator.Result import Result
-from simulator.utils import FIFO
+from simulator.RecordStore import IntervalStore, LossStore
+from simulator.SliceState import sliceState
+from simulator.eventHandler.LazyLatentErrors import LazyLatentErrors
+from simulator.utils import FIFO, IndexedSet, IndexedMask
 from simulator.Log import info_logger, error_logger
 from simulator.unit.Rack import Rack
 from simulator.unit.Machine import Machine
@@ -70,21 +76,61 @@ class EventHandler(object):
         # True means there is scaling during mission time.
         self.scaling = self.conf.system_scaling
 
+        self.trace = EventTrace(self.conf.event_trace, self.conf.trace_file)
+        # event type -> handler(u, time, e, queue)
+        self.handlers = {
+            Event.EventType.Failure: self.handleFailure,
+            Event.EventType.Recovered: self.handleRecovery,
+            Event.EventType.LatentDefect:
+                lambda u, time, e, queue: self.handleLatentDefect(u, time, e),
+            Event.EventType.LatentRecovered:
+                lambda u, time, e, queue: self.handleLatentRecovered(u, time, e),
+            Event.EventType.EagerRecoveryStart: self.handleEagerRecoveryStart,
+            Event.EventType.EagerRecoveryInstallment:
+                lambda u, time, e, queue: self.handleEagerRecoveryInstallment(u, time, e),
+            Event.EventType.UpgradeCheck: self.handleUpgradeCheck}
+
         # for each block, 1 means Normal, 0 means Unavailable, -1 means Lost(caused by disk or node lost),
         # -2 means Lost(caused by LSE)
-        self.status = [[1 for i in xrange(self.n)] for j in xrange(self.total_slices)]
+        # lost slices are flagged in self.lost, their rows are left as they were.
+        # available (1) and durable (1 or 0) chunks per slice, changed with
+        # every chunk transition. check_slice_counters recounts them from
+        # status after every event.
+        # The sparse slice state keeps only slices with a chunk not normal,
+        # lost flags in a bitmap and the counters worked out from status.
+        self.sparse_state = self.conf.slice_state.lower() == "sparse"
+        self.status, self.lost, self.avail_counts, self.durable_counts = \
+            sliceState(self.total_slices, self.n, self.sparse_state)
+        # slices with fewer than n available chunks, lost ones stay in it,
+        # a mask over all slices unless the slice state is sparse
+        if self.sparse_state:
+            self.degraded_slices = IndexedSet()
+        else:
+            self.degraded_slices = IndexedMask(self.total_slices)
+        self.check_counters = self.conf.check_slice_counters
+        # LSEs drawn for degraded slices only, see LazyLatentErrors
+        self.lazy_latent = None
+        if self.conf.lazy_latent_errors:
+            self.lazy_latent = LazyLatentErrors(self)
+            self.handlers[Event.EventType.LatentDefect] = \
+                lambda u, time, e, queue: self.lazy_latent.arrival(e, time, queue)
+        # slice rows as drs bitmasks, bit i is chunk i
+        self.bit_values = 1 << arange(self.n, dtype=int64)
+        self.full_mask = (1 << self.n) - 1
+        # slices missing at most this many chunks are repairable
+        self.tolerance = 0 if self.drs_handler.isMDS else self.drs_handler.tolerance()
 
         self.unavailable_slice_count = 0
 
-        # [(slice_index, occur_time, caused by what kind of component failure), ...],
-        # example: (13567, 12456.78, "disk 137")
-        self.undurable_slice_infos = []
+        # slice_index, occur_time, caused by what kind of component failure
+        # and its id, example: (13567, 12456.78, LossStore.DISK, 137)
+        self.undurable_slices = LossStore(self.conf.keep_interval_records)
         self.undurable_slice_count = 0
         self.current_slice_degraded = 0
         self.current_avail_slice_degraded = 0
 
-        # slice_index:[[failure time, recovery time],...]
-        self.unavailable_slice_durations = {}
+        # slice_index, failure time, recovery time
+        self.unavailable_intervals = IntervalStore(self.conf.keep_interval_records)
 
         # There is an anomaly (logical bug?) that is possible in the current
         # implementation:
@@ -138,16 +184,54 @@ class EventHandler(object):
         return True
 
     def durableCount(self, slice_index):
-        if isinstance(self.status[slice_index], int):
-            return self.status[slice_index]
+        if self.lost[slice_index]:
+            return self.lost_slice
         else:
-            return self.status[slice_index].count(1) + self.status[slice_index].count(0)
+            return int(self.durable_counts[slice_index])
 
     def availableCount(self, slice_index):
-        if isinstance(self.status[slice_index], int):
-            return self.status[slice_index]
+        if self.lost[slice_index]:
+            return self.lost_slice
         else:
-            return self.status[slice_index].count(1)
+            return int(self.avail_counts[slice_index])
+
+    def recountAll(self):
+        if self.sparse_state:
+            self.degraded_slices = IndexedSet(sorted(
+                set(self.status.slices().tolist()) |
+                set(flatnonzero(self.lost.toDense()).tolist())))
+            return
+        self.avail_counts[:] = count_nonzero(self.status == 1, axis=1)
+        self.durable_counts[:] = count_nonzero(self.status >= 0, axis=1)
+        self.degraded_slices = IndexedMask(
+            self.total_slices, flatnonzero(self.lost | (self.avail_counts < self.n)))
+
+    def checkCounters(self):
+        if self.sparse_state:
+            self.checkSparseState()
+            return
+        avails = count_nonzero(self.status == 1, axis=1)
+        durables = count_nonzero(self.status >= 0, axis=1)
+        wrong = flatnonzero(~self.lost & ((avails != self.avail_counts) |
+                                          (durables != self.durable_counts)))
+        if len(wrong) != 0:
+            raise Exception("slice counters do not match status for slices " +
+                            str(wrong[:10].tolist()))
+        degraded = flatnonzero(self.lost | (avails < self.n))
+        if len(degraded) != len(self.degraded_slices) or \
+                not all(slice_index in self.degraded_slices for slice_index in degraded.tolist()):
+            raise Exception("degraded slices do not match status!")
+
+    # every slice in the table is found again, its counters follow its word
+    def checkSparseState(self):
+        slices, words = self.status.getState()
+        if self.status.size != len(slices) or (words == 0).any() or \
+                (self.status.wordsOf(slices) != words).any():
+            raise Exception("sparse slice state table is broken!")
+        degraded = set(slices.tolist()) | set(flatnonzero(self.lost.toDense()).tolist())
+        if len(degraded) != len(self.degraded_slices) or \
+                not all(slice_index in self.degraded_slices for slice_index in degraded):
+            raise Exception("degraded slices do not match status!")
 
     def sliceRecovered(self, slice_index):
         if self.durableCount(slice_index) == self.n:
@@ -175,33 +259,206 @@ class EventHandler(object):
         if unavailable == 0:
             self.current_avail_slice_degraded += 1
 
+    # (available, lost) bitmasks of a slice for the DRS handler
+    def masks(self, slice_index):
+        if self.sparse_state:
+            return self.status.masks(slice_index)
+        state = self.status[slice_index]
+        return int((state == 1).dot(self.bit_values)), int((state < 0).dot(self.bit_values))
+
+    # chunks in the available mask after a repair but not before were repaired
+    def setRepaired(self, slice_index, available, lost, after):
+        repaired = after & ~available
+        if repaired == 0:
+            return
+        indexes = [i for i in xrange(self.n) if repaired >> i & 1]
+        self.status[slice_index, indexes] = 1
+        self.avail_counts[slice_index] += len(indexes)
+        self.durable_counts[slice_index] += bin(repaired & lost).count("1")
+        if self.avail_counts[slice_index] == self.n:
+            self.degraded_slices.remove(slice_index)
+
     def repair(self, slice_index, repaired_index):
-        rc = self.drs_handler.repair(self.status[slice_index], repaired_index)
+        available, lost = self.masks(slice_index)
+        rc, after = self.drs_handler.repairMasks(available, lost, repaired_index)
+        self.setRepaired(slice_index, available, lost, after)
         if rc < self.drs_handler.RC:
             self.total_optimal_repairs += 1
 
         return rc * self.conf.chunk_size
 
     def parallelRepair(self, slice_index, only_lost=False):
-        rc = self.drs_handler.parallRepair(self.status[slice_index], only_lost)
+        available, lost = self.masks(slice_index)
+        rc, after = self.drs_handler.parallRepairMasks(available, lost, only_lost)
+        self.setRepaired(slice_index, available, lost, after)
         return rc * self.conf.chunk_size
 
+    # parallelRepair of many slices, returns their repair transfers
+    def parallelRepairMany(self, slice_indexes, only_lost=False):
+        states = self.status[slice_indexes]
+        rcs = self.drs_handler.parallRepairMany(states, only_lost)
+        self.status[slice_indexes] = states
+        self.avail_counts[slice_indexes] = count_nonzero(states == 1, axis=1)
+        self.durable_counts[slice_indexes] = count_nonzero(states >= 0, axis=1)
+        self.degraded_slices.removeAll(
+            slice_indexes[self.avail_counts[slice_indexes] == self.n])
+        return rcs * self.conf.chunk_size
+
     def isRepairable(self, slice_index):
-        return self.drs_handler.isRepairable(self.status[slice_index])
+        if self.lost[slice_index]:
+            return False
+        if self.drs_handler.isMDS:
+            return self.avail_counts[slice_index] >= self.k
+        return self.drs_handler.isRepairableMasks(*self.masks(slice_index))
 
     # corresponding slice is lost or not.
     # True means lost, False means not lost
     def isLost(self, slice_index):
-        state = []
-
-        if isinstance(self.status[slice_index], int):
+        if self.lost[slice_index]:
             return True
-        for s in self.status[slice_index]:
-            if s == 1 or s == 0:
-                state.append(1)
-            else:
-                state.append(s)
-        return not self.drs_handler.isRepairable(state)
+        if self.drs_handler.isMDS:
+            return self.durable_counts[slice_index] < self.k
+        # unavailable chunks count as normal ones
+        lost = self.masks(slice_index)[1]
+        return not self.drs_handler.isRepairableMasks(self.full_mask & ~lost, 0)
+
+    # isRepairable of slices which are not lost, as a bool array
+    def repairableMask(self, slice_indexes):
+        avails = self.avail_counts[slice_indexes]
+        if self.drs_handler.isMDS:
+            return avails >= self.k
+        mask = avails >= self.n - self.tolerance
+        rows = flatnonzero(~mask)
+        if len(rows) != 0:
+            mask[rows] = self.drs_handler.isRepairableMany(self.status[slice_indexes[rows]])
+        return mask
+
+    # isLost of slices which are not flagged lost, as a bool array
+    def lostMask(self, slice_indexes):
+        durables = self.durable_counts[slice_indexes]
+        if self.drs_handler.isMDS:
+            return durables < self.k
+        mask = zeros(len(slice_indexes), dtype=bool)
+        rows = flatnonzero(durables < self.n - self.tolerance)
+        if len(rows) != 0:
+            # unavailable chunks count as normal ones
+            states = (self.status[slice_indexes[rows]] >= 0).astype(int8)
+            mask[rows] = ~self.drs_handler.isRepairableMany(states)
+        return mask
+
+    # unique(slice_indexes, return_inverse=True), through a mask over all
+    # slices when a batch has many of them, sorting them is slower then
+    def uniqueSlices(self, slice_indexes):
+        if len(slice_indexes)*16 < self.total_slices:
+            return unique(slice_indexes, return_inverse=True)
+        seen = zeros(self.total_slices, dtype=bool)
+        seen[slice_indexes] = True
+        slices = flatnonzero(seen)
+        positions = zeros(self.total_slices, dtype=int64)
+        positions[slices] = arange(len(slices))
+        return slices, positions[slice_indexes]
+
+    # All chunks on disks fail at once, permanently (lost) or temporarily
+    # (unavailable). A slice may have several chunks on the disks, it changes
+    # class (repairable, lost) at most once, so the transitions are the same
+    # as failing the chunks one by one.
+    # With lazy_latent_errors, the slices get their LSEs until recovery_time
+    # first.
+    def batchFailure(self, disks, time, permanent, cause, unit_id, queue=None,
+                     recovery_time=None):
+        current_total_slices = self.calCurrentTotalSlices(time)
+        slice_indexes, indexes = self.distributer.disksChunks(disks)
+        keep = slice_indexes < current_total_slices
+        slice_indexes, indexes = slice_indexes[keep], indexes[keep]
+        keep = ~self.lost[slice_indexes]
+        slice_indexes, indexes = slice_indexes[keep], indexes[keep]
+        if len(slice_indexes) == 0:
+            return
+        if self.lazy_latent is not None:
+            self.lazy_latent.degrade(self.uniqueSlices(slice_indexes)[0], time,
+                                     time if recovery_time is None else recovery_time, queue)
+            keep = ~self.lost[slice_indexes]
+            slice_indexes, indexes = slice_indexes[keep], indexes[keep]
+        slices, inverse = self.uniqueSlices(slice_indexes)
+
+        if permanent:
+            self.current_slice_degraded += count_nonzero(self.durable_counts[slices] == self.n)
+        if self.k != 1:
+            self.current_avail_slice_degraded += count_nonzero(self.avail_counts[slices] == self.n)
+        repairable_before = self.repairableMask(slices)
+
+        states = self.status[slice_indexes, indexes]
+        normal = states == 1
+        # chunks per slice counted with bincount, ufunc.at is much slower
+        if not self.sparse_state:
+            self.avail_counts[slices] -= bincount(inverse[normal], minlength=len(slices))
+            if permanent:
+                self.durable_counts[slices] -= bincount(inverse[states >= 0],
+                                                        minlength=len(slices))
+        if permanent:
+            self.status[slice_indexes, indexes] = -1
+        else:
+            self.status[slice_indexes[normal], indexes[normal]] = 0
+        self.degraded_slices.addAll(slices)
+
+        for slice_index in slices[repairable_before & ~self.repairableMask(slices)].tolist():
+            self.unavailable_slice_count += 1
+            self.unavailable_intervals.open(slice_index, time)
+
+        if permanent:
+            for slice_index in slices[self.lostMask(slices)].tolist():
+                info_logger.info(
+                    "time: " + str(time) + " slice:" + str(slice_index) +
+                    " durCount:" + str(self.durableCount(slice_index)) +
+                    " due to " + LossStore.CAUSES[cause] + " " + str(unit_id))
+                self.lost[slice_index] = True
+                self.undurable_slice_count += 1
+                self.undurable_slices.add(slice_index, time, cause, unit_id)
+
+    # Unavailable chunks on disks come back at once.
+    def batchRecoveryAvailability(self, disks, time, e):
+        current_total_slices = self.calCurrentTotalSlices(time)
+        slice_indexes, indexes = self.distributer.disksChunks(disks)
+        keep = slice_indexes < current_total_slices
+        slice_indexes, indexes = slice_indexes[keep], indexes[keep]
+
+        lost = self.lost[slice_indexes]
+        for slice_index in unique(slice_indexes[lost]).tolist():
+            self.unavailable_intervals.close(slice_index, time)
+        slice_indexes, indexes = slice_indexes[~lost], indexes[~lost]
+        if len(slice_indexes) == 0:
+            return
+
+        slices, inverse = self.uniqueSlices(slice_indexes)
+        degraded = self.avail_counts[slices] < self.n
+        unavailable = self.status[slice_indexes, indexes] == 0
+        returned = bincount(inverse[unavailable], minlength=len(slices))
+        if e.info == 1:
+            # the last unavailable chunk of every slice, in the order of the
+            # chunks, ufunc.at only for the few slices with several chunks
+            positions = flatnonzero(unavailable)
+            groups = inverse[positions]
+            several = (bincount(inverse, minlength=len(slices)) > 1)[groups]
+            last_unavailable = full(len(slices), -1, dtype=int64)
+            last_unavailable[groups[~several]] = positions[~several]
+            maximum.at(last_unavailable, groups[several], positions[several])
+        slices = slices[degraded]
+
+        repairable_before = self.repairableMask(slices)
+        self.status[slice_indexes[unavailable], indexes[unavailable]] = 1
+        if not self.sparse_state:
+            self.avail_counts[slices] += returned[degraded]
+        if e.info == 1:  # temp & short failure
+            # chunk by chunk, every chunk coming back after its slice is
+            # fully available again is an anomaly
+            anomalous = (self.avail_counts[slice_indexes] == self.n) & \
+                (arange(len(slice_indexes)) > last_unavailable[inverse])
+            self.anomalous_available_count += count_nonzero(anomalous)
+        if self.k != 1:
+            self.current_avail_slice_degraded -= count_nonzero(self.avail_counts[slices] == self.n)
+        self.degraded_slices.removeAll(slices[self.avail_counts[slices] == self.n])
+        for slice_index in slices[~repairable_before & self.repairableMask(slices)].tolist():
+            self.unavailable_intervals.close(slice_index, time)
 
     def avgTotalSlices(self):
         if not self.scaling:
@@ -224,11 +481,7 @@ class EventHandler(object):
             if item[-1]:
                 total_slices_durations += pow(item[1]-item[0], 2) * item[-1]/2
 
-        total_unavailable_durations = 0.0
-        slice_indexes = self.unavailable_durations.keys()
-        for slice_index in slice_indexes:
-            for duration in self.unavailable_durations[slice_index]:
-                total_unavailable_durations += duration[1] - duration[0]
+        total_unavailable_durations = self.unavailable_intervals.statistics(self.end_time)[3]
 
         return format(total_unavailable_durations/total_slices_durations, ".4e")
 
@@ -237,60 +490,27 @@ class EventHandler(object):
     # "merge_flag=False" means simultaneous multiple unavailable stripes will be
     # treated as multiple unavailable event.
     def processDuration(self, merge_flag):
-        TTFs = []
-        # failure timestamps
-        FTs = []
-        TTRs = []
-
-        unavail_slices = self.unavailable_slice_durations.keys()
-        if len(unavail_slices) == 0:
-            return [], []
-
-        for slice_index in unavail_slices:
-            for duration in self.unavailable_slice_durations[slice_index]:
-                if merge_flag and (duration[0] in FTs):
-                    continue
-                FTs.append(duration[0])
-                if len(duration) == 1:
-                    TTRs.append(self.end_time - duration[0])
-                else:
-                    TTRs.append(duration[1] - duration[0])
-
-<<<<<<< HEAD
-        FTs.sort()
-        TTFs.append(FTs[0])
-        for i in xrange(len(FTs)-1):
-            TTFs.append(FTs[i+1] - FTs[i])
-=======
-        unavailability = round(MTTR/(MTTR+MTTF), 5)
->>>>>>> 2fa16837469d31529bc4e75c8624f4dfaf48f046
-
-        return (TTFs, TTRs)
+        return self.unavailable_intervals.failureTimes(self.end_time, merge_flag)
 
     def calUndurableDetails(self):
-        lost_caused_by_LSE = 0
-        lost_caused_by_disk = 0
-        lost_caused_by_node = 0
-
-        disks_cause_lost = []
-        nodes_cause_lost = []
-
-        for slice_index, ts, info in self.undurable_slice_infos:
-            component, c_id = info.split(' ')
-            if component == "LSE":
-                lost_caused_by_LSE += 1
-            elif component == "disk":
-                lost_caused_by_disk += 1
-                if ts not in disks_cause_lost:
-                    disks_cause_lost.append(ts)
-            elif component == "machine":
-                lost_caused_by_node += 1
-                if ts not in nodes_cause_lost:
-                    nodes_cause_lost.append(ts)
-            else:
-                raise Exception("Incorrect component")
-
-        return (lost_caused_by_LSE, lost_caused_by_disk, lost_caused_by_node, len(disks_cause_lost), len(nodes_cause_lost))
+        return self.undurable_slices.details()
+
+    # the running statistics against the ones recomputed from the recorded
+    # intervals and losses, but the merged duration, which may take another
+    # interval of the same start time
+    def checkStatistics(self):
+        failure_times, TTF_sum, merged_duration, total_duration = \
+            self.unavailable_intervals.statistics(self.end_time)
+        expected = [failure_times, TTF_sum or 0.0, total_duration]
+        failure_times, last_failure_time, merged_duration, total_duration = \
+            self.unavailable_intervals.runningStatistics(self.end_time)
+        actual = [failure_times, last_failure_time or 0.0, total_duration]
+        for value, expected_value in zip(actual, expected):
+            if abs(value - expected_value) > 1E-9*max(1.0, abs(expected_value)):
+                raise Exception("running statistics " + str(actual) +
+                                " do not match the records " + str(expected))
+        if self.undurable_slices.details() != self.undurable_slices.recordDetails():
+            raise Exception("data loss counts do not match the records!")
 
     # normalized magnitude of data loss, bytes per TB in period of times
     def NOMDL(self, t=None):
@@ -298,9 +518,7 @@ class EventHandler(object):
         if t is None:
             undurable = self.undurable_slice_count
         else:
-            for slice_index, ts, info in self.undurable_slice_infos:
-                if ts <= t:
-                    undurable += 1
+            undurable = self.undurable_slices.countUntil(t)
 
         NOMDL = undurable * (self.conf.chunk_size * pow(2, 20)) / (self.conf.total_active_storage * pow(2, 10))
         return NOMDL
@@ -317,150 +535,60 @@ class EventHandler(object):
     def handleEvent(self, e, queue):
         if e.ignore:
             return
-        print "********event info********"
-        print "event ID: ", e.event_id
-        print "event type: ", e.getType()
-        print "event unit: ", e.getUnit().toString()
-        print "event Time: ", e.getTime()
-        print "event next reovery time: ", e.next_recovery_time
-
-        if e.getType() == Event.EventType.Failure:
-            self.handleFailure(e.getUnit(), e.getTime(), e, queue)
-        elif e.getType() == Event.EventType.Recovered:
-            self.handleRecovery(e.getUnit(), e.getTime(), e, queue)
-        elif e.getType() == Event.EventType.LatentDefect:
-            self.handleLatentDefect(e.getUnit(), e.getTime(), e)
-        elif e.getType() == Event.EventType.LatentRecovered:
-            self.handleLatentRecovered(e.getUnit(), e.getTime(), e)
-        elif e.getType() == Event.EventType.EagerRecoveryStart:
-            self.handleEagerRecoveryStart(e.getUnit(), e.getTime(), e, queue)
-        elif e.getType() == Event.EventType.EagerRecoveryInstallment:
-            self.handleEagerRecoveryInstallment(e.getUnit(), e.getTime(), e)
-        elif e.getType() == Event.EventType.UpgradeCheck:
-            self.handleUpgradeCheck(e.getUnit(), e.getTime(), e, queue)
-        else:
-            raise Exception("Unknown event: " + e.getType())
+        if self.trace.level != EventTrace.OFF:
+            self.trace.event(e)
+
+        if e.getType() not in self.handlers:
+            raise Exception("Unknown event: " + Event.EventType.toString(e.getType()))
+        self.handlers[e.getType()](e.getUnit(), e.getTime(), e, queue)
+        if self.check_counters:
+            self.checkCounters()
 
     def handleFailure(self, u, time, e, queue):
         if e.ignore:
             return
 
-        current_total_slices = self.calCurrentTotalSlices(time)
         if isinstance(u, Machine):
-            self.total_machine_failures += 1
-            u.setLastFailureTime(e.getTime())
-
-            if e.info == 3:
-                self.total_perm_machine_failures += 1
-            else:
-                if e.info == 1:
-                    self.total_short_temp_machine_failures += 1
-                elif e.info == 2:
-                    self.total_long_temp_machine_failures += 1
-                else:
-                    self.total_machine_failures_due_to_rack_failures += 1
-                    if e.next_recovery_time - e.getTime() <= u.fail_timeout:
-                        self.total_short_temp_machine_failures += 1
-                    else:
-                        self.total_long_temp_machine_failures += 1
-
-            disks = u.getChildren()
-            for child in disks:
-                slice_indexes = child.getChildren()
-                for slice_index in slice_indexes:
-                    if slice_index >= current_total_slices:
-                        continue
-                    if self.status[slice_index] == self.lost_slice:
-                        continue
-
-                    if e.info == 3:
-                        self.sliceDegraded(slice_index)
-                    else:
-                        self.sliceDegradedAvailability(slice_index)
-
-                    repairable_before = self.isRepairable(slice_index)
-                    index = self.slice_locations[slice_index].index(child)
-                    if self.status[slice_index][index] == -1:
-                        continue
-                    if e.info == 3:
-                        self.status[slice_index][index] = -1
-                        self._my_assert(self.durableCount(slice_index) >= 0)
-                    else:
-                        if self.status[slice_index][index] == 1:
-                            self.status[slice_index][index] = 0
-                        self._my_assert(self.availableCount(slice_index) >= 0)
-
-                    repairable_current = self.isRepairable(slice_index)
-                    if repairable_before and not repairable_current:
-                        self.unavailable_slice_count += 1
-                        if slice_index in self.unavailable_slice_durations.keys():
-                            self.unavailable_slice_durations[slice_index].append([time])
-                        else:
-                            self.unavailable_slice_durations[slice_index] = [[time]]
-                        # if one machine failure causes multiple stripes unavailable, or
-                        # correlated failures like upgrades result multiple stripes unavailable,
-                        # many TTF=0 will be inserted into self.TTFs, decrease MTTF and MTBF
-                        # self.current_unavailable_slices[slice_index] = time
-                        # self.TTFs.append(time-self.last_failure_ts)
-                        # self.last_failure_ts = time
-
-                    if e.info == 3:
-                        # lost stripes have been recorded in TTFs.
-                        if self.isLost(slice_index):
-                            info_logger.info(
-                                "time: " + str(time) + " slice:" + str(slice_index) +
-                                " durCount:" + str(self.durableCount(slice_index)) +
-                                " due to machine " + str(u.getID()))
-                            self.status[slice_index] = self.lost_slice
-                            self.undurable_slice_count += 1
-                            self.undurable_slice_infos.append((slice_index, time, "machine "+ str(u.getID())))
-                            continue
+            self.countMachineFailure(u, e)
+            self.batchFailure(u.getChildren(), time, e.info == 3, LossStore.MACHINE, u.getID(),
+                              queue, e.next_recovery_time)
 
         elif isinstance(u, Disk):
             self.total_disk_failures += 1
             u.setLastFailureTime(e.getTime())
-            # need to compute projected reovery b/w needed
-            projected_bandwidth_need = 0.0
-
-            slice_indexes = u.getChildren()
-            for slice_index in slice_indexes:
-                if slice_index >= current_total_slices:
-                    continue
-                if self.status[slice_index] == self.lost_slice:
-                    continue
-
-                self.sliceDegraded(slice_index)
-                repairable_before = self.isRepairable(slice_index)
+            self.batchFailure([u], time, True, LossStore.DISK, u.getID(), queue,
+                              e.next_recovery_time)
 
-                index = self.slice_locations[slice_index].index(u)
-                if self.status[slice_index][index] == -1:
-                    continue
-                self.status[slice_index][index] = -1
-
-                self._my_assert(self.durableCount(slice_index) >= 0)
-
-                repairable_current = self.isRepairable(slice_index)
-                if repairable_before and not repairable_current:
-                    self.unavailable_slice_count += 1
-                    if slice_index in self.unavailable_slice_durations.keys():
-                        self.unavailable_slice_durations[slice_index].append([time])
-                    else:
-                        self.unavailable_slice_durations[slice_index] = [[time]]
-
-                if self.isLost(slice_index):
-                    info_logger.info(
-                        "time: " + str(time) + " slice:" + str(slice_index) +
-                        " durCount:" + str(self.durableCount(slice_index)) +
-                        " due to disk " + str(u.getID()))
-                    self.status[slice_index] = self.lost_slice
-                    self.undurable_slice_count += 1
-                    self.undurable_slice_infos.append((slice_index, time, "disk "+ str(u.getID())))
-                    continue
+        elif isinstance(u, Rack) and e.info != 3:
+            # temporary failure of all machines in the rack
+            disks = []
+            for machine in u.getChildren():
+                self.countMachineFailure(machine, e)
+                disks += machine.getChildren()
+            self.batchFailure(disks, time, False, None, None, queue, e.next_recovery_time)
 
         else:
             for child in u.getChildren():
                 self.handleFailure(child, time, e, queue)
 
+    def countMachineFailure(self, u, e):
+        self.total_machine_failures += 1
+        u.setLastFailureTime(e.getTime())
+
+        if e.info == 3:
+            self.total_perm_machine_failures += 1
+        else:
+            if e.info == 1:
+                self.total_short_temp_machine_failures += 1
+            elif e.info == 2:
+                self.total_long_temp_machine_failures += 1
+            else:
+                self.total_machine_failures_due_to_rack_failures += 1
+                if e.next_recovery_time - e.getTime() <= u.fail_timeout:
+                    self.total_short_temp_machine_failures += 1
+                else:
+                    self.total_long_temp_machine_failures += 1
+
     def handleRecovery(self, u, time, e, queue):
         if e.ignore:
             return
@@ -472,42 +600,17 @@ class EventHandler(object):
             # The temporary machine failures is simulated here, while the
             # permanent machine failure is simulated in disk recoveries
             if e.info != 3 and e.info != 4:
-                disks = u.getChildren()
-                for child in disks:
-                    slice_indexes = child.getChildren()
-                    for slice_index in slice_indexes:
-                        if slice_index >= current_total_slices:
-                            continue
-                        if self.status[slice_index] == self.lost_slice:
-                            if slice_index in self.unavailable_slice_durations.keys() and \
-                                len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                                self.unavailable_slice_durations[slice_index][-1].append(time)
-                            continue
-
-                        if self.availableCount(slice_index) < self.n:
-                            repairable_before = self.isRepairable(slice_index)
-                            index = self.slice_locations[slice_index].index(child)
-                            if self.status[slice_index][index] == 0:
-                                self.status[slice_index][index] = 1
-                            self.sliceRecoveredAvailability(slice_index)
-                            if not repairable_before and self.isRepairable(slice_index):
-                                self.unavailable_slice_durations[slice_index][-1].append(time)
-                        elif e.info == 1:  # temp & short failure
-                            self.anomalous_available_count += 1
-                        else:
-                            pass
+                self.batchRecoveryAvailability(u.getChildren(), time, e)
             elif e.info == 4 or self.conf.queue_disable:  # permanent node failure without queue time
                 transfer_required = 0.0
                 disks = u.getChildren()
                 for disk in disks:
-                    indexes = disk.getChildren()
-                    for slice_index in indexes:
+                    slice_indexes, indexes = self.distributer.diskChunks(disk)
+                    for slice_index, index in zip(slice_indexes, indexes):
                         if slice_index >= current_total_slices:
                             continue
-                        if self.status[slice_index] == self.lost_slice:
-                            if slice_index in self.unavailable_slice_durations.keys() and \
-                                len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                                self.unavailable_slice_durations[slice_index][-1].append(time)
+                        if self.lost[slice_index]:
+                            self.unavailable_intervals.close(slice_index, time)
                             continue
                         if not self.isRepairable(slice_index):
                             continue
@@ -527,8 +630,7 @@ class EventHandler(object):
                                 threshold_crossed = True
 
                         if threshold_crossed:
-                            index = self.slice_locations[slice_index].index(disk)
-                            if self.status[slice_index][index] == -1 or self.status[slice_index][index] == -2:
+                            if self.status[slice_index, index] == -1 or self.status[slice_index, index] == -2:
                                 if self.lazy_recovery or self.parallel_repair:
                                     rc = self.parallelRepair(slice_index)
                                 else:
@@ -565,25 +667,23 @@ class EventHandler(object):
                     num = self.conf.drs_handler.d
                 else:
                     num = self.conf.drs_handler.k
-                print "disk contention model start"
                 recovery_time = self.contention_model.occupy(disk_repair_start, chosen_racks, num, disk_repair_time)
-                print "original recovery time for disk:", time
-                print "recovery time for disk:", recovery_time
+                self.trace.contention(u, time, recovery_time)
                 recovery_event = Event(Event.EventType.Recovered, recovery_time, u, 4)
                 queue.addEvent(recovery_event)
                 return
 
             self.total_disk_repairs += 1
+            if self.lazy_latent is not None:
+                self.lazy_latent.diskRecovered(u, time)
 
             transfer_required = 0.0
-            slice_indexes = u.getChildren()
-            for slice_index in slice_indexes:
+            slice_indexes, indexes = self.distributer.diskChunks(u)
+            for slice_index, index in zip(slice_indexes, indexes):
                 if slice_index >= current_total_slices:
                     continue
-                if self.status[slice_index] == self.lost_slice:
-                    if slice_index in self.unavailable_slice_durations.keys() and \
-                        len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                        self.unavailable_slice_durations[slice_index][-1].append(time)
+                if self.lost[slice_index]:
+                    self.unavailable_intervals.close(slice_index, time)
                     continue
                 if not self.isRepairable(slice_index):
                     continue
@@ -603,8 +703,7 @@ class EventHandler(object):
                         threshold_crossed = True
 
                 if threshold_crossed:
-                    index = self.slice_locations[slice_index].index(u)
-                    if self.status[slice_index][index] == -1 or self.status[slice_index][index] == -2:
+                    if self.status[slice_index, index] == -1 or self.status[slice_index, index] == -2:
 
                         if self.lazy_recovery or self.parallel_repair:
                             rc = self.parallelRepair(slice_index)
@@ -619,6 +718,14 @@ class EventHandler(object):
                     # must come after all counters are updated
                     self.sliceRecovered(slice_index)
 
+        elif isinstance(u, Rack) and e.info != 3 and e.info != 4:
+            # temporary failure of all machines in the rack is over
+            disks = []
+            for machine in u.getChildren():
+                self.total_machine_repairs += 1
+                disks += machine.getChildren()
+            self.batchRecoveryAvailability(disks, time, e)
+
         else:
             for child in u.getChildren():
                 self.handleRecovery(child, time, e, queue)
@@ -635,51 +742,58 @@ class EventHandler(object):
             slice_index = choice(u.getChildren())
             if slice_index >= current_total_slices:
                 return
-
-            if self.status[slice_index] == self.lost_slice:
-                self.total_skipped_latent += 1
-                return
-
-            repairable_before = self.isRepairable(slice_index)
-
-            index = self.slice_locations[slice_index].index(u)
-            # A LSE cannot hit lost blocks or a same block multiple times
-            if self.status[slice_index][index] == -1 or self.status[slice_index][index] == -2:
-                self.total_skipped_latent += 1
-                return
-
-            self._my_assert(self.durableCount(slice_index) >= 0)
-            self.sliceDegraded(slice_index)
-
-            self.status[slice_index][index] = -2
-            u.slices_hit_by_LSE.append(slice_index)
-            self.total_latent_failures += 1
-
-            repairable_current = self.isRepairable(slice_index)
-            if repairable_before and not repairable_current:
-                self.unavailable_slice_count += 1
-                if slice_index in self.unavailable_slice_durations.keys():
-                    self.unavailable_slice_durations[slice_index].append([time])
-                else:
-                    self.unavailable_slice_durations[slice_index] = [[time]]
-                # self.current_unavailable_slices[slice_index] = time
-                # self.TTFs.append(time-self.last_failure_ts)
-                # self.last_failure_ts = time
-                # self.unavailable_durations.append((time, e.next_recovery_time))
-
-            if self.isLost(slice_index):
-                info_logger.info(
-                    str(time) + " slice: " + str(slice_index) +
-                    " durCount: " + str(self.durableCount(slice_index)) +
-                    " latDefect " + str(True) +
-                    "  due to ===latent=== error " + " on disk " +
-                    str(u.getID()))
-                self.undurable_slice_count += 1
-                self.undurable_slice_infos.append((slice_index, time, "LSE "+ str(u.getID())))
-                self.status[slice_index] = self.lost_slice
+            self.latentDefect(u, slice_index, None, time)
         else:
             raise Exception("Latent defect should only happen for disk")
 
+    # An LSE on the chunk of slice_index on disk u (at index, looked up if
+    # None), False if it cannot hit it.
+    def latentDefect(self, u, slice_index, index, time):
+        if self.lost[slice_index]:
+            self.total_skipped_latent += 1
+            return False
+
+        repairable_before = self.isRepairable(slice_index)
+
+        if index is None:
+            index = self.distributer.chunkPosition(slice_index, u)
+        # A LSE cannot hit lost blocks or a same block multiple times
+        if self.status[slice_index, index] == -1 or self.status[slice_index, index] == -2:
+            self.total_skipped_latent += 1
+            return False
+
+        self._my_assert(self.durableCount(slice_index) >= 0)
+        self.sliceDegraded(slice_index)
+
+        if self.status[slice_index, index] == 1:
+            self.avail_counts[slice_index] -= 1
+        self.durable_counts[slice_index] -= 1
+        self.status[slice_index, index] = -2
+        self.degraded_slices.add(slice_index)
+        u.slices_hit_by_LSE.append(slice_index)
+        self.total_latent_failures += 1
+
+        repairable_current = self.isRepairable(slice_index)
+        if repairable_before and not repairable_current:
+            self.unavailable_slice_count += 1
+            self.unavailable_intervals.open(slice_index, time)
+            # self.current_unavailable_slices[slice_index] = time
+            # self.TTFs.append(time-self.last_failure_ts)
+            # self.last_failure_ts = time
+            # self.unavailable_durations.append((time, e.next_recovery_time))
+
+        if self.isLost(slice_index):
+            info_logger.info(
+                str(time) + " slice: " + str(slice_index) +
+                " durCount: " + str(self.durableCount(slice_index)) +
+                " latDefect " + str(True) +
+                "  due to ===latent=== error " + " on disk " +
+                str(u.getID()))
+            self.undurable_slice_count += 1
+            self.undurable_slices.add(slice_index, time, LossStore.LSE, u.getID())
+            self.lost[slice_index] = True
+        return True
+
     def handleLatentRecovered(self, u, time, e):
         transfer_required = 0.0
         current_total_slices = self.calCurrentTotalSlices(time)
@@ -690,17 +804,15 @@ class EventHandler(object):
             for slice_index in slice_indexes:
                 if slice_index >= current_total_slices:
                     continue
-                if self.status[slice_index] == self.lost_slice:
-                    if slice_index in self.unavailable_slice_durations.keys() and \
-                        len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                        self.unavailable_slice_durations[slice_index][-1].append(time)
+                if self.lost[slice_index]:
+                    self.unavailable_intervals.close(slice_index, time)
                     continue
 
                 if not self.isRepairable(slice_index):
                     continue
 
-                index = self.slice_locations[slice_index].index(u)
-                if self.status[slice_index][index] != -2:
+                index = self.distributer.chunkPosition(slice_index, u)
+                if self.status[slice_index, index] != -2:
                     continue
                 self.total_scrub_repairs += 1
                 rc = self.repair(slice_index, index)
@@ -722,23 +834,20 @@ class EventHandler(object):
                 raise Exception("Check instance is not Machine instance")
             diskes = u.getChildren()
             for disk in diskes:
-                slice_indexes = disk.getChildren()
-                for slice_index in slice_indexes:
+                slice_indexes, indexes = self.distributer.diskChunks(disk)
+                for slice_index, index in zip(slice_indexes, indexes):
                     if slice_index > current_total_slices:
                         continue
-                    if self.status[slice_index] == self.lost_slice:
-                        if slice_index in self.unavailable_slice_durations.keys() and \
-                            len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                            self.unavailable_slice_durations[slice_index][-1].append(time)
+                    if self.lost[slice_index]:
+                        self.unavailable_intervals.close(slice_index, time)
                         continue
 
                     threshold_crossed = False
                     rc = 0.0
-                    index = self.slice_locations[slice_index].index(disk)
                     if self.isRepairable(slice_index):
-                        if self.status[slice_index][index] == -1 or self.status[slice_index][index] == -2:
+                        if self.status[slice_index, index] == -1 or self.status[slice_index, index] == -2:
                             threshold_crossed = True
-                        if e.info == 2 and self.status[slice_index][index] == 0:
+                        if e.info == 2 and self.status[slice_index, index] == 0:
                             threshold_crossed = True
                     if threshold_crossed:
                         rc = self.repair(slice_index, index)
@@ -757,10 +866,8 @@ class EventHandler(object):
                 for slice_index in slice_indexes:
                     if slice_index > current_total_slices:
                         continue
-                    if self.status[slice_index] == self.lost_slice:
-                        if slice_index in self.unavailable_slice_durations.keys() and \
-                            len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                            self.unavailable_slice_durations[slice_index][-1].append(time)
+                    if self.lost[slice_index]:
+                        self.unavailable_intervals.close(slice_index, time)
                         continue
 
                     threshold_crossed = False
@@ -782,29 +889,27 @@ class EventHandler(object):
         # 5: check and repair all lost slices
         # 6: check and repair all unavailable and lost slices
         elif e.info == 5 or e.info == 6:
-            for slice_index, state in enumerate(self.status):
-                if slice_index > current_total_slices:
-                    continue
-                if state == self.lost_slice:
-                    if slice_index in self.unavailable_slice_durations.keys() and \
-                        len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                        self.unavailable_slice_durations[slice_index][-1].append(time)
-                    continue
-
-                threshold_crossed = False
-                rc = 0.0
-                if self.isRepairable(slice_index):
-                    if e.info == 5 and self.durableCount(slice_index) < self.n:
-                        threshold_crossed = True
-                    if e.info == 6 and self.availableCount(slice_index) < self.n:
-                        threshold_crossed = True
-                if threshold_crossed:
-                    if e.info == 5:
-                        rc = self.parallelRepair(slice_index, True)
-                    else:
-                        rc = self.parallelRepair(slice_index)
+            # only degraded slices can need a repair
+            slice_indexes = self.degraded_slices.toArray()
+            slice_indexes.sort()
+            slice_indexes = slice_indexes[slice_indexes <= current_total_slices]
+            for slice_index in slice_indexes[self.lost[slice_indexes]].tolist():
+                self.unavailable_intervals.close(slice_index, time)
+            slice_indexes = slice_indexes[~self.lost[slice_indexes]]
+
+            if e.info == 5:
+                slice_indexes = slice_indexes[self.durable_counts[slice_indexes] < self.n]
+            else:
+                slice_indexes = slice_indexes[self.avail_counts[slice_indexes] < self.n]
+            slice_indexes = slice_indexes[self.repairableMask(slice_indexes)]
+            if len(slice_indexes) != 0:
+                for rc in self.parallelRepairMany(slice_indexes, e.info == 5).tolist():
                     self.total_repair_transfers += rc
-                    self.sliceRecovered(slice_index)
+                # sliceRecovered of all repaired slices
+                self.current_slice_degraded -= count_nonzero(self.durable_counts[slice_indexes] == self.n)
+                if self.k != 1:
+                    self.current_avail_slice_degraded -= \
+                        count_nonzero(self.avail_counts[slice_indexes] == self.n)
             disks = []
             self.distributer.getAllDisks(u, disks)
             for rack_disks in disks:
@@ -816,61 +921,67 @@ class EventHandler(object):
                     regenerate_end_ts = self.conf.upgrade_ts[index+1]
                 else:
                     regenerate_end_ts = self.conf.total_time
-                timestamps = queue.events.keys()
-                timestamps.sort()
-                for ts in timestamps:
-                    if ts > time:
-                        ts_events = queue.events.get(ts)
-                        for e in ts_events:
-                            if isinstance(e.getUnit(), Disk):
-                                queue.events.get(ts).remove(e)
-                                if queue.events.get(ts) == []:
-                                    queue.events.pop(ts)
                 for rack_disks in disks:
                     for disk in rack_disks:
+                        # events up to now are still to be handled
+                        disk.cancelEvents(time)
+                        # every disk gets its own copy, lazy generation
+                        # interleaves the disks.
                         if self.conf.failure_generator is not None:
-                            disk.failure_generator = self.conf.failure_generator
+                            disk.failure_generator = deepcopy(self.conf.failure_generator)
                         disk.failure_generator.reset(time)
                         disk.last_recovery_time = time
                         if self.conf.lse_generator is not None:
-                            disk.latent_error_generator = self.conf.lse_generator
+                            disk.latent_error_generator = deepcopy(self.conf.lse_generator)
                         disk.latent_error_generator.reset(time)
                         disk.generateEvents(queue, time+1E-5, regenerate_end_ts, True)
         else:
             raise Exception("Incorrect upgrade check style")
 
     def end(self):
+        self.trace.close()
         ret = Result()
         avg_total_slices = self.avgTotalSlices()
 
         Result.undurable_count = self.undurable_slice_count
         Result.unavailable_count = self.unavailable_slice_count
-        # Result.undurable_infos = self.undurable_slice_infos
+        # Result.undurable_infos = self.undurable_slices.toList()
         Result.undurable_count_details = self.calUndurableDetails()
-        Result.unavailable_slice_durations = self.unavailable_slice_durations
+        if self.conf.keep_interval_records:
+            Result.unavailable_slice_durations = self.unavailable_intervals.toDict()
+        else:
+            Result.unavailable_slice_durations = {}
 
         Result.PDL = format(float(self.undurable_slice_count)/avg_total_slices, ".4e")
         Result.NOMDL = self.NOMDL()
 
         # unavailability from system perspective
-        TTFs, TTRs = self.processDuration(True)
-        if len(TTFs) == 0 or len(TTRs) == 0:
+        failure_times, TTF_sum, merged_duration, total_duration = \
+            self.unavailable_intervals.statistics(self.end_time)
+        if failure_times == 0:
             Result.MTTR = 0.0
             Result.MTBF = self.end_time
             Result.PUA = 0.0
         else:
-            MTTF = sum(TTFs)/len(TTFs)
-            MTTR = sum(TTRs)/len(TTRs)
+            MTTF = TTF_sum/failure_times
+            MTTR = merged_duration/failure_times
             Result.MTTR = round(MTTR, 4)
             Result.MTBF = round(MTTR + MTTF, 4)
             Result.PUA = format(MTTR/(MTTF+MTTR), ".4e")
         # unavailability from stripe perspective
-        TTFs, TTRs = self.processDuration(False)
-        Result.PUS = format(sum(TTRs)/(self.end_time * avg_total_slices), ".4e")
+        Result.PUS = format(total_duration/(self.end_time * avg_total_slices), ".4e")
+        if self.check_counters and self.conf.keep_interval_records:
+            self.checkStatistics()
 
         # repair bandwidth in TiBs
         Result.TRT = format(float(self.total_repair_transfers)/pow(2,20), ".4e")
 
+        if self.lazy_latent is not None:
+            disks = []
+            self.distributer.getAllDisks(self.distributer.getRoot(), disks)
+            self.total_latent_failures, self.total_scrubs, self.total_scrub_repairs = \
+                self.lazy_latent.expectedCounts(sum(disks, []))
+
         if not self.queue_disable:
             queue_times, avg_queue_time = self.contention_model.statistics()
             Result.queue_times = queue_times
@@ -969,7 +1080,7 @@ class EventHandler(object):
                 # it as an anomaly
                 if self.availableCount(slice_index) >= self.n:
                     self.anomalous_available_count += 1
-                if self.status[slice_index] == self.lost_slice:
+                if self.lost[slice_index]:
                     continue
 
                 threshold_crossed = False
@@ -988,7 +1099,7 @@ class EventHandler(object):
                         threshold_crossed = True
 
                 if threshold_crossed:
-                    num_unavailable = self.status[slice_index].count(0)
+                    num_unavailable = int(self.durable_counts[slice_index] - self.avail_counts[slice_index])
                     slice_installment.slices.append(slice_index)
                     total_num_chunks_added_for_repair += self.k + \
                         num_unavailable - 1
@@ -1052,10 +1163,8 @@ class EventHandler(object):
 
             for slice_index in u.slices:
                 # slice_index = s.intValue()
-                if self.status[slice_index] == self.lost_slice:
-                    if slice_index in self.unavailable_slice_durations.keys() and \
-                        len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                        self.unavailable_slice_durations[slice_index][-1].append(time)
+                if self.lost[slice_index]:
+                    self.unavailable_intervals.close(slice_index, time)
                     continue
 
                 threshold_crossed = False
@@ -1073,7 +1182,7 @@ class EventHandler(object):
 
                 if threshold_crossed:
                     if self.isLost(slice_index):
-                        self.status[slice_index] = self.lost_slice
+                        self.lost[slice_index] = True
                         continue
                     if not self.isRepairable(slice_index):
                         continue
@@ -1093,7 +1202,7 @@ class EventHandler(object):
                     else:
                         if self.availableCount(slice_index) < self.n:
                             try:
-                                index = self.status[slice_index].index(0)
+                                index = self.status[slice_index].tolist().index(0)
                             except ValueError:
                                 error_logger.error("No block crash in slice " + str(slice_index))
                                 continue
@@ -1107,10 +1216,8 @@ class EventHandler(object):
             u.setLastFailureTime(e.getTime())
 
     def handleSliceRecovery(self, slice_index, e, is_durable_failure):
-        if self.status[slice_index] == self.lost_slice:
-            if slice_index in self.unavailable_slice_durations.keys() and \
-                len(self.unavailable_slice_durations[slice_index][-1]) == 1:
-                self.unavailable_slice_durations[slice_index][-1].append(e.getTime())
+        if self.lost[slice_index]:
+            self.unavailable_intervals.close(slice_index, e.getTime())
             return 0
 
         recovered = 0
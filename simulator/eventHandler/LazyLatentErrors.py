@@ -0,0 +1,108 @@
+from numpy import array, zeros, cumsum, searchsorted, minimum, maximum, exp, floor, \
+    float32, float64
+from numpy.random import random_sample, poisson
+
+from simulator.Event import Event
+from simulator.unit.DiskWithScrubbing import latentParameters
+
+
+class LazyLatentErrors(object):
+    """
+    LSEs of lazy_latent_errors, drawn by the event handler only for slices
+    a failure degrades, the only ones an LSE can make unavailable or lost.
+    An LSE hits a chunk of its disk chosen uniformly, so the LSEs of a chunk
+    are a Poisson process of the disk's LSE rate over its chunk count, and
+    an LSE stays until the scrub after it. Every slice has a time its LSEs
+    are drawn up to, when a failure degrades it at time t until recovery
+    time r:
+      - the LSEs its chunks still have at t, got since that time, the last
+        scrub and the last recovery of their disk, are drawn at once, a
+        chunk has one with probability 1 - exp(-rate*exposure),
+      - the LSEs arriving on its chunks until r are queued as LatentDefect
+        events with the slice and chunk as attributes,
+    and its LSEs are drawn up to r. An LSE queues a LatentRecovered event of
+    its disk at its scrub, as generateLatentErrors does. The LSE counters are
+    the expected numbers of the events eager generation would have queued
+    (expected_latent_errors and expected_scrubs of DiskWithScrubbing), LSEs
+    skipped on lost slices or chunks are not taken off.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.distributer = handler.distributer
+        self.n = handler.n
+        # per disk row of the distributer's chunk index, the LSE rate of a
+        # chunk, the scrub period and the last disk recovery
+        self.disks, counts = self.distributer.rowDisks()
+        parameters = array([latentParameters(disk.latent_error_generator, disk.scrub_generator)
+                            for disk in self.disks],
+                           dtype=float64).reshape(-1, 2)
+        self.rates = parameters[:, 0]/counts
+        self.periods = parameters[:, 1]
+        self.recovery_times = zeros(len(self.disks), dtype=float64)
+        self.rows = dict((disk.getID(), row) for row, disk in enumerate(self.disks))
+        # per slice, the time its LSEs are drawn up to, in float32 to the
+        # second or so
+        self.drawn_times = zeros(handler.total_slices, dtype=float32)
+
+    def diskRecovered(self, disk, time):
+        row = self.rows.get(disk.getID())
+        if row is not None:
+            self.recovery_times[row] = time
+
+    # a LatentDefect of the handler on the chunk of a disk row, scrubbed at
+    # the disk's next scrub
+    def _latentError(self, slice_index, index, row, time, queue):
+        disk = self.disks[row]
+        if not self.handler.latentDefect(disk, slice_index, index, time):
+            return
+        scrub_time = disk.scrub_generator.generateNextEvent(time)
+        if scrub_time < self.handler.end_time:
+            queue.addEvent(Event(Event.EventType.LatentRecovered, scrub_time, disk))
+
+    # the LSEs of slices about to be degraded at time until recovery_time
+    def degrade(self, slice_indexes, time, recovery_time, queue):
+        if len(slice_indexes) == 0:
+            return
+        rows = self.distributer.slicesDiskRows(slice_indexes)
+        rates = self.rates[rows]
+        drawn_times = self.drawn_times[slice_indexes].astype(float64)
+        periods = self.periods[rows]
+        exposures = time - maximum(maximum(self.recovery_times[rows], floor(time/periods)*periods),
+                                   drawn_times[:, None])
+        hits = random_sample(rows.shape) < 1 - exp(-rates*maximum(exposures, 0))
+        for i, index in zip(*[hit.tolist() for hit in hits.nonzero()]):
+            self._latentError(int(slice_indexes[i]), index, rows[i, index], time, queue)
+
+        starts = maximum(drawn_times, time)
+        lengths = maximum(recovery_time - starts, 0)
+        self.drawn_times[slice_indexes] = starts + lengths
+        weights = cumsum((rates*lengths[:, None]).ravel())
+        count = poisson(weights[-1])
+        if count == 0:
+            return
+        chunks = minimum(searchsorted(weights, random_sample(count)*weights[-1], side="right"),
+                         len(weights) - 1)
+        slices, indexes = chunks//self.n, chunks % self.n
+        arrivals = starts[slices] + random_sample(count)*lengths[slices]
+        for i, index, arrival in zip(slices.tolist(), indexes.tolist(), arrivals.tolist()):
+            e = Event(Event.EventType.LatentDefect, arrival, self.disks[rows[i, index]])
+            e.setAttributes("slice", int(slice_indexes[i]))
+            e.setAttributes("index", index)
+            queue.addEvent(e)
+
+    # a queued LatentDefect, none while the chunk's machine is down as no
+    # LSEs are generated then
+    def arrival(self, e, time, queue):
+        if self.handler.status[e.getAttributes("slice"), e.getAttributes("index")] == 0:
+            return
+        self._latentError(e.getAttributes("slice"), e.getAttributes("index"),
+                          self.rows[e.getUnit().getID()], time, queue)
+
+    # (total latent failures, total scrubs, total scrub repairs) eager
+    # generation would count, in expectation
+    def expectedCounts(self, all_disks):
+        latent_errors = sum(disk.expected_latent_errors for disk in self.disks)
+        scrub_repairs = sum(disk.expected_scrubs for disk in self.disks)
+        scrubs = sum(disk.expected_scrubs for disk in all_disks)
+        return latent_errors, scrubs, scrub_repairs
@@ -1,3 +1,5 @@
+from numpy import asarray, where, float64
+
 from simulator.failure.EventGenerator import EventGenerator
 
 
@@ -23,3 +25,10 @@ class Constant(EventGenerator):
             return self.previous_event
 
         return self.previous_event + self.frequency
+
+    def generateNextEvents(self, current_times, start_times=None):
+        current_times = asarray(current_times, dtype=float64)
+        if start_times is None:
+            start_times = self.previous_event
+        next_events = start_times + self.frequency
+        return where(next_events < current_times, current_times, next_events)
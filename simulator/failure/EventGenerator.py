@@ -1,8 +1,13 @@
+import random
 from abc import ABCMeta, abstractmethod
+from numpy import zeros
 
 
 class EventGenerator:
     __metaclass__ = ABCMeta
+    # where generateNextEvent draws from, the random module or the stream of
+    # the unit being generated (see Unit.nextCycle)
+    stream = random
 
     @abstractmethod
     def __init__(self, name, parameters):
@@ -12,6 +17,17 @@ class EventGenerator:
     def generateNextEvent(self, current_time):
         raise NotImplementedError
 
+    # generateNextEvent for every time of current_times at once, drawn from
+    # start_times (the start time of the generator by default) as from a
+    # reset at them. The generator itself is not changed.
+    @abstractmethod
+    def generateNextEvents(self, current_times, start_times=None):
+        raise NotImplementedError
+
+    # size times to the next event after a reset at time 0
+    def sample(self, size):
+        return self.generateNextEvents(zeros(size), zeros(size))
+
     @abstractmethod
     def reset(self, current_time):
         raise NotImplementedError
@@ -23,3 +39,10 @@ class EventGenerator:
     @abstractmethod
     def getCurrentTime(self):
         raise NotImplementedError
+
+    # Everything reset() and generateNextEvent() change, for checkpoints.
+    def getState(self):
+        return dict(self.__dict__)
+
+    def setState(self, state):
+        self.__dict__.update(state)
@@ -1,3 +1,4 @@
+from numpy import asarray, concatenate, zeros, where, float64
 from numpy.random import randn
 
 from simulator.failure.EventGenerator import EventGenerator
@@ -28,7 +29,7 @@ class GaussianGenerator(EventGenerator):
 
         next_val = 0.0
         while next_val < self.minval:
-            next_val = randn()*self.stddev + self.mean
+            next_val = EventGenerator.stream.gauss(self.mean, self.stddev)
 
         if next_val < 0:
             raise Exception("Negative value generated!")
@@ -39,6 +40,29 @@ class GaussianGenerator(EventGenerator):
 
         return self.start_time + next_val
 
+    # size values of generateNextEvent, the normal draws under minval are
+    # dropped in the order they come, as its loop does
+    def values(self, size):
+        if self.minval <= 0:
+            # the loop of generateNextEvent draws nothing then
+            return zeros(size)
+        values = zeros(0)
+        while len(values) < size:
+            draws = randn(size - len(values))*self.stddev + self.mean
+            values = concatenate((values, draws[draws >= self.minval]))
+        if (values < 0).any():
+            raise Exception("Negative value generated!")
+        return values
+
+    def generateNextEvents(self, current_times, start_times=None):
+        current_times = asarray(current_times, dtype=float64)
+        if start_times is None:
+            start_times = self.start_time
+        if (current_times < start_times).any():
+            raise Exception("current time is less than the start time")
+        next_events = start_times + self.values(len(current_times))
+        return where(next_events < current_times, current_times, next_events)
+
     def getName(self):
         return self.name
 
@@ -1,4 +1,4 @@
-from numpy import Inf
+from numpy import Inf, full
 
 from simulator.failure.EventGenerator import EventGenerator
 
@@ -19,3 +19,6 @@ class NoFailure(EventGenerator):
 
     def generateNextEvent(self, current_time):
         return Inf
+
+    def generateNextEvents(self, current_times, start_times=None):
+        return full(len(current_times), Inf)
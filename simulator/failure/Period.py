@@ -1,4 +1,5 @@
 from math import ceil
+from numpy import asarray, ceil as vceil, full, float64
 
 from simulator.failure.EventGenerator import EventGenerator
 
@@ -24,3 +25,10 @@ class Period(EventGenerator):
 
     def generateNextEvent(self, current_time):
         return ceil(current_time/self.gamma) * self.gamma
+
+    def generateNextEvents(self, current_times, start_times=None):
+        return vceil(asarray(current_times, dtype=float64)/self.gamma) * self.gamma
+
+    # checks are gamma apart
+    def sample(self, size):
+        return full(size, self.gamma)
@@ -1,5 +1,6 @@
-from random import random
 from copy import deepcopy
+from numpy import asarray, where, float64
+from numpy.random import random_sample
 
 from simulator.failure.EventGenerator import EventGenerator
 
@@ -22,8 +23,8 @@ class Piecewise(EventGenerator):
         return 0
 
     def generateNextEvent(self, current_time):
-        index = random()
-        rang = random()
+        index = EventGenerator.stream.random()
+        rang = EventGenerator.stream.random()
 
         for i in xrange(len(Piecewise.values)):
             if index >= Piecewise.intervals[i] and \
@@ -39,6 +40,26 @@ class Piecewise(EventGenerator):
             return self.previous_event
         return self.previous_event + next_event
 
+    # the draws of generateNextEvent from uniforms (index, rang) per row
+    def inverse(self, current_times, start_times, uniforms):
+        count = len(Piecewise.values)
+        intervals = asarray(Piecewise.intervals, dtype=float64)
+        values = asarray(Piecewise.values, dtype=float64)
+        index, rang = uniforms[:, :1], uniforms[:, 1]
+        hit = (index >= intervals[:count]) & (index <= intervals[1:count + 1])
+        # the loop ends on the last piece when no piece holds the index
+        i = where(hit.any(axis=1), hit.argmax(axis=1), count - 1)
+
+        next_events = start_times + values[i] + rang*(values[i + 1] - values[i])
+        return where(next_events <= current_times, current_times, next_events)
+
+    def generateNextEvents(self, current_times, start_times=None):
+        current_times = asarray(current_times, dtype=float64)
+        if start_times is None:
+            start_times = self.previous_event
+        return self.inverse(current_times, start_times,
+                            random_sample((len(current_times), 2)))
+
     # I thought it should be implemented like this, but maybe wrong?
     @classmethod
     def Piecewise(cls, _intervals, _values):
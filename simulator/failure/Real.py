@@ -1,4 +1,5 @@
-from random import uniform
+from numpy import asarray, float64
+from numpy.random import random_sample
 
 from simulator.failure.EventGenerator import EventGenerator
 
@@ -25,4 +26,8 @@ class Real(EventGenerator):
         return 0
 
     def generateNextEvent(self, current_time):
-        return current_time + uniform(0, self.gamma) + self.lamda
+        return current_time + EventGenerator.stream.uniform(0, self.gamma) + self.lamda
+
+    def generateNextEvents(self, current_times, start_times=None):
+        current_times = asarray(current_times, dtype=float64)
+        return current_times + self.gamma*random_sample(len(current_times)) + self.lamda
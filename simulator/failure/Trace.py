@@ -1,4 +1,4 @@
-from numpy import Inf
+from numpy import Inf, full
 
 from simulator.Configuration import Configuration
 from simulator.failure.EventGenerator import EventGenerator
@@ -106,6 +106,15 @@ class Trace(EventGenerator):
         assert (current_time <= self.event.ts)
         return self.event.ts
 
+    # the trace is not sampled, every current time gets the next event of
+    # the current machine
+    def generateNextEvents(self, current_times, start_times=None):
+        next_event = Inf
+        if self.current_machine:
+            next_event = self.current_machine[0].ts
+            assert (len(current_times) == 0 or max(current_times) <= next_event)
+        return full(len(current_times), next_event)
+
     def reset(self, current_time):
         pass
 
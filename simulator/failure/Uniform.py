@@ -1,3 +1,4 @@
+from numpy import asarray, float64
 from numpy.random import randint
 
 from simulator.failure.EventGenerator import EventGenerator
@@ -20,3 +21,7 @@ class Uniform(EventGenerator):
 
     def generateNextEvent(self, current_time):
         return current_time + float(randint(self.frequency*1000))/1000.0
+
+    def generateNextEvents(self, current_times, start_times=None):
+        current_times = asarray(current_times, dtype=float64)
+        return current_times + randint(self.frequency*1000, size=len(current_times))/1000.0
@@ -1,6 +1,6 @@
 from math import exp, log
-from numpy import isnan, isinf
-from random import random
+from numpy import isnan, isinf, asarray, full, exp as vexp, log as vlog, float64
+from numpy.random import random_sample
 
 from simulator.failure.EventGenerator import EventGenerator
 
@@ -28,6 +28,10 @@ class WeibullGenerator(EventGenerator):
     def getRate(self):
         return self.lamda
 
+    # exponential times between events, the same from any current time
+    def isMemoryless(self):
+        return self.beta == 1 and self.gamma == 0
+
     def F(self, current_time):
         return 1 - exp(-pow((current_time/self.lamda), self.beta))
 
@@ -36,7 +40,7 @@ class WeibullGenerator(EventGenerator):
         if current_time < 0:
             raise Exception("Negative current time!")
 
-        r = random()
+        r = EventGenerator.stream.random()
         R = (1 - self.F(current_time)) * r + self.F(current_time)
         result = self.lamda*pow(-log(1.0-R), 1.0/self.beta) + \
             self.gamma+self.start_time
@@ -47,6 +51,29 @@ class WeibullGenerator(EventGenerator):
             raise Exception("Generated time is negative")
         return result
 
+    # F(current_time) and the draw of generateNextEvent, R conditional on
+    # surviving until current_time, inverted with uniforms r
+    def inverse(self, current_times, start_times, r):
+        current_times = current_times - start_times
+        if (current_times < 0).any():
+            raise Exception("Negative current time!")
+        F = 1 - vexp(-(current_times/self.lamda)**self.beta)
+        R = (1 - F)*r + F
+        result = self.lamda*(-vlog(1.0 - R))**(1.0/self.beta) + self.gamma + start_times
+
+        if isinf(result).any() or isnan(result).any():
+            raise Exception("Generated time is Inf or NaN")
+        if (result < 0).any():
+            raise Exception("Generated time is negative")
+        return result
+
+    def generateNextEvents(self, current_times, start_times=None):
+        current_times = asarray(current_times, dtype=float64)
+        if start_times is None:
+            start_times = full(len(current_times), self.start_time, dtype=float64)
+        return self.inverse(current_times, asarray(start_times, dtype=float64),
+                            random_sample(len(current_times)))
+
 
 def main():
     w = WeibullGenerator("wei", {'gamma': 0.02, 'lamda': 0.03, 'beta': 1})
@@ -24,13 +24,14 @@ class Disk(Unit):
     def getSlicesHitByLSE(self):
         return self.slices_hit_by_LSE
 
-    def generateEvents(self, result_events, start_time, end_time, reset):
+    def eventCycles(self, result_events, start_time, end_time, reset):
         if start_time < self.start_time:
             start_time = self.start_time
         current_time = start_time
         last_recover_time = start_time
 
         while True:
+            yield current_time
             self.failure_generator.reset(current_time)
             failure_time = self.failure_generator.generateNextEvent(
                 current_time)
@@ -69,9 +70,9 @@ class Disk(Unit):
 
             current_time = failure_time
             fail_event = Event(Event.EventType.Failure, current_time, self)
+            fail_event.next_recovery_time = recovery_time
             result_events.addEvent(fail_event)
 
-            fail_event.next_recovery_time = recovery_time
             current_time = recovery_time
             if current_time > end_time:
                 result_events.addEvent(Event(Event.EventType.Recovered,
@@ -1,12 +1,36 @@
 from copy import deepcopy
-from numpy import isnan, isinf, ceil
+from numpy import isnan, isinf, ceil, exp, maximum, minimum
 
 from simulator.Event import Event
+from simulator.failure.Period import Period
+from simulator.failure.WeibullGenerator import WeibullGenerator
 from simulator.unit.Disk import Disk
 
 
+# (LSE rate, scrub period) of the generators of a disk, lazy_latent_errors
+# needs exponential LSEs and periodic scrubs
+def latentParameters(latent, scrub):
+    if type(latent) is not WeibullGenerator or not latent.isMemoryless() or \
+            type(scrub) is not Period:
+        raise Exception("lazy_latent_errors needs exponential LSEs and periodic scrubs!")
+    return 1.0/latent.lamda, scrub.gamma
+
+
+# expected numbers of the LatentDefect and LatentRecovered events
+# generateLatentErrors queues on [starts, ends]: every LSE scrubbed before
+# the end with its scrub, after the last scrub before the end only the first
+def expectedLatentErrors(rates, periods, starts, ends):
+    last_scrubs = minimum(maximum((ceil(ends/periods) - 1)*periods, starts), ends)
+    recovered = rates*(last_scrubs - starts)
+    return recovered + 1 - exp(-rates*(ends - last_scrubs)), recovered
+
+
 class DiskWithScrubbing(Disk):
 
+    # queue no LSE events, add up their expected numbers instead, see
+    # LazyLatentErrors
+    lazy_latent_errors = False
+
     def __init__(self, name, parent, parameters):
         super(DiskWithScrubbing, self).__init__(name, parent, parameters)
         self.latent_error_generator = None
@@ -15,6 +39,9 @@ class DiskWithScrubbing(Disk):
         self.last_scrub_start = 0.0
         # Every 2 weeks = 336 hours scan the whole system.
         self.scan_period = 336
+        # lazy_latent_errors, expected LatentDefect and LatentRecovered events
+        self.expected_latent_errors = 0.0
+        self.expected_scrubs = 0.0
 
     def setLastScrubStart(self, last_scrub_start):
         self.last_scrub_start = last_scrub_start
@@ -33,9 +60,13 @@ class DiskWithScrubbing(Disk):
     def getEventGenerators(self):
         return [self.failure_generator, self.recovery_generator, self.latent_error_generator, self.scrub_generator]
 
-    def generateEvents(self, result_events, start_time, end_time, reset):
+    def eventCycles(self, result_events, start_time, end_time, reset):
         if start_time < self.start_time:
             start_time = self.start_time
+        # a window superseding a lazily generated one can start while the disk
+        # is still being recovered.
+        if start_time < self.last_recovery_time:
+            start_time = self.last_recovery_time
         if isnan(start_time) or isinf(start_time):
             raise Exception("start_time = Inf or NAN")
         if isnan(end_time) or isinf(end_time):
@@ -48,6 +79,7 @@ class DiskWithScrubbing(Disk):
             self.latent_error_generator.reset(0)
 
         while True:
+            yield current_time
             if self.last_recovery_time < 0:
                 raise Exception("Negative last recover time")
 
@@ -112,9 +144,8 @@ class DiskWithScrubbing(Disk):
                 self.failure_intervals.remove([fail_time, recover_time, _bool])
 
             fail_event = Event(Event.EventType.Failure, failure_time, self)
-            result_events.addEvent(fail_event)
-
             fail_event.next_recovery_time = recovery_time
+            result_events.addEvent(fail_event)
 
             # generate latent errors from the current time to the time of the
             # generated failure.
@@ -167,6 +198,13 @@ class DiskWithScrubbing(Disk):
         if isinf(end_time) or isnan(end_time):
             raise Exception("end time = Inf or NaN")
 
+        if DiskWithScrubbing.lazy_latent_errors:
+            rate, period = latentParameters(self.latent_error_generator, self.scrub_generator)
+            latent_errors, scrubs = expectedLatentErrors(rate, period, start_time, end_time)
+            self.expected_latent_errors += float(latent_errors)
+            self.expected_scrubs += float(scrubs)
+            return
+
         current_time = start_time
         while True:
             latent_error_time = self.latent_error_generator.generateNextEvent(
@@ -186,9 +224,9 @@ class DiskWithScrubbing(Disk):
             if current_time > end_time or LSE_in_CFI:
                 break
             e = Event(Event.EventType.LatentDefect, current_time, self)
-            result_events.addEvent(e)
             latent_recovery_time = self.scrub_generator.generateNextEvent(current_time)
             e.next_recovery_time = latent_recovery_time
+            result_events.addEvent(e)
             if latent_recovery_time >= end_time:
                 break
             recovery_e = Event(Event.EventType.LatentRecovered, latent_recovery_time, self)
@@ -0,0 +1,467 @@
+from numpy import array, arange, zeros, empty, concatenate, repeat, cumsum, diff, bincount, \
+    maximum, minimum, where, lexsort, argsort, unique, searchsorted, flatnonzero, isinf, \
+    float64, int8, int16, int64
+from numpy.random import random_sample, poisson, standard_exponential
+
+from simulator.Event import Event
+from simulator.failure.Trace import Trace
+from simulator.failure.WeibullGenerator import WeibullGenerator
+from simulator.unit.Machine import Machine
+from simulator.unit.Disk import Disk
+from simulator.unit.DiskWithScrubbing import DiskWithScrubbing, latentParameters, \
+    expectedLatentErrors
+
+# how the units of a level are generated
+PASS, RENEWAL, MACHINE, DISK, FALLBACK = range(5)
+
+# generator attributes that are state, not parameters
+STATE_ATTRIBUTES = ["name", "start_time", "previous_event", "current_time"]
+
+GENERATORS = ["failure_generator", "recovery_generator", "recovery_generator2",
+              "latent_error_generator", "scrub_generator"]
+
+
+def _kind(unit):
+    if unit.failure_intervals != []:
+        return FALLBACK
+    # not isinstance, which is slow on the generators' abstract base class
+    if any(Trace in type(getattr(unit, name, None)).__mro__ for name in GENERATORS):
+        return FALLBACK
+    if isinstance(unit, DiskWithScrubbing):
+        if None in unit.getEventGenerators():
+            return FALLBACK
+        return DISK
+    if isinstance(unit, Disk):
+        return FALLBACK
+    if unit.failure_generator is None:
+        return PASS
+    if isinstance(unit, Machine):
+        return MACHINE
+    return RENEWAL
+
+
+def _memoryless(generator):
+    return type(generator) is WeibullGenerator and generator.isMemoryless()
+
+
+def _column(value, length, dtype):
+    column = empty(length, dtype=dtype)
+    column[:] = value
+    return column
+
+
+class _Level(object):
+    """
+    Units of one depth of the tree, the children of a unit are next to each
+    other in the level below, from child_starts on.
+    """
+
+    def __init__(self, units, dfs_indexes):
+        self.units = units
+        self.dfs_indexes = array(dfs_indexes, dtype=int64)
+        self.kinds = array([_kind(u) for u in units], dtype=int8)
+        self.start_times = array([u.getStartTime() for u in units], dtype=float64)
+        self.groups = {}
+
+
+class FleetGenerator(object):
+    """
+    Unit.generateEvents for a whole tree, one level of it at a time. The
+    failure and recovery cycles of all units of a level are drawn at once
+    with the generators' generateNextEvents, every unit in the up windows
+    its parent left it, and the events go to the queue as columns through
+    addEvents. The cycles are the ones of Rack (and Unit), Machine and
+    DiskWithScrubbing.eventCycles: disks start again after a machine
+    recovery, recoveries are clamped at the end of a window, LSEs come
+    between disk failures. Units with correlated failure intervals or trace
+    generators, and other unit classes, are generated one by one with
+    generateEvents, with their subtrees.
+    The draws are the same distributions, not the same random numbers, as
+    generating unit by unit.
+    With superpose, the LSEs of memoryless latent error generators (Weibull
+    with beta 1 and gamma 0) are not drawn one after the other: they are a
+    Poisson process on the segments between disk failures, drawn as one
+    stream over all segments whose arrivals are spread over them.
+    """
+
+    def __init__(self, root, superpose=True):
+        self.superpose = superpose
+        self.units = []
+        self.levels = []
+        self.child_starts = []
+        self.child_counts = []
+        dfs_index = {}
+        stack = [root]
+        while stack:
+            unit = stack.pop()
+            dfs_index[unit.getID()] = len(self.units)
+            self.units.append(unit)
+            # the children of a disk are its slices
+            if not isinstance(unit, Disk):
+                stack.extend(reversed(unit.getChildren()))
+
+        units = [root]
+        while units:
+            level = _Level(units, [dfs_index[u.getID()] for u in units])
+            self.levels.append(level)
+            children = []
+            counts = zeros(len(units), dtype=int64)
+            for i, unit in enumerate(units):
+                if level.kinds[i] in (PASS, RENEWAL, MACHINE):
+                    counts[i] = len(unit.getChildren())
+                    children.extend(unit.getChildren())
+            self.child_starts.append(cumsum(counts) - counts)
+            self.child_counts.append(counts)
+            units = children
+        self.columns = []
+
+    def generateEvents(self, result_events, start_time, end_time):
+        positions = zeros(1, dtype=int64)
+        starts = array([start_time], dtype=float64)
+        ends = array([end_time], dtype=float64)
+        for depth, level in enumerate(self.levels):
+            windows = self._level(level, result_events, positions, starts, ends)
+            positions, starts, ends = self._childWindows(depth, *windows)
+
+        columns = [concatenate(column) for column in zip(*self.columns)]
+        self.columns = []
+        if columns == [] or len(columns[0]) == 0:
+            return
+        # events of a unit in the order they were drawn
+        order = argsort(columns[0], kind="mergesort")
+        dfs_indexes, types, times, infos, ignores, next_recovery_times = \
+            [column[order] for column in columns]
+        result_events.addEvents(self.units, dfs_indexes, types, times, infos, ignores,
+                                next_recovery_times)
+
+    # windows of the children of the units in the windows, by child and time
+    def _childWindows(self, depth, positions, starts, ends):
+        counts = self.child_counts[depth][positions]
+        total = counts.sum()
+        offsets = arange(total) - repeat(cumsum(counts) - counts, counts)
+        positions = repeat(self.child_starts[depth][positions], counts) + offsets
+        starts = repeat(starts, counts)
+        ends = repeat(ends, counts)
+        order = lexsort((starts, positions))
+        return positions[order], starts[order], ends[order]
+
+    # events of the windows (sorted by unit and time) of a level, returns the
+    # windows of the children
+    def _level(self, level, result_events, positions, starts, ends):
+        kinds = level.kinds[positions]
+        windows = []
+        keep = kinds == PASS
+        windows.append((positions[keep], starts[keep], ends[keep]))
+        for kind, generate in [(RENEWAL, self._renewals), (MACHINE, self._machines),
+                               (DISK, self._disks)]:
+            keep = kinds == kind
+            if keep.any():
+                windows.append(generate(level, positions[keep], starts[keep], ends[keep]))
+        for i in flatnonzero(kinds == FALLBACK).tolist():
+            level.units[positions[i]].generateEvents(result_events, float(starts[i]),
+                                                     float(ends[i]), True)
+        return [concatenate(column) for column in zip(*windows)]
+
+    def _emit(self, level, positions, e_type, times, info=-100, ignore=False,
+              next_recovery_times=0):
+        length = len(positions)
+        if length == 0:
+            return
+        self.columns.append((level.dfs_indexes[positions], _column(e_type, length, int8),
+                             _column(times, length, float64), _column(info, length, int16),
+                             _column(ignore, length, bool),
+                             _column(next_recovery_times, length, float64)))
+
+    # units with equal generator parameters draw together, from the
+    # generator of the first of them
+    def _groups(self, level, name):
+        if name not in level.groups:
+            keys = zeros(len(level.units), dtype=int64)
+            generators = []
+            index = {}
+            last_class = last_state = None
+            for i, unit in enumerate(level.units):
+                generator = getattr(unit, name, None)
+                if generator is None:
+                    keys[i] = -1
+                    continue
+                # most generators are copies of the one before, state and all
+                if generator.__dict__ != last_state or generator.__class__ is not last_class:
+                    parameters = dict(generator.__dict__)
+                    for attribute in STATE_ATTRIBUTES:
+                        parameters.pop(attribute, None)
+                    key = repr((generator.__class__, sorted(parameters.items())))
+                    if key not in index:
+                        index[key] = len(generators)
+                        generators.append(generator)
+                    group = index[key]
+                    last_class, last_state = generator.__class__, dict(generator.__dict__)
+                keys[i] = group
+            level.groups[name] = (keys, generators)
+        return level.groups[name]
+
+    def _draw(self, level, name, positions, current_times, start_times):
+        keys, generators = self._groups(level, name)
+        groups = keys[positions]
+        result = empty(len(positions), dtype=float64)
+        for group in unique(groups).tolist():
+            chosen = groups == group
+            result[chosen] = generators[group].generateNextEvents(current_times[chosen],
+                                                                  start_times[chosen])
+        return result
+
+    def _attribute(self, level, name, default, dtype):
+        return array([getattr(u, name, default) for u in level.units], dtype=dtype)
+
+    # start times of generators that are not reset
+    def _startTimes(self, level, name):
+        return array([getattr(getattr(u, name, None), "start_time", 0.0)
+                      for u in level.units], dtype=float64)
+
+    # Rack and Unit: the generators are reset at every cycle, the children
+    # run between a recovery and the next failure
+    def _renewals(self, level, positions, starts, ends):
+        fast_forward = self._attribute(level, "fast_forward", False, bool)
+        current = maximum(starts, level.start_times[positions])
+        last = current.copy()
+        windows = []
+        active = arange(len(positions))
+        while len(active) != 0:
+            units = positions[active]
+            failures = self._draw(level, "failure_generator", units, current[active],
+                                  current[active])
+            recoveries = self._draw(level, "recovery_generator", units, failures, failures)
+            done = failures > ends[active]
+            ended = active[done]
+            windows.append((positions[ended], last[ended], ends[ended]))
+
+            active, failures, recoveries = active[~done], failures[~done], recoveries[~done]
+            units = positions[active]
+            self._emit(level, units, Event.EventType.Failure, failures,
+                       ignore=fast_forward[units], next_recovery_times=recoveries)
+            windows.append((units, last[active], failures))
+
+            go_on = recoveries <= ends[active]
+            active, recoveries = active[go_on], recoveries[go_on]
+            units = positions[active]
+            self._emit(level, units, Event.EventType.Recovered, recoveries,
+                       ignore=fast_forward[units])
+            current[active] = recoveries
+            last[active] = recoveries
+        return [concatenate(column) for column in zip(*windows)]
+
+    # Machine: recoveries are clamped at the end, a fail_fraction of failures
+    # are permanent, long temporary ones start eager recovery
+    def _machines(self, level, positions, starts, ends):
+        fast_forward = self._attribute(level, "fast_forward", False, bool)
+        eager_recovery = self._attribute(level, "eager_recovery_enabled", False, bool)
+        fail_timeouts = self._attribute(level, "fail_timeout", 0.0, float64)
+        repair_times = self._attribute(level, "machine_repair_time", 0.0, float64)
+        current = maximum(starts, level.start_times[positions])
+        last = current.copy()
+        windows = []
+        active = arange(len(positions))
+        while len(active) != 0:
+            units = positions[active]
+            failures = self._draw(level, "failure_generator", units, current[active],
+                                  current[active])
+            done = failures > ends[active]
+            ended = active[done]
+            windows.append((positions[ended], last[ended], ends[ended]))
+
+            active, failures = active[~done], failures[~done]
+            units = positions[active]
+            recoveries = self._draw(level, "recovery_generator", units, failures, failures)
+            windows.append((units, last[active], failures))
+            recoveries = minimum(recoveries, ends[active] - 1E-5)
+
+            skipped = fast_forward[units]
+            permanent = ~skipped & (random_sample(len(active)) < Machine.fail_fraction)
+            if permanent.any():
+                recoveries[permanent] = self._draw(
+                    level, "recovery_generator2", units[permanent], failures[permanent],
+                    failures[permanent]) + repair_times[units[permanent]]
+            # failure type: tempAndShort=1, tempAndLong=2, permanent=3
+            types = where(permanent, 3,
+                          where(recoveries - failures <= fail_timeouts[units], 1, 2))
+            eager = ~skipped & (types == 2) & eager_recovery[units]
+            self._emit(level, units[eager], Event.EventType.EagerRecoveryStart,
+                       failures[eager] + fail_timeouts[units[eager]],
+                       next_recovery_times=recoveries[eager])
+            # machine recovery after the last eager recovery installment
+            recoveries[eager] += 1E-5
+
+            for chosen, info, next_recovery_times in [
+                    (skipped, 1, 0), (~skipped, types[~skipped], recoveries[~skipped])]:
+                self._emit(level, units[chosen], Event.EventType.Failure, failures[chosen],
+                           info=info, next_recovery_times=next_recovery_times)
+                self._emit(level, units[chosen], Event.EventType.Recovered,
+                           recoveries[chosen], info=info)
+
+            current[active] = recoveries
+            last[active] = recoveries
+            go_on = recoveries < ends[active] - 1E-5
+            active = active[go_on]
+        return [concatenate(column) for column in zip(*windows)]
+
+    # DiskWithScrubbing: the failure generator is never reset, a failure is
+    # drawn again until it is in the window, the windows of a disk go one
+    # after the other as they carry its last recovery time
+    def _disks(self, level, positions, starts, ends):
+        units = level.units
+        last_recovery = self._attribute(level, "last_recovery_time", 0.0, float64)
+        latent_starts = self._startTimes(level, "latent_error_generator")
+        failure_starts = self._startTimes(level, "failure_generator")
+        repair_times = self._attribute(level, "disk_repair_time", 0.0, float64)
+
+        # the k-th window of every disk
+        firsts = flatnonzero(concatenate(([True], positions[1:] != positions[:-1])))
+        lengths = concatenate((firsts[1:], [len(positions)])) - firsts
+        ordinals = arange(len(positions)) - repeat(firsts, lengths)
+
+        segments = []
+        for k in xrange(lengths.max() if len(lengths) != 0 else 0):
+            windows = flatnonzero(ordinals == k)
+            disks = positions[windows]
+            window_starts = maximum(maximum(starts[windows], level.start_times[disks]),
+                                    last_recovery[disks])
+            window_ends = ends[windows]
+            fresh = disks[window_starts == 0]
+            last_recovery[fresh] = 0
+            latent_starts[fresh] = 0
+            current = window_starts.copy()
+
+            active = arange(len(windows))
+            while len(active) != 0:
+                cycle = disks[active]
+                failures = self._draw(level, "failure_generator", cycle,
+                                      last_recovery[cycle], failure_starts[cycle])
+                early = flatnonzero(failures < window_starts[active])
+                while len(early) != 0:
+                    # many draws at once for the disks left, the first one
+                    # in the window is the one drawing them one by one keeps
+                    tries = max(1, min(1024, 65536//len(early)))
+                    behind = repeat(cycle[early], tries)
+                    draws = self._draw(level, "failure_generator", behind,
+                                       last_recovery[behind],
+                                       failure_starts[behind]).reshape(len(early), tries)
+                    inside = draws >= window_starts[active[early]][:, None]
+                    found = inside.any(axis=1)
+                    failures[early[found]] = draws[found, inside[found].argmax(axis=1)]
+                    early = early[~found]
+                done = failures > window_ends[active]
+                ended = active[done]
+                segments.append((disks[ended], current[ended], window_ends[ended],
+                                 latent_starts[disks[ended]]))
+
+                active, failures = active[~done], failures[~done]
+                cycle = disks[active]
+                recoveries = self._draw(level, "recovery_generator", cycle, failures,
+                                        failures) + repair_times[cycle]
+                recoveries = minimum(recoveries, window_ends[active])
+                last_recovery[cycle] = recoveries
+                self._emit(level, cycle, Event.EventType.Recovered, recoveries)
+                self._emit(level, cycle, Event.EventType.Failure, failures,
+                           next_recovery_times=recoveries)
+                segments.append((cycle, current[active], failures, latent_starts[cycle]))
+                # lifetime of a latent error starts when the disk is reconstructed
+                latent_starts[cycle] = recoveries
+                current[active] = recoveries
+
+        # grouped while the latent error generators are all still alike
+        self._groups(level, "latent_error_generator")
+        for i in flatnonzero(level.kinds == DISK).tolist():
+            units[i].last_recovery_time = float(last_recovery[i])
+            units[i].latent_error_generator.reset(float(latent_starts[i]))
+        if segments != []:
+            self._latentErrors(level, *[concatenate(column) for column in zip(*segments)])
+        return [zeros(0, dtype=int64), zeros(0, dtype=float64), zeros(0, dtype=float64)]
+
+    # DiskWithScrubbing.generateLatentErrors of every segment, a segment
+    # ends at its first scrub at or after its end
+    def _latentErrors(self, level, disks, starts, ends, latent_starts):
+        if DiskWithScrubbing.lazy_latent_errors:
+            self._expectedLatentErrors(level, disks, starts, ends)
+            return
+        scrub_starts = self._startTimes(level, "scrub_generator")
+        if self.superpose:
+            keys, generators = self._groups(level, "latent_error_generator")
+            rates = array([1.0/g.lamda if _memoryless(g) else 0.0 for g in generators],
+                          dtype=float64)[keys[disks]]
+            poisson_segments = rates > 0
+            self._poissonLatentErrors(level, disks[poisson_segments],
+                                      starts[poisson_segments], ends[poisson_segments],
+                                      rates[poisson_segments], scrub_starts)
+            disks, starts, ends, latent_starts = [
+                column[~poisson_segments] for column in [disks, starts, ends, latent_starts]]
+
+        current = starts.copy()
+        active = arange(len(disks))
+        while len(active) != 0:
+            errors = self._draw(level, "latent_error_generator", disks[active],
+                                current[active], latent_starts[active])
+            finite = ~isinf(errors)
+            active, errors = active[finite], errors[finite]
+            current[active] = errors
+            inside = errors <= ends[active]
+            active, errors = active[inside], errors[inside]
+            scrubs = self._draw(level, "scrub_generator", disks[active], errors,
+                                scrub_starts[disks[active]])
+            self._emit(level, disks[active], Event.EventType.LatentDefect, errors,
+                       next_recovery_times=scrubs)
+            before = scrubs < ends[active]
+            active, scrubs = active[before], scrubs[before]
+            self._emit(level, disks[active], Event.EventType.LatentRecovered, scrubs)
+
+    # lazy_latent_errors, the expected LSE events of the segments added to
+    # their disks
+    def _expectedLatentErrors(self, level, disks, starts, ends):
+        keys, generators = self._groups(level, "latent_error_generator")
+        scrub_keys, scrub_generators = self._groups(level, "scrub_generator")
+        # every pair of generators the segments have
+        pairs, segment_pairs = unique(keys[disks]*len(scrub_generators) + scrub_keys[disks],
+                                      return_inverse=True)
+        parameters = array([latentParameters(generators[pair//len(scrub_generators)],
+                                             scrub_generators[pair % len(scrub_generators)])
+                            for pair in pairs.tolist()], dtype=float64).reshape(-1, 2)
+        latent_errors, scrubs = expectedLatentErrors(
+            parameters[segment_pairs, 0], parameters[segment_pairs, 1], starts, ends)
+        positions, segment_disks = unique(disks, return_inverse=True)
+        latent_errors = bincount(segment_disks, latent_errors, len(positions))
+        scrubs = bincount(segment_disks, scrubs, len(positions))
+        for i, latent_error_count, scrub_count in zip(positions.tolist(), latent_errors.tolist(),
+                                                      scrubs.tolist()):
+            level.units[i].expected_latent_errors += latent_error_count
+            level.units[i].expected_scrubs += scrub_count
+
+    # LSEs at rates per segment: one Poisson stream of the total rate, its
+    # arrivals spread over the segments in proportion to their rates, each
+    # segment taking its rate times its length of the stream
+    def _poissonLatentErrors(self, level, disks, starts, ends, rates, scrub_starts):
+        lengths = rates*(ends - starts)
+        weights = cumsum(lengths)
+        if len(weights) == 0:
+            return
+        count = poisson(weights[-1])
+        if count == 0:
+            return
+        # count sorted uniform arrivals, from normalised exponential gaps, so
+        # they come by segment and time
+        stream = cumsum(standard_exponential(count + 1))
+        stream = stream[:count]*(weights[-1]/stream[count])
+        segments = minimum(searchsorted(weights, stream, side="right"), len(weights) - 1)
+        errors = starts[segments] + (stream - weights[segments] + lengths[segments]) / \
+            rates[segments]
+        disks = disks[segments]
+        scrubs = self._draw(level, "scrub_generator", disks, errors, scrub_starts[disks])
+
+        # a segment stops at its first LSE scrubbed at or after its end
+        late = scrubs >= ends[segments]
+        firsts = flatnonzero(concatenate(([True], segments[1:] != segments[:-1])))
+        late_before = cumsum(late) - late
+        kept = late_before == repeat(late_before[firsts], diff(concatenate((firsts, [count]))))
+        self._emit(level, disks[kept], Event.EventType.LatentDefect, errors[kept],
+                   next_recovery_times=scrubs[kept])
+        recovered = kept & ~late
+        self._emit(level, disks[recovered], Event.EventType.LatentRecovered,
+                   scrubs[recovered])
@@ -1,10 +1,11 @@
-from random import random, uniform
+from random import uniform
 from math import ceil
 from copy import deepcopy
 
 from simulator.unit.Unit import Unit
 from simulator.Event import Event
 from simulator.failure.Trace import Trace
+from simulator.failure.EventGenerator import EventGenerator
 from simulator.Configuration import Configuration
 
 
@@ -68,7 +69,7 @@ class Machine(Unit):
 
         return fail_event
 
-    def generateEvents(self, result_events, start_time, end_time, reset):
+    def eventCycles(self, result_events, start_time, end_time, reset):
         if start_time < self.start_time:
             start_time = self.start_time
         current_time = start_time
@@ -88,6 +89,7 @@ class Machine(Unit):
             self.recovery_generator.setCurrentMachine(self.my_id)
 
         while True:
+            yield current_time
             if reset:
                 self.failure_generator.reset(current_time)
 
@@ -142,7 +144,7 @@ class Machine(Unit):
             if recovery_time > end_time - (1E-5):
                 recovery_time = end_time - (1E-5)
 
-            r = random()
+            r = EventGenerator.stream.random()
             if not self.fast_forward:  # we will process failures
                 if r < Machine.fail_fraction:
                     # failure type: tempAndShort=1, tempAndLong=2, permanent=3
@@ -12,7 +12,7 @@ class Rack(Unit):
         # but ignored(neither handled nor written to file).
         self.fast_forward = bool(parameters.get("fast_forward"))
 
-    def generateEvents(self, result_events, start_time, end_time, reset):
+    def eventCycles(self, result_events, start_time, end_time, reset):
         if start_time < self.start_time:
             start_time = self.start_time
         current_time = start_time
@@ -27,6 +27,7 @@ class Rack(Unit):
             return
 
         while True:
+            yield current_time
             if reset:
                 self.failure_generator.reset(current_time)
             failure_time = self.failure_generator.generateNextEvent(
@@ -62,16 +63,16 @@ class Rack(Unit):
                 self.failure_intervals.remove([fail_time, recover_time, _bool])
 
             fail_event = Event(Event.EventType.Failure, failure_time, self)
-            result_events.addEvent(fail_event)
             if self.fast_forward:
                 fail_event.ignore = True
+            fail_event.next_recovery_time = recovery_time
+            result_events.addEvent(fail_event)
 
             for u in self.children:
                 u.generateEvents(result_events, last_recover_time,
                                  failure_time, True)
 
             current_time = recovery_time
-            fail_event.next_recovery_time = recovery_time
 
             if current_time > end_time:
                 break
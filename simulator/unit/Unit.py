@@ -1,12 +1,20 @@
 from abc import ABCMeta
 from copy import deepcopy
+from random import Random
 
 from simulator.Event import Event
+from simulator.failure.EventGenerator import EventGenerator
 
 
 class Unit:
     __metaclass__ = ABCMeta
     unit_count = 0
+    # If True, generateEvents only queues a Generate event, each unit produces
+    # the events of its next failure/recovery cycle when that event is popped.
+    lazy_generation = False
+    # Set, every unit draws its events from its own random stream seeded with
+    # it and the unit id, so lazy and eager generation draw the same numbers.
+    random_seed = None
 
     def __init__(self, name, parent, parameters):
         self.children = []
@@ -21,6 +29,15 @@ class Unit:
         self.last_failure_time = 0
         self.last_bandwidth_need = 0
         self.failure_intervals = []
+        # bumped to cancel every event of this unit still in the queue.
+        self.generation = 0
+        # generation: time, events of a generation cancelled up to a time
+        # are kept until that time.
+        self.cancel_times = None
+        # cycle generator of the latest generateEvents() in lazy mode
+        self.cycles = None
+        # the unit's random stream, see random_seed
+        self.stream = None
 
         Unit.unit_count += 1
 
@@ -54,6 +71,15 @@ class Unit:
     def removeFailureInterval(self, interval):
         self.failure_intervals.remove(interval)
 
+    # Queued events are not searched for, they are skipped when popped.
+    # With time, the events scheduled at or before it are kept.
+    def cancelEvents(self, time=None):
+        if time is not None:
+            if self.cancel_times is None:
+                self.cancel_times = {}
+            self.cancel_times[self.generation] = time
+        self.generation += 1
+
     def setLastBandwidthNeed(self, bw):
         self.last_bandwidth_need = bw
 
@@ -106,6 +132,45 @@ class Unit:
         return fail_event
 
     def generateEvents(self, result_events, start_time, end_time, reset):
+        cycles = self.eventCycles(result_events, start_time, end_time, reset)
+        if Unit.lazy_generation:
+            # a new window supersedes what is left of an earlier one, as
+            # eager generation would have finished it already.
+            self.cycles = cycles
+            self.advanceEvents(result_events, cycles)
+        else:
+            while self.nextCycle(cycles) is not None:
+                pass
+
+    # Next cycle of cycles, None after the last one. The generators draw
+    # from the unit's own stream meanwhile, if there is a random_seed.
+    def nextCycle(self, cycles):
+        if Unit.random_seed is None:
+            return next(cycles, None)
+        outer = EventGenerator.stream
+        if self.stream is None:
+            self.stream = Random((Unit.random_seed, self.id))
+        EventGenerator.stream = self.stream
+        try:
+            return next(cycles, None)
+        finally:
+            EventGenerator.stream = outer
+
+    # Run one cycle of the generator and queue a Generate event at the time
+    # the next cycle starts from; every event of that cycle is not earlier.
+    def advanceEvents(self, result_events, cycles):
+        if cycles is not self.cycles:
+            return
+        current_time = self.nextCycle(cycles)
+        if current_time is not None:
+            e = Event(Event.EventType.Generate, current_time, self, ignore=True)
+            e.cycles = cycles
+            result_events.addEvent(e)
+
+    # Generator over the failure/recovery cycles of [start_time, end_time],
+    # it adds the events of a cycle to result_events and then yields the time
+    # the next cycle starts from.
+    def eventCycles(self, result_events, start_time, end_time, reset):
         current_time = start_time
         last_recover_time = start_time
 
@@ -115,6 +180,7 @@ class Unit:
             return
 
         while True:
+            yield current_time
             if reset:
                 self.failure_generator.reset(current_time)
 
@@ -126,18 +192,18 @@ class Unit:
                     u.generateEvents(result_events, last_recover_time,
                                      end_time, True)
                 break
+            self.recovery_generator.reset(current_time)
+            recovery_time = self.recovery_generator.generateNextEvent(
+                current_time)
+            assert (recovery_time > failure_time)
             fail_event = Event(Event.EventType.Failure, current_time, self)
+            fail_event.next_recovery_time = recovery_time
             result_events.addEvent(fail_event)
             for u in self.children:
                 u.generateEvents(result_events, last_recover_time,
                                  current_time, True)
 
-            self.recovery_generator.reset(current_time)
-            recovery_time = self.recovery_generator.generateNextEvent(
-                current_time)
-            assert (recovery_time > failure_time)
             current_time = recovery_time
-            fail_event.next_recovery_time = recovery_time
 
             if current_time > end_time:
                 break
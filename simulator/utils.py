@@ -7,6 +7,7 @@ from simulator.failure.Real import Real
 from simulator.failure.Period import Period
 from simulator.failure.GFSAvailability import GFSAvailability
 from simulator.failure.GFSAvailability2 import GFSAvailability2
+from numpy import array, zeros, asarray, flatnonzero, count_nonzero, int64
 
 
 def splitMethod(string, split_with=','):
@@ -135,5 +136,86 @@ class FIFO(object):
         return queue_times, avg_queue_time
 
 
+class IndexedSet(object):
+    """
+    Set of ints with O(1) add and remove: the items in a list, their
+    positions in a dict, a removed item's hole is filled with the last item.
+    """
+    def __init__(self, items=()):
+        self.items = []
+        self.positions = {}
+        self.addAll(items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    # remove item if it is in the set
+    def remove(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position != len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+    def addAll(self, items):
+        for item in asarray(items, dtype=int64).tolist():
+            self.add(item)
+
+    def removeAll(self, items):
+        for item in asarray(items, dtype=int64).tolist():
+            self.remove(item)
+
+    def toArray(self):
+        return array(self.items, dtype=int64)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class IndexedMask(object):
+    """
+    IndexedSet of the ints in [0, size) as a bool array, addAll and removeAll
+    of an array of items are one array operation. toArray() gives the items
+    in increasing order.
+    """
+    def __init__(self, size, items=()):
+        self.mask = zeros(size, dtype=bool)
+        self.addAll(items)
+
+    def add(self, item):
+        self.mask[item] = True
+
+    def remove(self, item):
+        self.mask[item] = False
+
+    def addAll(self, items):
+        self.mask[asarray(items, dtype=int64)] = True
+
+    def removeAll(self, items):
+        self.mask[asarray(items, dtype=int64)] = False
+
+    def toArray(self):
+        return flatnonzero(self.mask)
+
+    def __contains__(self, item):
+        return bool(self.mask[item])
+
+    def __len__(self):
+        return count_nonzero(self.mask)
+
+    def __iter__(self):
+        return iter(self.toArray().tolist())
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from random import seed
+
+import numpy
+
+from simulator.Event import Event
+from simulator.Checkpoint import Checkpoint
+from simulator.Configuration import Configuration
+from simulator.Simulation import Simulation
+from tests.test_simulation import CONF
+
+
+class KeptCheckpoints(Simulation):
+    # only writes the first checkpoint and the first one while an eager
+    # recovery installment is queued, and keeps a copy of them
+    def __init__(self, conf_path, directory):
+        super(KeptCheckpoints, self).__init__(conf_path)
+        self.directory = directory
+        self.kept = {}
+
+    def writeCheckpoint(self, start_state, handler, events, events_handled, next_checkpoint):
+        names = ["first"]
+        if any(e.getType() == Event.EventType.EagerRecoveryInstallment and not e.isCancelled()
+               for e in events.convertToArray()):
+            names.append("installment")
+        names = [name for name in names if name not in self.kept]
+        if not names:
+            return
+        super(KeptCheckpoints, self).writeCheckpoint(start_state, handler, events,
+                                                     events_handled, next_checkpoint)
+        for name in names:
+            self.kept[name] = os.path.join(self.directory, name + ".npz")
+            shutil.copy(self.conf.checkpoint_file, self.kept[name])
+
+
+class CheckpointTest(unittest.TestCase):
+
+    def testResumeSameRun(self):
+        directory = tempfile.mkdtemp()
+        try:
+            # machine failures longer than their timeout start eager recovery
+            xml_path = os.path.join(directory, "layer.xml")
+            with open(Configuration(CONF).xml_file_path) as xml_file:
+                contents = xml_file.read().replace(
+                    "<fail_timeout>0.25</fail_timeout>",
+                    "<fail_timeout>0.25</fail_timeout>\n"
+                    "<eager_recovery_enabled>true</eager_recovery_enabled>")
+            with open(xml_path, "w") as xml_file:
+                xml_file.write(contents)
+            with open(CONF) as conf_file:
+                contents = conf_file.read()
+            conf_path = os.path.join(directory, "checkpoint.conf")
+            with open(conf_path, "w") as conf_file:
+                conf_file.write(contents.replace("/root/SIMDDC/conf/layer.xml", xml_path) +
+                                "checkpoint_interval = 0.01\n"
+                                "checkpoint_file = %s\n" %
+                                os.path.join(directory, "checkpoint.npz"))
+
+            for random_seed in (1, 2):
+                seed(random_seed)
+                numpy.random.seed(random_seed)
+                sim = KeptCheckpoints(conf_path, directory)
+                result = sim.run().toString()
+                self.assertEqual(sorted(sim.kept), ["first", "installment"])
+                # read before the resumed runs write theirs over them
+                for checkpoint in [Checkpoint(file_name) for file_name in sim.kept.values()]:
+                    resumed = KeptCheckpoints(checkpoint.info["conf_path"], directory)
+                    resumed_result = resumed.run(checkpoint).toString()
+                    self.assertEqual((resumed.total_events_handled, resumed_result),
+                                     (sim.total_events_handled, result))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
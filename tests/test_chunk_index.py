@@ -0,0 +1,77 @@
+import unittest
+from random import Random, seed
+
+from simulator.Configuration import Configuration
+from simulator.XMLParser import XMLParser
+from simulator.dataDistribute.SSSDistribute import SSSDistribute
+from tests.test_simulation import CONF
+
+
+class ChunkIndexTest(unittest.TestCase):
+
+    def allDisks(self, distributer):
+        disks = []
+        distributer.getAllDisks(distributer.getRoot(), disks)
+        return sum(disks, [])
+
+    # the CSR index against the per-slice location lists, load balancing may
+    # move two chunks of a slice to one disk
+    def checkIndex(self, distributer):
+        locations = distributer.returnSliceLocations()
+        disks = self.allDisks(distributer)
+        expected = dict((disk.getID(), []) for disk in disks)
+        for slice_index, slice_locations in enumerate(locations):
+            for position, disk in enumerate(slice_locations):
+                expected[disk.getID()].append((slice_index, position))
+        for disk in disks:
+            slices, positions = distributer.diskChunks(disk)
+            self.assertEqual(zip(slices, positions), expected[disk.getID()])
+            for slice_index in slices:
+                self.assertEqual(distributer.chunkPosition(slice_index, disk),
+                                 locations[slice_index].index(disk))
+
+        row_disks, counts = distributer.rowDisks()
+        rows = distributer.slicesDiskRows(range(len(locations)))
+        for slice_index, slice_locations in enumerate(locations):
+            self.assertEqual([row_disks[row] for row in rows[slice_index]], slice_locations)
+        for disk, count in zip(row_disks, counts):
+            self.assertEqual(count, len(expected[disk.getID()]))
+
+        slices, positions = distributer.disksChunks(disks)
+        self.assertEqual(sorted(zip(slices.tolist(), positions.tolist())),
+                         sorted((slice_index, position)
+                                for slice_index, slice_locations in enumerate(locations)
+                                for position in xrange(len(slice_locations))))
+
+    def testBlockMovingAndScaling(self):
+        seed(1)
+        distributer = SSSDistribute(XMLParser(Configuration(CONF)))
+        distributer.start()
+        self.checkIndex(distributer)
+
+        # chunks moved to disks their slice has no chunk on
+        rand = Random(2)
+        locations = distributer.returnSliceLocations()
+        disks = self.allDisks(distributer)
+        for i in xrange(200):
+            slice_index = rand.randrange(len(locations))
+            old_disk = rand.choice(locations[slice_index])
+            new_disk = rand.choice([disk for disk in disks
+                                    if disk not in locations[slice_index]])
+            distributer._blockMoving(old_disk, new_disk, slice_index)
+            if i % 50 == 0:
+                self.checkIndex(distributer)
+        self.checkIndex(distributer)
+        for disk in disks:
+            self.assertEqual(distributer.diskChunks(disk)[0], sorted(disk.getChildren()))
+
+        # new racks, machines and disks, load balanced and with new slices
+        for style in (3, 2, 1):
+            total_slices = distributer.returnTotalSliceCount()
+            distributer.systemScaling(100, 0.01, 10, style, None, True)
+            self.assertEqual(distributer.returnTotalSliceCount(), total_slices + 10)
+            self.checkIndex(distributer)
+
+
+if __name__ == "__main__":
+    unittest.main()
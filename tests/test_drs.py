@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import unittest
+from itertools import combinations
+
+from numpy import array, int8, ones, vstack
+from numpy.random import RandomState
+
+from simulator.drs.Handler import getDRSHandler
+from simulator.drs.Matrix import Matrix
+from simulator.drs.base import toMasks, toState
+
+CODE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "conf", "codes", "pyramid-12-8.code")
+
+CODES = [("RS", [9, 6]), ("MSR", [9, 6, 7]), ("LRC", [10, 6, 2]), ("LRC", [16, 12, 2]),
+         ("XORBAS", [10, 6, 2]), ("MATRIX", [12, 8])]
+
+
+def randomStates(n, rows, seed=1):
+    # mostly normal blocks, like the stripes of a running system
+    rand = RandomState(seed)
+    return rand.choice(array([1, 0, -1, -2], dtype=int8), size=(rows, n),
+                       p=[0.7, 0.1, 0.1, 0.1])
+
+
+class BatchDRSTest(unittest.TestCase):
+    """
+    The batch methods give the scalar results for every row.
+    """
+
+    def handlers(self):
+        for name, params in CODES:
+            yield name, getDRSHandler(name, params, CODE_FILE)
+
+    def testIsRepairableMany(self):
+        for name, handler in self.handlers():
+            states = randomStates(handler.n, 3000)
+            expected = [handler.isRepairable(row) for row in states.tolist()]
+            self.assertEqual(handler.isRepairableMany(states).tolist(), expected, name)
+
+    def testParallRepairMany(self):
+        for name, handler in self.handlers():
+            for only_lost in [True, False]:
+                states = randomStates(handler.n, 3000)
+                states = states[handler.isRepairableMany(states)]
+                rows = states.tolist()
+                expected = [handler.parallRepair(row, only_lost) for row in rows]
+                costs = handler.parallRepairMany(states, only_lost)
+                self.assertEqual(costs.tolist(), expected, name)
+                self.assertEqual(states.tolist(), rows, name)
+
+    def testMasksMatchScalar(self):
+        for name, handler in self.handlers():
+            for row in randomStates(handler.n, 500).tolist():
+                available, lost = toMasks(row)
+                self.assertEqual(toState(available, lost, handler.n),
+                                 [max(s, -1) for s in row])
+                repairable = handler.isRepairable(list(row))
+                self.assertEqual(handler.isRepairableMasks(available, lost), repairable, name)
+                if not repairable:
+                    continue
+                for only_lost in [True, False]:
+                    state = list(row)
+                    rc = handler.parallRepair(state, only_lost)
+                    self.assertEqual(handler.parallRepairMasks(available, lost, only_lost),
+                                     (rc, toMasks(state)[0]), name)
+                for index in [i for i, s in enumerate(row) if s != 1]:
+                    state = list(row)
+                    rc = handler.repair(state, index)
+                    self.assertEqual(handler.repairMasks(available, lost, index),
+                                     (rc, toMasks(state)[0]), name)
+
+    def testAllNormalAndAllLost(self):
+        for name, handler in self.handlers():
+            states = vstack([ones(handler.n, dtype=int8), -ones(handler.n, dtype=int8)])
+            self.assertEqual(handler.isRepairableMany(states).tolist(), [True, False], name)
+            self.assertEqual(handler.parallRepairMany(states[:1]).tolist(), [0], name)
+
+    def testMDSCountsAvailable(self):
+        # an MDS stripe is repairable when it holds k available blocks
+        for name, handler in self.handlers():
+            if not handler.isMDS:
+                continue
+            states = randomStates(handler.n, 3000)
+            self.assertEqual(handler.isRepairableMany(states).tolist(),
+                             ((states == 1).sum(axis=1) >= handler.k).tolist(), name)
+
+    def testTolerance(self):
+        # any tolerance() blocks can be missing, some one more can not
+        for name, handler in self.handlers():
+            tolerance = handler.tolerance()
+            for missing, expected in [(tolerance, True), (tolerance + 1, False)]:
+                repairable = all(handler.isRepairable([0 if i in chosen else 1
+                                                       for i in xrange(handler.n)])
+                                 for chosen in combinations(xrange(handler.n), missing))
+                self.assertEqual(repairable, expected, name)
+
+
+# a (7, 4) code over GF(2): two local parities of two data blocks each and
+# one parity of all four
+GF2_CODE = """[code]
+field = GF2
+generator =
+    1 0 0 0
+    0 1 0 0
+    0 0 1 0
+    0 0 0 1
+    1 1 0 0
+    0 0 1 1
+    1 1 1 1
+groups =
+    0 1 4
+    2 3 5
+"""
+
+
+class MatrixTableTest(unittest.TestCase):
+    """
+    The decodability table of the Matrix code agrees with the rank of the
+    generator rows of every erasure pattern.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        gf2_file = os.path.join(self.directory, "gf2.code")
+        with open(gf2_file, "w") as code_file:
+            code_file.write(GF2_CODE)
+        self.codes = [Matrix([], CODE_FILE), Matrix([], gf2_file)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testTableMatchesRank(self):
+        for code in self.codes:
+            self.assertEqual(len(code.decodable), 1 << code.n)
+            for available in xrange(1 << code.n):
+                rows = [code.generator[i] for i in xrange(code.n) if available >> i & 1]
+                self.assertEqual(bool(code.decodable[available]),
+                                 rows != [] and code._rank(rows) == code.k, (code.field, available))
+        # any 3 failures of the pyramid code are repairable, not every 4
+        pyramid = self.codes[0]
+        full = (1 << pyramid.n) - 1
+        patterns = [full & ~(1 << a | 1 << b | 1 << c) for a in xrange(12)
+                    for b in xrange(a) for c in xrange(b)]
+        self.assertTrue(all(pyramid.decodable[patterns]))
+        self.assertFalse(pyramid.decodable[full & ~0b1111].any())
+
+    def testTableAndRankPathAgree(self):
+        for code in self.codes:
+            states = randomStates(code.n, 2000)
+            expected = code.isRepairableMany(states).tolist()
+            # the path of codes too long for a table
+            code.decodable = None
+            self.assertEqual([code.isRepairable(row) for row in states.tolist()], expected)
+            self.assertEqual(code.isRepairableMany(states).tolist(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
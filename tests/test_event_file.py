@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from random import Random
+
+from simulator.Event import Event
+from simulator.EventFile import EventFileWriter, EventFileReader, unitTable, COMPRESSIONS, lzma
+from simulator.Configuration import Configuration
+from simulator.XMLParser import XMLParser
+from tests.test_simulation import CONF
+
+
+class EventFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.units = unitTable(XMLParser(Configuration(CONF)).readFile()[0])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def events(self, count=1000):
+        # every event type on every unit, with the extremes of info
+        rand = Random(1)
+        events = []
+        for i in xrange(count):
+            e = Event(i % len(Event.EventType.names), rand.uniform(0, 87600),
+                      self.units[i % len(self.units)],
+                      rand.choice([-100, -32768, 0, 1, 6, 32767]), rand.random() < 0.5,
+                      rand.choice([0, rand.uniform(0, 87600)]))
+            events.append(e)
+        return events
+
+    def testRoundTrip(self):
+        events = self.events()
+        compressions = [compression for compression in COMPRESSIONS
+                        if compression != "lzma" or lzma is not None]
+        for compression in compressions:
+            file_name = os.path.join(self.directory, "events-" + compression)
+            # chunks and reads that split records
+            writer = EventFileWriter(file_name, self.units, "a message", compression,
+                                     chunk_events=7)
+            for e in events:
+                writer.write(e)
+            writer.close()
+
+            reader = EventFileReader(file_name, read_size=100)
+            self.assertEqual(reader.compression, compression)
+            self.assertEqual(reader.message, "a message")
+            self.assertEqual(reader.units, [unit.toString() for unit in self.units])
+            records = reader.readAll()
+            self.assertEqual(len(records), len(events))
+            for e, record in zip(events, records):
+                self.assertEqual((e.time, e.next_recovery_time, self.units[record["unit"]],
+                                  e.info, e.type, e.ignore),
+                                 (record["time"], record["next_recovery_time"], e.unit,
+                                  record["info"], record["type"], record["ignore"]))
+            self.assertEqual(set(records["type"].tolist()),
+                             set(xrange(len(Event.EventType.names))))
+
+    def testEmptyAndAttributes(self):
+        file_name = os.path.join(self.directory, "events")
+        writer = EventFileWriter(file_name, self.units, compression="zlib")
+        writer.close()
+        self.assertEqual(len(EventFileReader(file_name).readAll()), 0)
+
+        # attributes have no place in a record
+        e = self.events(1)[0]
+        e.setAttributes("slice", 3)
+        writer = EventFileWriter(file_name, self.units)
+        self.assertRaises(Exception, writer.write, e)
+        writer.close()
+        self.assertRaises(Exception, EventFileWriter, file_name, self.units, "", "gzip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from itertools import count
+from random import Random
+
+from simulator.Event import Event
+from simulator.EventQueue import getEventQueue
+from simulator.unit.SliceSet import SliceSet
+
+
+class LegacyQueue(object):
+    """
+    Sorted list with the removeUnitEvents the queue had before lazy
+    cancelling: events of the unit after ts are dropped at once.
+    """
+    def __init__(self):
+        self.entries = []
+        self.sequence = count()
+
+    def addEvent(self, e):
+        self.entries.append((e.getTime(), next(self.sequence), e))
+
+    def removeUnitEvents(self, unit, ts):
+        self.entries = [item for item in self.entries
+                        if item[0] <= ts or item[2].getUnit() is not unit]
+
+    def drain(self):
+        return [(item[0], item[2].getUnit().getID()) for item in sorted(self.entries)]
+
+
+class CancelEventsTest(unittest.TestCase):
+
+    def check(self, engine):
+        rand = Random(1)
+        units = [SliceSet("unit-" + str(i), []) for i in xrange(3)]
+        legacy = LegacyQueue()
+        queue = getEventQueue(engine)
+
+        def add(count, start):
+            for i in xrange(count):
+                # whole hours, some events fall on the cancel times
+                e = Event(Event.EventType.Failure, float(start + rand.randint(0, 20)),
+                          rand.choice(units))
+                legacy.addEvent(e)
+                queue.addEvent(e)
+
+        add(200, 0)
+        for ts in [5.0, 10.0]:
+            legacy.removeUnitEvents(units[0], ts)
+            units[0].cancelEvents(ts)
+            add(50, ts)
+        legacy.removeUnitEvents(units[1], 12.0)
+        units[1].cancelEvents(12.0)
+
+        drained = []
+        e = queue.removeFirst()
+        while e is not None:
+            drained.append((e.getTime(), e.getUnit().getID()))
+            e = queue.removeFirst()
+        self.assertEqual(drained, legacy.drain())
+
+    def testHeap(self):
+        self.check("heap")
+
+    def testCalendar(self):
+        self.check("calendar")
+
+    def testArray(self):
+        self.check("array")
+
+    def testCancelAll(self):
+        unit = SliceSet("unit", [])
+        queue = getEventQueue("heap")
+        for t in [1.0, 2.0, 3.0]:
+            queue.addEvent(Event(Event.EventType.Failure, t, unit))
+        unit.cancelEvents()
+        self.assertTrue(queue.removeFirst() is None)
+
+
+class RemoveTest(unittest.TestCase):
+
+    def check(self, engine):
+        rand = Random(2)
+        unit = SliceSet("unit", [])
+        queue = getEventQueue(engine)
+        # alone in its bucket
+        e = Event(Event.EventType.Failure, 3.5, unit)
+        queue.addEvent(e)
+        queue.remove(e)
+        self.assertEqual(queue.size(), 0)
+        self.assertTrue(queue.removeFirst() is None)
+
+        queue = getEventQueue(engine)
+        expected = []
+        numbers = count()
+
+        # info numbers the events, the array store pops copies of them
+        def add(count, start):
+            events = []
+            for i in xrange(count):
+                e = Event(Event.EventType.Failure, start + rand.randint(0, 40)*0.5, unit,
+                          next(numbers))
+                queue.addEvent(e)
+                expected.append(e)
+                events.append(e)
+            return events
+
+        def remove(events):
+            for e in rand.sample(events, len(events)//4):
+                queue.remove(e)
+                expected.remove(e)
+
+        remove(add(100, 0.0))
+        drained = [queue.removeFirst() for i in xrange(10)]
+        # later events, the array store takes them into its side heap
+        remove(add(40, drained[-1].getTime()))
+        self.assertEqual(queue.size(), len(expected) - 10)
+        e = queue.removeFirst()
+        while e is not None:
+            drained.append(e)
+            e = queue.removeFirst()
+        self.assertEqual([(e.getTime(), e.info) for e in drained],
+                         sorted((e.getTime(), e.info) for e in expected))
+
+    def testHeap(self):
+        self.check("heap")
+
+    def testCalendar(self):
+        self.check("calendar")
+
+    def testArray(self):
+        self.check("array")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from random import seed
+
+import numpy
+from numpy import array, sort, concatenate, searchsorted, diff
+
+from simulator.Event import Event
+from simulator.EventQueue import EventQueue
+from simulator.Configuration import Configuration
+from simulator.XMLParser import XMLParser
+from simulator.unit.Machine import Machine
+from simulator.unit.Unit import Unit
+from simulator.unit.DiskWithScrubbing import DiskWithScrubbing
+from simulator.unit.FleetGenerator import FleetGenerator, _memoryless
+from tests.test_simulation import CONF, run
+
+
+def generate(fleet, random_seed, conf_path=CONF, superpose=True):
+    seed(random_seed)
+    numpy.random.seed(random_seed)
+    # the global random streams, not the unit streams of an earlier simulation
+    Unit.random_seed = None
+    conf = Configuration(conf_path)
+    root = XMLParser(conf).readFile()[0]
+    queue = EventQueue()
+    if fleet:
+        FleetGenerator(root, superpose).generateEvents(queue, 0, conf.total_time)
+    else:
+        root.generateEvents(queue, 0, conf.total_time, True)
+    events = []
+    e = queue.removeFirst()
+    while e is not None:
+        events.append(e)
+        e = queue.removeFirst()
+    return conf, events
+
+
+# [failure, recovery) of the failures of every unit
+def downIntervals(events):
+    intervals = {}
+    for e in events:
+        if e.getType() == Event.EventType.Failure:
+            intervals.setdefault(e.getUnit().getID(), []).append(
+                (e.getTime(), e.next_recovery_time))
+    return intervals
+
+
+# two sample Kolmogorov-Smirnov statistic
+def ksStatistic(first, second):
+    first, second = sort(first), sort(second)
+    values = concatenate((first, second))
+    return abs(searchsorted(first, values, side="right")/float(len(first)) -
+               searchsorted(second, values, side="right")/float(len(second))).max()
+
+
+# times between the LSEs of every disk
+def latentGaps(events):
+    times = {}
+    for e in events:
+        if e.getType() == Event.EventType.LatentDefect:
+            times.setdefault(e.getUnit().getID(), []).append(e.getTime())
+    return concatenate([diff(array(unit_times)) for unit_times in times.values()])
+
+
+class FleetGeneratorTest(unittest.TestCase):
+
+    def testEventsInsideParentWindows(self):
+        conf, events = generate(True, 3)
+        kinds = set((e.getUnit().__class__, e.getType()) for e in events)
+        for kind in [(Machine, Event.EventType.Failure), (Machine, Event.EventType.Recovered),
+                     (DiskWithScrubbing, Event.EventType.Failure),
+                     (DiskWithScrubbing, Event.EventType.LatentDefect),
+                     (DiskWithScrubbing, Event.EventType.LatentRecovered)]:
+            self.assertTrue(kind in kinds)
+        intervals = downIntervals(events)
+        for e in events:
+            self.assertTrue(0 <= e.getTime() <= conf.total_time)
+            if e.getType() not in (Event.EventType.Failure, Event.EventType.LatentDefect):
+                continue
+            if e.getType() == Event.EventType.Failure:
+                self.assertTrue(e.next_recovery_time > e.getTime())
+            # no failure of a unit while one of its ancestors is down
+            parent = e.getUnit().getParent()
+            while parent is not None:
+                for failure_time, recovery_time in intervals.get(parent.getID(), []):
+                    self.assertFalse(failure_time < e.getTime() < recovery_time)
+                parent = parent.getParent()
+        # failures of a unit one after the other
+        for unit_intervals in intervals.values():
+            for (_, recovery_time), (failure_time, _) in zip(unit_intervals,
+                                                             unit_intervals[1:]):
+                self.assertTrue(recovery_time <= failure_time)
+
+    def testSameRatesAsUnitByUnit(self):
+        counts = [Counter(), Counter()]
+        for fleet in (False, True):
+            for random_seed in xrange(8):
+                counts[fleet].update((e.getUnit().__class__.__name__, e.getType(), e.info)
+                                     for e in generate(fleet, random_seed)[1])
+        self.assertEqual(set(counts[0]), set(counts[1]))
+        # within 4 standard deviations of the difference of two Poisson counts
+        for kind in counts[0]:
+            self.assertTrue(abs(counts[0][kind] - counts[1][kind]) <=
+                            4*(counts[0][kind] + counts[1][kind])**0.5, kind)
+
+    def testSuperposedLatentErrors(self):
+        directory = tempfile.mkdtemp()
+        try:
+            # ten years of the tiny layout, about 1300 LSEs
+            conf_path = os.path.join(directory, "long.conf")
+            with open(CONF) as conf_file:
+                contents = conf_file.read().replace("total_time = 8760",
+                                                    "total_time = 87600")
+            with open(conf_path, "w") as conf_file:
+                conf_file.write(contents)
+            conf, events = generate(True, 6, conf_path)
+            root = events[0].getUnit()
+            while root.getParent() is not None:
+                root = root.getParent()
+            disk = root.getChildren()[0].getChildren()[0].getChildren()[0].getChildren()[0]
+            self.assertTrue(_memoryless(disk.latent_error_generator))
+
+            superposed = latentGaps(events)
+            unit_by_unit = latentGaps(generate(False, 7, conf_path)[1])
+            self.assertTrue(len(superposed) > 1000 and len(unit_by_unit) > 1000)
+            # critical value at the 0.001 level
+            critical = 1.95*((len(superposed) + len(unit_by_unit)) /
+                             float(len(superposed)*len(unit_by_unit)))**0.5
+            self.assertTrue(ksStatistic(superposed, unit_by_unit) < critical)
+            # the LSEs drawn one after the other as well
+            rounds = latentGaps(generate(True, 8, conf_path, False)[1])
+            self.assertTrue(ksStatistic(superposed, rounds) < critical)
+        finally:
+            shutil.rmtree(directory)
+
+    def testSimulation(self):
+        directory = tempfile.mkdtemp()
+        try:
+            conf_path = os.path.join(directory, "fleet.conf")
+            shutil.copy(CONF, conf_path)
+            with open(conf_path, "a") as conf_file:
+                conf_file.write("fleet_generation = true\n")
+            sim, events, result = run(conf_path, 5)
+            self.assertTrue(events > 0)
+            self.assertEqual((events, result), run(conf_path, 5)[1:])
+
+            with open(conf_path, "a") as conf_file:
+                conf_file.write("lazy_generation = true\n")
+            self.assertRaises(Exception, Configuration, conf_path)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
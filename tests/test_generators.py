@@ -0,0 +1,135 @@
+import unittest
+
+import numpy
+from numpy import allclose, array_equal, full, inf
+
+from simulator.failure.EventGenerator import EventGenerator
+from simulator.failure.WeibullGenerator import WeibullGenerator
+from simulator.failure.GaussianGenerator import GaussianGenerator
+from simulator.failure.Constant import Constant
+from simulator.failure.Uniform import Uniform
+from simulator.failure.Real import Real
+from simulator.failure.Period import Period
+from simulator.failure.NoFailure import NoFailure
+from simulator.failure.Piecewise import Piecewise
+
+SIZE = 2000
+
+
+def times(span=2000.0, random_seed=1):
+    # current times and the start times the draws begin at, up to span before
+    state = numpy.random.RandomState(random_seed)
+    starts = state.uniform(0, 500, SIZE)
+    return starts + state.uniform(0, span, SIZE), starts
+
+
+class PatchedRandom(object):
+    # the name function of the generators' stream reads the numpy draws
+    # generateNextEvents draws after numpy.random.seed(random_seed)
+    def __init__(self, name, random_seed, shape, wrap=None, draw=numpy.random.random_sample):
+        numpy.random.seed(random_seed)
+        stream = iter(draw(shape).ravel().tolist())
+        self.original = EventGenerator.stream
+        EventGenerator.stream = type("Stream", (object,), {})()
+        setattr(EventGenerator.stream, name, wrap(stream) if wrap else lambda: next(stream))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        EventGenerator.stream = self.original
+
+
+class VectorisedGeneratorTest(unittest.TestCase):
+
+    def scalarDraws(self, generator, current_times, start_times, attribute):
+        # one draw from every start time, generateNextEvent moves it
+        draws = []
+        for current_time, start_time in zip(current_times.tolist(), start_times.tolist()):
+            setattr(generator, attribute, start_time)
+            draws.append(generator.generateNextEvent(current_time))
+        return draws
+
+    def testWeibull(self):
+        current_times, start_times = times()
+        for beta in [1.0, 1.12, 0.7]:
+            generator = WeibullGenerator("w", {"gamma": 0.5, "lamda": 1500.0, "beta": beta})
+            with PatchedRandom("random", 2, SIZE):
+                scalar = self.scalarDraws(generator, current_times, start_times, "start_time")
+            numpy.random.seed(2)
+            self.assertTrue(allclose(generator.generateNextEvents(current_times, start_times),
+                                     scalar, rtol=1e-12))
+            # the start time of the generator by default
+            generator.reset(3.0)
+            with PatchedRandom("random", 3, SIZE):
+                scalar = [generator.generateNextEvent(t) for t in current_times.tolist()]
+            numpy.random.seed(3)
+            self.assertTrue(allclose(generator.generateNextEvents(current_times), scalar,
+                                     rtol=1e-12))
+
+    def testGaussian(self):
+        current_times, start_times = times(15.0)
+        generator = GaussianGenerator("g", {"mean": 10.0, "stddev": 5.0, "minval": 4.0})
+        gauss = lambda stream: lambda mu, sigma: mu + sigma*next(stream)
+        with PatchedRandom("gauss", 4, 2*SIZE, gauss, numpy.random.randn):
+            scalar = self.scalarDraws(generator, current_times, start_times, "start_time")
+        numpy.random.seed(4)
+        self.assertTrue(array_equal(generator.generateNextEvents(current_times,
+                                                                 start_times), scalar))
+        numpy.random.seed(5)
+        samples = generator.sample(SIZE)
+        self.assertTrue((samples >= 4.0).all())
+
+    def testUniform(self):
+        current_times = times()[0]
+        generator = Uniform("u", {"lamda": 5.0})
+        numpy.random.seed(6)
+        scalar = [generator.generateNextEvent(t) for t in current_times.tolist()]
+        numpy.random.seed(6)
+        self.assertTrue(array_equal(generator.generateNextEvents(current_times), scalar))
+
+    def testReal(self):
+        current_times = times()[0]
+        generator = Real("r", {"gamma": 0.5, "lamda": 0.25})
+        uniform = lambda stream: lambda a, b: a + (b - a)*next(stream)
+        with PatchedRandom("uniform", 7, SIZE, uniform):
+            scalar = [generator.generateNextEvent(t) for t in current_times.tolist()]
+        numpy.random.seed(7)
+        self.assertTrue(allclose(generator.generateNextEvents(current_times), scalar,
+                                 rtol=1e-15))
+
+    def testPiecewise(self):
+        current_times, start_times = times(10.0)
+        intervals, values = Piecewise.intervals, Piecewise.values
+        Piecewise.intervals, Piecewise.values = [0, 0.3, 0.9, 1.0, 1.0], [0.1, 1.0, 6.0, 24.0]
+        try:
+            generator = Piecewise("p", {})
+            with PatchedRandom("random", 8, (SIZE, 2)):
+                scalar = self.scalarDraws(generator, current_times, start_times,
+                                          "previous_event")
+            numpy.random.seed(8)
+            self.assertTrue(allclose(generator.generateNextEvents(current_times,
+                                                                  start_times),
+                                     scalar, rtol=1e-15))
+        finally:
+            Piecewise.intervals, Piecewise.values = intervals, values
+
+    def testDeterministic(self):
+        current_times, start_times = times()
+        constant = Constant("c", {"freq": 1000.0})
+        self.assertEqual(constant.generateNextEvents(current_times, start_times).tolist(),
+                         self.scalarDraws(constant, current_times, start_times, "previous_event"))
+        period = Period("p", {"gamma": 168.0})
+        self.assertEqual(period.generateNextEvents(current_times).tolist(),
+                         [period.generateNextEvent(t) for t in current_times.tolist()])
+        self.assertTrue(array_equal(period.sample(3), full(3, 168.0)))
+        self.assertTrue(array_equal(NoFailure("n", {}).sample(3), full(3, inf)))
+
+    def testSampleMean(self):
+        numpy.random.seed(9)
+        generator = WeibullGenerator("w", {"gamma": 1.0, "lamda": 100.0, "beta": 1.0})
+        self.assertAlmostEqual(generator.sample(200000).mean()/101.0, 1.0, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from random import seed
+
+import numpy
+
+from simulator.Event import Event
+from simulator.EventQueue import EventQueue
+from simulator.Configuration import Configuration
+from simulator.XMLParser import XMLParser
+from simulator.unit.Unit import Unit
+from simulator.unit.DiskWithScrubbing import DiskWithScrubbing, expectedLatentErrors
+from simulator.unit.FleetGenerator import FleetGenerator
+from tests.test_simulation import CONF, run
+
+
+# (LatentDefect events, LatentRecovered events, expected LatentDefect events,
+# expected LatentRecovered events) of generating the mission
+def generate(fleet, random_seed, lazy):
+    seed(random_seed)
+    numpy.random.seed(random_seed)
+    # the global random streams, not the unit streams of an earlier simulation
+    Unit.random_seed = None
+    DiskWithScrubbing.lazy_latent_errors = lazy
+    conf = Configuration(CONF)
+    root = XMLParser(conf).readFile()[0]
+    queue = EventQueue()
+    if fleet:
+        FleetGenerator(root).generateEvents(queue, 0, conf.total_time)
+    else:
+        root.generateEvents(queue, 0, conf.total_time, True)
+    counts = [0, 0, 0.0, 0.0]
+    e = queue.removeFirst()
+    while e is not None:
+        counts[0] += e.getType() == Event.EventType.LatentDefect
+        counts[1] += e.getType() == Event.EventType.LatentRecovered
+        e = queue.removeFirst()
+    units = [root]
+    while units:
+        unit = units.pop()
+        if isinstance(unit, DiskWithScrubbing):
+            counts[2] += unit.expected_latent_errors
+            counts[3] += unit.expected_scrubs
+        else:
+            units.extend(unit.getChildren())
+    return counts
+
+
+class LazyLatentErrorsTest(unittest.TestCase):
+
+    def tearDown(self):
+        DiskWithScrubbing.lazy_latent_errors = False
+
+    def testExpectedLatentErrors(self):
+        # a period of 10 from 5 to 32: LSEs scrubbed at 10, 20, 30 up to 30,
+        # the first after it
+        latent_errors, scrubs = expectedLatentErrors(0.1, 10.0, 5.0, 32.0)
+        self.assertAlmostEqual(scrubs, 2.5)
+        self.assertAlmostEqual(latent_errors, 2.5 + 1 - numpy.exp(-0.2))
+        # nothing in an empty segment
+        self.assertEqual(expectedLatentErrors(0.1, 10.0, 7.0, 7.0), (0.0, 0.0))
+
+    def testSameCountsInExpectation(self):
+        eager = numpy.zeros(4)
+        for random_seed in xrange(8):
+            eager += generate(False, random_seed, False)
+        self.assertTrue(eager[0] > 500)
+        for fleet in (False, True):
+            lazy = numpy.zeros(4)
+            for random_seed in xrange(8):
+                lazy += generate(fleet, random_seed, True)
+            # no LSE events queued
+            self.assertEqual(lazy[0] + lazy[1], 0)
+            # within 4 standard deviations of the difference of two Poisson counts
+            for count, expected in zip(eager[:2], lazy[2:]):
+                self.assertTrue(abs(count - expected) <= 4*(2*expected)**0.5,
+                                (fleet, count, expected))
+
+    def testSimulation(self):
+        directory = tempfile.mkdtemp()
+        try:
+            # an LSE every 500 hours per disk, so failures meet LSEs
+            xml_path = os.path.join(directory, "layer.xml")
+            with open(Configuration(CONF).xml_file_path) as xml_file:
+                contents = xml_file.read().replace("<lamda>9259.0</lamda>",
+                                                   "<lamda>500.0</lamda>")
+            with open(xml_path, "w") as xml_file:
+                xml_file.write(contents)
+            with open(CONF) as conf_file:
+                contents = conf_file.read()
+            contents = contents.replace("/root/SIMDDC/conf/layer.xml", xml_path)
+            eager_path = os.path.join(directory, "eager.conf")
+            with open(eager_path, "w") as conf_file:
+                conf_file.write(contents)
+            conf_path = os.path.join(directory, "lazy.conf")
+            with open(conf_path, "w") as conf_file:
+                conf_file.write(contents + "lazy_latent_errors = true\n"
+                                "check_slice_counters = true\n")
+
+            sim, events, result = run(conf_path, 5)
+            self.assertEqual((events, result), run(conf_path, 5)[1:])
+            # most events of the eager run are LSEs
+            self.assertTrue(0 < events < run(eager_path, 5)[1]/2)
+
+            with open(conf_path, "a") as conf_file:
+                conf_file.write("fleet_generation = true\n")
+            self.assertTrue(run(conf_path, 5)[1] > 0)
+
+            with open(conf_path, "a") as conf_file:
+                conf_file.write("checkpoint_interval = 1000\n")
+            self.assertRaises(Exception, Configuration, conf_path)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
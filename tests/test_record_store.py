@@ -0,0 +1,133 @@
+import unittest
+from random import Random
+
+from numpy import unique
+
+from simulator.RecordStore import IntervalStore, LossStore
+
+
+def randomHistory(seed=1, steps=5000, slices=range(41)):
+    # opens and closes in time order, several slices at one time
+    rand = Random(seed)
+    history = []
+    time = 0.0
+    for i in xrange(steps):
+        if rand.random() < 0.3:
+            time += rand.choice([0.5, 1.25, 3.0])
+        history.append((rand.random() < 0.55, rand.choice(slices), time))
+    return history, time + 10
+
+
+def replay(history, stores):
+    for is_open, slice_index, time in history:
+        for store in stores:
+            if is_open:
+                store.open(slice_index, time)
+            else:
+                store.close(slice_index, time)
+
+
+# the former EventHandler.processDuration on its slice dict of intervals
+def legacyProcessDuration(unavailable_slice_durations, end_time, merge_flag):
+    TTFs = []
+    FTs = []
+    TTRs = []
+    unavail_slices = unavailable_slice_durations.keys()
+    if len(unavail_slices) == 0:
+        return [], []
+    for slice_index in unavail_slices:
+        for duration in unavailable_slice_durations[slice_index]:
+            if merge_flag and (duration[0] in FTs):
+                continue
+            FTs.append(duration[0])
+            if len(duration) == 1:
+                TTRs.append(end_time - duration[0])
+            else:
+                TTRs.append(duration[1] - duration[0])
+    FTs.sort()
+    TTFs.append(FTs[0])
+    for i in xrange(len(FTs)-1):
+        TTFs.append(FTs[i+1] - FTs[i])
+    return TTFs, TTRs
+
+
+# the former slice dict the handler filled on the same history
+def legacyDurations(history):
+    durations = {}
+    for is_open, slice_index, time in history:
+        if is_open:
+            if slice_index in durations.keys():
+                durations[slice_index].append([time])
+            else:
+                durations[slice_index] = [[time]]
+        elif slice_index in durations.keys() and len(durations[slice_index][-1]) == 1:
+            durations[slice_index][-1].append(time)
+    return durations
+
+
+class IntervalStoreTest(unittest.TestCase):
+
+    def testStatisticsMatchRecords(self):
+        history, end_time = randomHistory()
+        stores = [IntervalStore(), IntervalStore(keep_records=False)]
+        replay(history, stores)
+
+        TTFs, TTRs = stores[0].failureTimes(end_time, True)
+        all_TTRs = stores[0].failureTimes(end_time, False)[1]
+        self.assertEqual(stores[0].statistics(end_time),
+                         (len(TTFs), sum(TTFs), sum(TTRs), sum(all_TTRs)))
+        # the running merged duration takes the first interval opened at a time
+        slices, starts, ends = stores[0].intervals(end_time)
+        first = unique(starts, return_index=True)[1]
+        for store in stores:
+            failure_times, last_failure_time, merged, total = store.runningStatistics(end_time)
+            self.assertEqual(failure_times, len(TTFs))
+            self.assertAlmostEqual(last_failure_time, sum(TTFs), 9)
+            self.assertAlmostEqual(merged, (ends[first] - starts[first]).sum(), 9)
+            self.assertAlmostEqual(total, sum(all_TTRs), 9)
+        self.assertEqual(stores[1].statistics(end_time), stores[1].runningStatistics(end_time))
+        self.assertEqual(len(stores[1].records), 0)
+        self.assertEqual(sum(len(item) for item in stores[0].toDict().values()), len(stores[0]))
+
+    def testSameAsLegacyProcessDuration(self):
+        # slices far apart, so the slice dict collides and resizes
+        for seed in xrange(4):
+            slices = Random(seed).sample(xrange(100000), 300)
+            history, end_time = randomHistory(seed, 20000, slices)
+            store = IntervalStore()
+            replay(history, [store])
+            durations = legacyDurations(history)
+            self.assertEqual(store.toDict(), durations)
+
+            # MTTR, MTBF, PUA and PUS as end() reports them, to the bit
+            TTFs, TTRs = legacyProcessDuration(durations, end_time, True)
+            all_TTRs = legacyProcessDuration(durations, end_time, False)[1]
+            MTTF = sum(TTFs)/len(TTFs)
+            MTTR = sum(TTRs)/len(TTRs)
+            failure_times, TTF_sum, merged, total = store.statistics(end_time)
+            self.assertEqual(TTF_sum/failure_times, MTTF)
+            self.assertEqual(merged/failure_times, MTTR)
+            self.assertEqual(total, sum(all_TTRs))
+            self.assertEqual(store.failureTimes(end_time, True), (TTFs, TTRs))
+
+    def testEmpty(self):
+        store = IntervalStore()
+        self.assertEqual(store.failureTimes(100, True), ([], []))
+        self.assertEqual(store.statistics(100), (0, None, 0.0, 0.0))
+
+
+class LossStoreTest(unittest.TestCase):
+
+    def testDetailsMatchRecords(self):
+        rand = Random(2)
+        store = LossStore()
+        time = 0.0
+        for i in xrange(2000):
+            time += rand.choice([0.0, 0.0, 1.0])
+            store.add(i, time, rand.randint(0, 2), rand.randint(0, 9))
+        self.assertEqual(store.details(), store.recordDetails())
+        self.assertEqual(store.countUntil(time), len(store))
+
+
+if __name__ == "__main__":
+    unittest.main()
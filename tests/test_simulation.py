@@ -0,0 +1,90 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+from random import seed
+
+import numpy
+
+from simulator.Event import Event
+from simulator.Simulation import Simulation
+from simulator.unit.Unit import Unit
+from simulator.unit.Machine import Machine
+
+CONF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "conf", "tiny.conf")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# one simulation in a new interpreter, prints its event count and result
+FRESH_RUN = """
+from random import seed
+import numpy
+from simulator.Simulation import Simulation
+seed(%d)
+numpy.random.seed(%d)
+sim = Simulation(%r)
+result = sim.run()
+print "RESULT", sim.total_events_handled, result.toString()
+"""
+
+
+def run(conf_path, random_seed):
+    seed(random_seed)
+    numpy.random.seed(random_seed)
+    sim = Simulation(conf_path)
+    result = sim.run()
+    return sim, sim.total_events_handled, result.toString()
+
+
+class BackToBackTest(unittest.TestCase):
+
+    def testIndependentRuns(self):
+        first, first_events, first_result = run(CONF, 1)
+        self.assertTrue(first_events > 0)
+
+        second = Simulation(CONF)
+        self.assertEqual(Unit.unit_count, 0)
+        self.assertEqual(Machine.id_counter, 0)
+        self.assertEqual(Event.id_counter, 0)
+        seed(2)
+        numpy.random.seed(2)
+        second_result = second.run().toString()
+        second_events = second.total_events_handled
+
+        self.assertTrue(first.events is not second.events)
+        self.assertEqual(first.events.size(), 0)
+        self.assertEqual(second.events.size(), 0)
+
+        output = subprocess.check_output([sys.executable, "-c", FRESH_RUN % (2, 2, CONF)],
+                                         cwd=ROOT)
+        line = [item for item in output.splitlines() if item.startswith("RESULT")][0]
+        self.assertEqual(line, "RESULT %d %s" % (second_events, second_result))
+
+    def testSameSeedSameRun(self):
+        events, result = run(CONF, 3)[1:]
+        self.assertEqual(run(CONF, 3)[1:], (events, result))
+
+
+class LazyGenerationTest(unittest.TestCase):
+
+    def tearDown(self):
+        Unit.lazy_generation = False
+
+    def testSameRunAsEager(self):
+        directory = tempfile.mkdtemp()
+        try:
+            conf_path = os.path.join(directory, "lazy.conf")
+            shutil.copy(CONF, conf_path)
+            with open(conf_path, "a") as conf_file:
+                conf_file.write("lazy_generation = true\n")
+            for random_seed in (1, 2):
+                events, result = run(CONF, random_seed)[1:]
+                self.assertTrue(events > 0)
+                self.assertEqual(run(conf_path, random_seed)[1:], (events, result))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
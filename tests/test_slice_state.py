@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from numpy import random, arange, unique, count_nonzero, array_equal, int8, int64
+
+from simulator.SliceState import sliceState
+from tests.test_simulation import CONF, run
+
+
+class SparseStatusTest(unittest.TestCase):
+
+    def testSameAsDense(self):
+        # chunks fail and come back in batches and one by one, the table
+        # grows past its first capacity and loses most slices again
+        random.seed(1)
+        total_slices, n = 5000, 9
+        dense = sliceState(total_slices, n)[0]
+        status, lost, avail_counts, durable_counts = sliceState(total_slices, n, True)
+        states = [-2, -1, 0, 1]
+        for step in xrange(300):
+            slices = random.randint(0, total_slices, random.randint(1, 200)).astype(int64)
+            if step % 5 == 0:
+                slices = unique(slices)
+            indexes = random.randint(0, n, len(slices)).astype(int64)
+            value = 1 if step % 3 == 0 else states[random.randint(0, 4)]
+            if step % 5 == 0:
+                # rows at once, the way parallelRepairMany writes them
+                rows = dense[slices]
+                rows[rows == 0] = value
+                dense[slices] = rows
+                status[slices] = rows
+            else:
+                dense[slices, indexes] = value
+                status[slices, indexes] = value
+            slice_index = int(slices[0])
+            dense[slice_index, int(indexes[0])] = 1
+            status[slice_index, int(indexes[0])] = 1
+            self.assertTrue(array_equal(status[slices, indexes], dense[slices, indexes]))
+            self.assertEqual(status[slice_index, 1], dense[slice_index, 1])
+            self.assertTrue(array_equal(status[slice_index], dense[slice_index]))
+            self.assertEqual(avail_counts[slice_index], count_nonzero(dense[slice_index] == 1))
+            bit_values = 1 << arange(n)
+            self.assertEqual(status.masks(slice_index),
+                             ((dense[slice_index] == 1).dot(bit_values),
+                              (dense[slice_index] < 0).dot(bit_values)))
+            self.assertTrue(array_equal(durable_counts[slices],
+                                        count_nonzero(dense[slices] >= 0, axis=1)))
+        self.assertTrue(array_equal(status.toDense(), dense))
+        degraded = (dense != 1).any(axis=1)
+        self.assertEqual(status.size, count_nonzero(degraded))
+        self.assertEqual(sorted(status.slices().tolist()), degraded.nonzero()[0].tolist())
+
+        # every slice healthy again empties the table
+        dense[:] = 1
+        status[degraded.nonzero()[0]] = dense[degraded]
+        self.assertEqual(status.size, 0)
+        self.assertEqual(status.word(int(degraded.nonzero()[0][0])), 0)
+
+    def testState(self):
+        status = sliceState(100, 4, True)[0]
+        status[[3, 50, 3], [0, 2, 1]] = [-1, 0, -2]
+        slices, words = status.getState()
+        copy = sliceState(100, 4, True)[0]
+        copy.setState(slices, words)
+        self.assertTrue(array_equal(copy.toDense(), status.toDense()))
+        self.assertTrue(array_equal(copy[3], [-1, -2, 1, 1]))
+        self.assertEqual(copy[3].dtype, int8)
+
+    def testLostBitmap(self):
+        lost = sliceState(20, 4, True)[1]
+        for slice_index in [0, 7, 8, 19]:
+            lost[slice_index] = True
+        lost[8] = False
+        self.assertTrue(lost[7] and not lost[8] and not lost[1])
+        self.assertEqual(lost[[0, 1, 7, 8, 19]].tolist(), [True, False, True, False, True])
+        self.assertEqual(lost.toDense().nonzero()[0].tolist(), [0, 7, 19])
+
+
+class SparseSimulationTest(unittest.TestCase):
+
+    def testSameRunAsDense(self):
+        directory = tempfile.mkdtemp()
+        try:
+            conf_path = os.path.join(directory, "sparse.conf")
+            shutil.copy(CONF, conf_path)
+            with open(conf_path, "a") as conf_file:
+                conf_file.write("slice_state = sparse\ncheck_slice_counters = true\n")
+            self.assertEqual(run(conf_path, 4)[1:], run(CONF, 4)[1:])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()